@@ -0,0 +1,194 @@
+"""
+Artifact cache of finished vendor directories, for CI.
+
+Vendoring the same inputs twice gives the same vendor directory, so CI jobs can skip
+the toolchain and pip altogether: the finished vendor directory (after pruning,
+tree-shaking, minification, compilation and bundling) is stored as a compressed
+archive in a local or mounted directory, keyed by everything it was built from, and
+restored on the next run with the same inputs.
+
+The key covers vendor.txt, the versions resolved in uv.lock, the distributions pip
+resolves vendor.txt to (so a new upstream release is a miss), the wheelhouse
+installed from, the Python and installed pyodide-build versions, the installer and
+post-install options and, when tree-shaking, the project sources the shaken
+directory depends on.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+from .cache import compute_cache_key
+from .lockfile import DEFAULT_LOCKFILE
+from .staging import swap_in
+from .treeshake import index_modules
+from .wheels import hash_file
+
+# Bumped when the archive layout changes
+ARTIFACT_VERSION = 1
+
+ARTIFACT_SUFFIX = ".tar.gz"
+
+
+def _hash_optional(path: Path) -> str:
+    """Hash a file's contents, or return "missing" if it does not exist."""
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return "missing"
+
+
+def compute_artifact_key(
+    vendor_file: Path,
+    vendor_dir: Path,
+    python_version: str,
+    pyodide_build_version: Optional[str],
+    options: Mapping[str, Any],
+    entry_point: Optional[Path] = None,
+    lockfile: Path = DEFAULT_LOCKFILE,
+    resolved: Optional[Mapping[str, Dict[str, str]]] = None,
+    wheelhouse: Optional[Path] = None,
+) -> str:
+    """
+    Compute the artifact cache key of a vendoring run.
+
+    Args:
+        vendor_file: The vendor.txt the packages are installed from
+        vendor_dir: Directory the packages are vendored to
+        python_version: Python version of the Workers runtime
+        pyodide_build_version: Version of pyodide-build installed in the toolchain,
+            None if unknown
+        options: Installer and post-install options shaping the vendor directory
+            (JSON serializable)
+        entry_point: The Worker's entry point, when tree-shaking
+        lockfile: Path to the uv.lock file pinning the resolved versions
+        resolved: The distributions vendor.txt resolves to, as returned by
+            resolve_vendor_requirements
+        wheelhouse: Directory of wheels the packages are installed from
+
+    Returns:
+        Short hexadecimal key
+    """
+    parts = [
+        str(ARTIFACT_VERSION),
+        vendor_dir.name,
+        _hash_optional(vendor_file),
+        _hash_optional(lockfile),
+        python_version,
+        pyodide_build_version or "latest",
+        json.dumps(options, sort_keys=True, default=str),
+    ]
+    if resolved is not None:
+        parts.extend(
+            f"{package['requirement']} {package.get('sha256', '')}"
+            for _name, package in sorted(resolved.items())
+        )
+    if wheelhouse is not None:
+        # pip does not always report the hash of the files it picked from there
+        digest = hashlib.sha256()
+        for path in sorted(wheelhouse.iterdir()):
+            if path.is_file():
+                digest.update(f"{path.name}\0{hash_file(path)}\0".encode())
+        parts.append(digest.hexdigest())
+    if entry_point is not None:
+        # What tree-shaking removes depends on every module the project imports
+        project_modules, _ = index_modules(entry_point.parent, exclude=[vendor_dir])
+        digest = hashlib.sha256()
+        for name, path in sorted(project_modules.items()):
+            digest.update(f"{name}\0".encode())
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+        parts.append(digest.hexdigest())
+    return compute_cache_key(*parts)
+
+
+def get_artifact_path(cache_dir: Path, key: str) -> Path:
+    """
+    Get the location of an archived vendor directory.
+
+    Args:
+        cache_dir: Directory of the artifact cache
+        key: Artifact cache key
+
+    Returns:
+        Path of the archive
+    """
+    return cache_dir / f"{key}{ARTIFACT_SUFFIX}"
+
+
+def store_artifact(
+    cache_dir: Path, key: str, vendor_dir: Path, extra_files: Iterable[Path] = ()
+) -> Path:
+    """
+    Archive a finished vendor directory into the artifact cache.
+
+    The archive is written to a temporary file and renamed, so concurrent jobs never
+    see a partial archive.
+
+    Args:
+        cache_dir: Directory of the artifact cache
+        key: Artifact cache key
+        vendor_dir: Directory the packages were vendored to
+        extra_files: Files next to vendor_dir to archive with it (e.g. a bundle)
+
+    Returns:
+        Path of the archive
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    artifact_path = get_artifact_path(cache_dir, key)
+    fd, tmp_name = tempfile.mkstemp(dir=cache_dir, suffix=f"{ARTIFACT_SUFFIX}.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f, tarfile.open(fileobj=f, mode="w:gz") as tar:
+            tar.add(vendor_dir, arcname=vendor_dir.name)
+            for path in extra_files:
+                tar.add(path, arcname=path.name)
+        os.replace(tmp_name, artifact_path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return artifact_path
+
+
+def restore_artifact(cache_dir: Path, key: str, vendor_dir: Path) -> bool:
+    """
+    Restore a vendor directory from the artifact cache.
+
+    The archive is extracted next to vendor_dir first, then swapped in like a staged
+    update (see swap_in), and the extra files stored with it are replaced.
+
+    Args:
+        cache_dir: Directory of the artifact cache
+        key: Artifact cache key
+        vendor_dir: Directory to restore the packages to
+
+    Returns:
+        Whether the artifact was found and restored
+
+    Raises:
+        RuntimeError: If the archive cannot be extracted
+    """
+    artifact_path = get_artifact_path(cache_dir, key)
+    if not artifact_path.is_file():
+        return False
+
+    vendor_dir.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=".vendorpy-restore-", dir=vendor_dir.parent))
+    try:
+        try:
+            with tarfile.open(artifact_path, "r:gz") as tar:
+                tar.extractall(staging, filter="data")
+        except (OSError, tarfile.TarError) as err:
+            raise RuntimeError(f"Failed to restore {artifact_path}: {err}") from err
+
+        # The archive holds vendor_dir under its own name, see compute_artifact_key
+        extra_files = [
+            entry.name for entry in staging.iterdir() if entry.name != vendor_dir.name
+        ]
+        swap_in(staging / vendor_dir.name, vendor_dir, extra_files)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return True
@@ -0,0 +1,182 @@
+"""
+Bundling of the vendor directory into a single zip archive.
+
+Wrangler uploads every vendored file as its own module, and the Workers runtime
+registers each of them, which adds up for vendor directories of thousands of files.
+A bundle packs the vendor directory into one archive, imported by ``zipimport``
+through a small loader module that puts the archive on ``sys.path``.
+
+The archive is reproducible: members are sorted, and timestamps and permissions are
+fixed, so bundling the same vendor directory twice gives the same bytes. Packages
+``zipimport`` cannot load (those shipping compiled extension modules) and packages
+excluded by the project are left in the vendor directory as files.
+"""
+
+import os
+import shutil
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Set
+
+import tomli
+
+from .distributions import canonicalize_name, find_installed_distributions
+from .treeshake import EXTENSION_SUFFIXES
+from .utils import DEFAULT_PYPROJECT
+
+BUNDLE_FORMATS = ("zip",)
+
+# Name of the loader module, next to the archive
+LOADER_MODULE = "vendor_bundle"
+
+# Timestamp of every member, the earliest a zip archive can store
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+LOADER_TEMPLATE = '''"""
+Make the packages bundled by vendorpy importable. Generated, do not edit.
+
+Import this module before any vendored package.
+"""
+
+import os
+import sys
+
+_ARCHIVE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "{archive}")
+if _ARCHIVE not in sys.path:
+    sys.path.insert(0, _ARCHIVE)
+'''
+
+
+@dataclass(frozen=True)
+class Bundle:
+    """The archive and loader a bundle was written to, and what it contains."""
+
+    archive: Path
+    loader: Path
+    files: int
+    size: int
+    kept: List[str]
+
+
+def load_bundle_exclusions(pyproject: Path = DEFAULT_PYPROJECT) -> List[str]:
+    """
+    Read the packages left out of the bundle from pyproject.toml.
+
+        [tool.vendorpy.bundle]
+        exclude = ["certifi"]
+
+    Args:
+        pyproject: Path to the project's pyproject.toml
+
+    Returns:
+        The configured package names
+
+    Raises:
+        ValueError: If the configuration is invalid
+    """
+    try:
+        with open(pyproject, "rb") as f:
+            config = tomli.load(f).get("tool", {}).get("vendorpy", {}).get("bundle", {})
+    except FileNotFoundError:
+        return []
+    except (OSError, tomli.TOMLDecodeError) as err:
+        raise ValueError(f"Failed to read {pyproject}: {err}") from err
+
+    exclude = config.get("exclude", [])
+    if not isinstance(exclude, list) or not all(isinstance(p, str) for p in exclude):
+        raise ValueError("tool.vendorpy.bundle.exclude must be a list of package names")
+    return exclude
+
+
+def _kept_top_levels(vendor_dir: Path, exclude: Iterable[str]) -> Set[str]:
+    """Find the top-level entries of the vendor directory to leave out of the bundle."""
+    excluded = {canonicalize_name(name) for name in exclude}
+    kept: Set[str] = set()
+    for dist in find_installed_distributions(vendor_dir).values():
+        if dist.canonical_name in excluded or any(
+            path.endswith(EXTENSION_SUFFIXES) for path in dist.files
+        ):
+            kept.update(path.split("/")[0] for path in dist.files)
+
+    # Extension modules no RECORD lists
+    for root, _dirs, files in os.walk(vendor_dir):
+        relative_root = Path(root).relative_to(vendor_dir)
+        if relative_root.parts and any(n.endswith(EXTENSION_SUFFIXES) for n in files):
+            kept.add(relative_root.parts[0])
+    return kept
+
+
+def _write_member(archive: zipfile.ZipFile, name: str, data: bytes = b"") -> None:
+    """Add a file, or a directory if name ends with a slash, with fixed metadata."""
+    info = zipfile.ZipInfo(name, ZIP_EPOCH)
+    info.create_system = 3  # Unix, for the permissions below
+    if name.endswith("/"):
+        info.external_attr = (0o40755 << 16) | 0x10
+    else:
+        info.external_attr = 0o100644 << 16
+        info.compress_type = zipfile.ZIP_DEFLATED
+    archive.writestr(info, data, compresslevel=9)
+
+
+def bundle_vendor_dir(
+    vendor_dir: Path, exclude: Iterable[str] = (), archive_path: Optional[Path] = None
+) -> Bundle:
+    """
+    Pack a vendor directory into a zip archive, with its loader module next to it.
+
+    Bundled files are removed from the vendor directory. ``__pycache__`` directories
+    are not bundled, since zipimport never reads them; sourceless bytecode
+    (``--compile-mode instead``) is.
+
+    Args:
+        vendor_dir: Directory the packages were vendored to
+        exclude: Names of distributions to leave in the vendor directory
+        archive_path: Where to write the archive (defaults to <vendor_dir>.zip next
+            to vendor_dir)
+
+    Returns:
+        The bundle written
+    """
+    kept = _kept_top_levels(vendor_dir, exclude)
+    if archive_path is None:
+        archive_path = vendor_dir.parent / f"{vendor_dir.name}.zip"
+    tmp_path = archive_path.with_name(f"{archive_path.name}.tmp")
+
+    bundled: List[Path] = []
+    files = 0
+    with zipfile.ZipFile(tmp_path, "w") as archive:
+        for entry in sorted(vendor_dir.iterdir()):
+            if entry.name in kept:
+                continue
+            bundled.append(entry)
+            if not entry.is_dir():
+                _write_member(archive, entry.name, entry.read_bytes())
+                files += 1
+                continue
+            for root, dirs, names in os.walk(entry):
+                dirs[:] = sorted(name for name in dirs if name != "__pycache__")
+                relative_root = Path(root).relative_to(vendor_dir).as_posix()
+                _write_member(archive, f"{relative_root}/")
+                for name in sorted(names):
+                    data = (Path(root) / name).read_bytes()
+                    _write_member(archive, f"{relative_root}/{name}", data)
+                    files += 1
+    os.replace(tmp_path, archive_path)
+
+    loader_path = archive_path.parent / f"{LOADER_MODULE}.py"
+    loader_path.write_text(LOADER_TEMPLATE.format(archive=archive_path.name))
+
+    for entry in bundled:
+        if entry.is_dir():
+            shutil.rmtree(entry)
+        else:
+            entry.unlink()
+
+    return Bundle(
+        archive=archive_path,
+        loader=loader_path,
+        files=files,
+        size=archive_path.stat().st_size,
+        kept=sorted(kept),
+    )
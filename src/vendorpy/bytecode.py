@@ -0,0 +1,224 @@
+"""
+Precompilation of the vendor directory to bytecode.
+
+Pyodide compiles every module it imports from source on each cold start of a
+Worker. Shipping bytecode compiled for the runtime's Python version skips that step.
+Modules are compiled by ``compileall`` with an interpreter of the target version,
+since bytecode is specific to a Python version, on a process pool. The pool runs in
+that interpreter's process: ``compileall`` forks its workers, and forking vendorpy,
+which may be running other pipeline steps on threads, can deadlock. Only a single
+job on vendorpy's own Python version is compiled in-process.
+
+The bytecode is compiled with the ``unchecked-hash`` invalidation mode: the upload
+does not preserve modification times, so timestamp-based bytecode would be
+considered stale and ignored.
+"""
+
+import compileall
+import os
+import py_compile
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .distributions import find_installed_distributions, rewrite_record
+from .profiling import run_command
+from .prune import remove_vendor_files
+
+# Where the bytecode is put: next to the sources, or replacing them
+COMPILE_MODES = ("alongside", "instead")
+
+# Bytecode magic numbers of the final releases, by Python version
+MAGIC_NUMBERS = {"3.11": 3495, "3.12": 3531, "3.13": 3571}
+
+
+def expected_magic(python_version: str) -> bytes:
+    """
+    Get the magic number bytecode of a Python version starts with.
+
+    Args:
+        python_version: Python version, e.g. "3.12" or "3.12.7"
+
+    Returns:
+        The 4 byte magic number
+
+    Raises:
+        ValueError: If the magic number of the version is unknown
+    """
+    major_minor = ".".join(python_version.split(".")[:2])
+    if major_minor not in MAGIC_NUMBERS:
+        raise ValueError(f"Unknown bytecode magic number for Python {python_version}")
+    return MAGIC_NUMBERS[major_minor].to_bytes(2, "little") + b"\r\n"
+
+
+def bytecode_path(source: Path, python_version: str, mode: str) -> Path:
+    """
+    Get the path the bytecode of a module is written to.
+
+    Args:
+        source: Path of the module's source
+        python_version: Python version the bytecode is compiled for
+        mode: "alongside" for the __pycache__ layout, "instead" for sourceless
+            bytecode next to the source
+
+    Returns:
+        Path of the bytecode file
+    """
+    if mode == "instead":
+        return source.with_suffix(".pyc")
+    tag = "cpython-" + "".join(python_version.split(".")[:2])
+    return source.parent / "__pycache__" / f"{source.stem}.{tag}.pyc"
+
+
+def _run_compileall(
+    vendor_dir: Path, python_version: str, mode: str, jobs: int
+) -> None:
+    """Compile every module below vendor_dir with an interpreter of the version."""
+    legacy = mode == "instead"
+    major_minor = ".".join(python_version.split(".")[:2])
+    # Tracebacks show vendor/<package>/<module>.py instead of the build machine path
+    ddir = vendor_dir.name
+
+    same_version = f"{sys.version_info[0]}.{sys.version_info[1]}" == major_minor
+    if same_version and jobs == 1:
+        compileall.compile_dir(
+            str(vendor_dir),
+            ddir=ddir,
+            force=True,
+            quiet=2,
+            legacy=legacy,
+            workers=1,
+            invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+        )
+        return
+
+    cmd = [
+        sys.executable if same_version else f"python{major_minor}",
+        "-m",
+        "compileall",
+        "-f",
+        "-qq",
+        "-j",
+        str(jobs),
+        "-d",
+        ddir,
+        "--invalidation-mode",
+        "unchecked-hash",
+    ]
+    if legacy:
+        cmd.append("-b")
+    cmd.append(str(vendor_dir))
+    try:
+        # compileall exits with 1 if some modules fail to compile, which is reported
+        # by the caller
+        run_command(cmd, check=False, capture_output=True, text=True)
+    except FileNotFoundError as err:
+        raise RuntimeError(
+            f"Python {python_version} is needed to compile bytecode for it. Please "
+            f"install Python {python_version} and try again."
+        ) from err
+
+
+def compile_vendor_dir(
+    vendor_dir: Path,
+    python_version: str = "3.12",
+    mode: str = "alongside",
+    jobs: int = 0,
+) -> Dict[str, List[str]]:
+    """
+    Precompile the modules of a vendor directory to bytecode.
+
+    With mode "instead", the sources of the modules that compiled are removed and
+    Python imports the sourceless bytecode. Modules that fail to compile (e.g.
+    templates named *.py) are kept as source either way. The bytecode is added to
+    the RECORD of the distribution owning the module.
+
+    Args:
+        vendor_dir: Directory the packages were vendored to
+        python_version: Python version of the Workers runtime
+        mode: "alongside" to ship bytecode next to the sources, "instead" to ship
+            bytecode only
+        jobs: Number of worker processes (0 for one per CPU)
+
+    Returns:
+        Dictionary with the "compiled" and "failed" module paths, relative to
+        vendor_dir
+
+    Raises:
+        ValueError: If the mode is unknown
+        RuntimeError: If no interpreter of the Python version is available
+    """
+    if mode not in COMPILE_MODES:
+        raise ValueError(f"Unknown compile mode: {mode}")
+
+    _run_compileall(vendor_dir, python_version, mode, jobs)
+
+    distributions = find_installed_distributions(vendor_dir)
+    owners = {path: dist for dist in distributions.values() for path in dist.files}
+
+    compiled: List[Tuple[str, str]] = []
+    failed: List[str] = []
+    for root, dirs, files in os.walk(vendor_dir):
+        dirs[:] = [name for name in dirs if name != "__pycache__"]
+        for name in files:
+            if not name.endswith(".py"):
+                continue
+            source = Path(root) / name
+            relative_source = source.relative_to(vendor_dir).as_posix()
+            pyc = bytecode_path(source, python_version, mode)
+            if pyc.exists():
+                compiled.append(
+                    (relative_source, pyc.relative_to(vendor_dir).as_posix())
+                )
+            else:
+                failed.append(relative_source)
+
+    added: Dict[str, List[Tuple[str, str, str]]] = {}
+    for relative_source, relative_pyc in compiled:
+        owner = owners.get(relative_source)
+        if owner is not None and relative_pyc not in owner.files:
+            size = str((vendor_dir / relative_pyc).stat().st_size)
+            added.setdefault(owner.canonical_name, []).append((relative_pyc, "", size))
+    for name, rows in added.items():
+        rewrite_record(distributions[name].dist_info, added=rows)
+
+    if mode == "instead":
+        # Cached bytecode is not used for modules without a source
+        obsolete = []
+        for relative_source, _pyc in compiled:
+            source = vendor_dir / relative_source
+            obsolete.append(relative_source)
+            obsolete.extend(
+                pyc.relative_to(vendor_dir).as_posix()
+                for pyc in (source.parent / "__pycache__").glob(f"{source.stem}.*.pyc")
+            )
+        remove_vendor_files(vendor_dir, obsolete)
+
+    return {
+        "compiled": sorted(source for source, _pyc in compiled),
+        "failed": sorted(failed),
+    }
+
+
+def check_bytecode(vendor_dir: Path, python_version: str = "3.12") -> List[str]:
+    """
+    Find bytecode in a vendor directory that the runtime's Python cannot load.
+
+    Args:
+        vendor_dir: Directory the packages were vendored to
+        python_version: Python version of the Workers runtime
+
+    Returns:
+        Paths of the bytecode files with a different magic number, relative to
+        vendor_dir
+
+    Raises:
+        ValueError: If the magic number of the version is unknown
+    """
+    magic = expected_magic(python_version)
+    mismatched = []
+    for path in sorted(vendor_dir.rglob("*.pyc")):
+        with open(path, "rb") as f:
+            if f.read(len(magic)) != magic:
+                mismatched.append(path.relative_to(vendor_dir).as_posix())
+    return mismatched
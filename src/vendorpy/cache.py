@@ -0,0 +1,384 @@
+"""
+Persistent cache shared across vendorpy runs and projects.
+
+Entries live under ``$XDG_CACHE_HOME/vendorpy`` (or ``~/.cache/vendorpy``) and are
+grouped by namespace, e.g. ``toolchains/<key>``. Every complete entry carries a small
+metadata file recording its size and when it was last used, which drives the
+size-bounded LRU eviction performed by ``prune_cache``.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no fcntl
+    fcntl = None  # type: ignore[assignment]
+
+# Environment variables that override the cache location and size budget
+CACHE_DIR_ENV = "VENDORPY_CACHE_DIR"
+CACHE_MAX_SIZE_ENV = "VENDORPY_CACHE_MAX_SIZE"
+
+# Default size budget for the whole cache (2 GiB)
+DEFAULT_CACHE_MAX_SIZE = 2 * 1024**3
+
+# Name of the metadata file that marks a cache entry as complete
+ENTRY_METADATA_FILE = ".vendorpy-cache-entry.json"
+
+_SIZE_SUFFIXES = {"": 1, "B": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def get_cache_dir() -> Path:
+    """
+    Get the root directory of the vendorpy cache.
+
+    Returns:
+        Path to the cache directory (not necessarily existing yet)
+    """
+    override = os.environ.get(CACHE_DIR_ENV)
+    if override:
+        return Path(override).expanduser()
+
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME")
+    base_dir = (
+        Path(xdg_cache_home).expanduser() if xdg_cache_home else Path.home() / ".cache"
+    )
+    return base_dir / "vendorpy"
+
+
+def compute_cache_key(*parts: str) -> str:
+    """
+    Compute a stable cache key from the given parts.
+
+    Args:
+        parts: Strings identifying the cached content (versions, hashes, ...)
+
+    Returns:
+        Short hexadecimal digest of the parts
+    """
+    digest = hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+    return digest[:16]
+
+
+def parse_size(size: str) -> int:
+    """
+    Parse a human readable size such as ``500M`` or ``2G`` into bytes.
+
+    Args:
+        size: Size string with an optional K/M/G/T suffix (binary units)
+
+    Returns:
+        Size in bytes
+
+    Raises:
+        ValueError: If the size string cannot be parsed
+    """
+    text = size.strip().upper().removesuffix("IB").removesuffix("B")
+    suffix = text[-1:] if text[-1:].isalpha() else ""
+    number = text[: len(text) - len(suffix)].strip()
+    try:
+        return int(float(number) * _SIZE_SUFFIXES[suffix])
+    except (KeyError, ValueError) as err:
+        raise ValueError(f"Invalid size: {size!r}") from err
+
+
+def format_size(num_bytes: float) -> str:
+    """
+    Format a byte count for display.
+
+    Args:
+        num_bytes: Number of bytes
+
+    Returns:
+        Human readable size, e.g. ``12.3 MiB``
+    """
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(num_bytes) < 1024:
+            return (
+                f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+            )
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TiB"
+
+
+def get_cache_max_size() -> int:
+    """
+    Get the configured size budget of the cache.
+
+    Returns:
+        Maximum cache size in bytes, from ``VENDORPY_CACHE_MAX_SIZE`` or the default
+    """
+    configured = os.environ.get(CACHE_MAX_SIZE_ENV)
+    if configured:
+        return parse_size(configured)
+    return DEFAULT_CACHE_MAX_SIZE
+
+
+def get_directory_size(path: Path) -> int:
+    """
+    Compute the total size of the regular files below a directory.
+
+    Args:
+        path: Directory to measure
+
+    Returns:
+        Total size in bytes (symlinks are not followed)
+    """
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            file_path = os.path.join(root, name)
+            if not os.path.islink(file_path):
+                with contextlib.suppress(OSError):
+                    total += os.path.getsize(file_path)
+    return total
+
+
+def get_entry_path(namespace: str, key: str) -> Path:
+    """
+    Get the location of a cache entry.
+
+    Args:
+        namespace: Kind of cached content (e.g. ``toolchains``)
+        key: Cache key of the entry
+
+    Returns:
+        Path of the entry directory
+    """
+    return get_cache_dir() / namespace / key
+
+
+def _read_entry_metadata(entry_path: Path) -> Optional[Dict[str, Any]]:
+    """Read the metadata of a cache entry, or None if the entry is incomplete."""
+    try:
+        with open(entry_path / ENTRY_METADATA_FILE, "r") as f:
+            metadata: Dict[str, Any] = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    metadata["path"] = str(entry_path)
+    return metadata
+
+
+def _write_entry_metadata(entry_path: Path, metadata: Dict[str, Any]) -> None:
+    """Atomically write the metadata of a cache entry."""
+    data = {k: v for k, v in metadata.items() if k != "path"}
+    tmp_path = entry_path / f"{ENTRY_METADATA_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, entry_path / ENTRY_METADATA_FILE)
+
+
+@contextlib.contextmanager
+def entry_lock(namespace: str, key: str) -> Iterator[None]:
+    """
+    Hold an exclusive lock on a cache entry while it is being built.
+
+    Concurrent vendorpy processes building the same entry wait for each other
+    instead of writing into the same directory. On platforms without ``fcntl``
+    this is a no-op.
+
+    Args:
+        namespace: Kind of cached content
+        key: Cache key of the entry
+    """
+    lock_dir = get_cache_dir() / namespace
+    lock_dir.mkdir(parents=True, exist_ok=True)
+    with open(lock_dir / f".{key}.lock", "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def lookup_entry(
+    namespace: str, key: str, max_age: Optional[float] = None
+) -> Optional[Path]:
+    """
+    Look up a complete cache entry and mark it as recently used.
+
+    Args:
+        namespace: Kind of cached content
+        key: Cache key of the entry
+        max_age: Treat entries created more than this many seconds ago as a miss
+
+    Returns:
+        Path of the entry directory, or None on a cache miss
+    """
+    entry_path = get_entry_path(namespace, key)
+    metadata = _read_entry_metadata(entry_path)
+    if metadata is None:
+        return None
+    if max_age is not None and time.time() - metadata.get("created", 0) > max_age:
+        return None
+
+    metadata["last_used"] = time.time()
+    with contextlib.suppress(OSError):
+        _write_entry_metadata(entry_path, metadata)
+    return entry_path
+
+
+def commit_entry(
+    namespace: str, key: str, extra: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Mark a fully populated entry directory as complete.
+
+    Args:
+        namespace: Kind of cached content
+        key: Cache key of the entry
+        extra: Additional metadata to record (e.g. tool versions)
+
+    Returns:
+        The metadata written for the entry
+
+    Raises:
+        FileNotFoundError: If the entry directory does not exist
+    """
+    entry_path = get_entry_path(namespace, key)
+    if not entry_path.is_dir():
+        raise FileNotFoundError(f"Cache entry not found: {entry_path}")
+
+    now = time.time()
+    metadata: Dict[str, Any] = {
+        "namespace": namespace,
+        "key": key,
+        "created": now,
+        "last_used": now,
+        "size": get_directory_size(entry_path),
+        **(extra or {}),
+    }
+    _write_entry_metadata(entry_path, metadata)
+    metadata["path"] = str(entry_path)
+    return metadata
+
+
+def discard_entry(entry_path: Path) -> None:
+    """
+    Remove a cache entry directory, complete or not.
+
+    Args:
+        entry_path: Path of the entry directory
+    """
+    shutil.rmtree(entry_path, ignore_errors=True)
+
+
+def list_entries(namespace: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    List the complete entries in the cache.
+
+    Args:
+        namespace: Only list entries of this namespace
+
+    Returns:
+        Entry metadata dictionaries, most recently used first
+    """
+    cache_dir = get_cache_dir()
+    if not cache_dir.is_dir():
+        return []
+
+    namespaces = (
+        [cache_dir / namespace]
+        if namespace
+        else sorted(p for p in cache_dir.iterdir() if p.is_dir())
+    )
+
+    entries = []
+    for namespace_dir in namespaces:
+        if not namespace_dir.is_dir():
+            continue
+        for entry_path in namespace_dir.iterdir():
+            if not entry_path.is_dir():
+                continue
+            metadata = _read_entry_metadata(entry_path)
+            if metadata is not None:
+                entries.append(metadata)
+
+    return sorted(entries, key=lambda entry: entry.get("last_used", 0), reverse=True)
+
+
+def prune_cache(
+    max_size: Optional[int] = None,
+    namespace: Optional[str] = None,
+    keep: Optional[List[Path]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Evict least recently used entries until the cache fits its size budget.
+
+    Incomplete entries (left behind by interrupted runs) are always removed.
+
+    Args:
+        max_size: Size budget in bytes, defaults to ``get_cache_max_size()``
+        namespace: Only consider entries of this namespace
+        keep: Entry paths that must not be evicted (e.g. the ones in use)
+
+    Returns:
+        Metadata of the evicted entries
+    """
+    if max_size is None:
+        max_size = get_cache_max_size()
+
+    cache_dir = get_cache_dir()
+    if not cache_dir.is_dir():
+        return []
+
+    # Drop directories without metadata, unless another process is still building them
+    namespaces = (
+        [cache_dir / namespace]
+        if namespace
+        else [p for p in cache_dir.iterdir() if p.is_dir()]
+    )
+    for namespace_dir in namespaces:
+        if not namespace_dir.is_dir():
+            continue
+        for entry_path in namespace_dir.iterdir():
+            if entry_path.is_dir() and not (entry_path / ENTRY_METADATA_FILE).exists():
+                if fcntl is not None:
+                    lock_path = namespace_dir / f".{entry_path.name}.lock"
+                    with open(lock_path, "w") as lock_file:
+                        try:
+                            fcntl.flock(
+                                lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB
+                            )
+                        except OSError:
+                            continue
+                        discard_entry(entry_path)
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    discard_entry(entry_path)
+
+    entries = list_entries(namespace)
+    total_size = sum(entry.get("size", 0) for entry in entries)
+    kept_paths = {str(path) for path in keep or []}
+    entries = [entry for entry in entries if entry["path"] not in kept_paths]
+
+    evicted = []
+    # Oldest entries are at the end of the list
+    while entries and total_size > max_size:
+        entry = entries.pop()
+        discard_entry(Path(entry["path"]))
+        total_size -= entry.get("size", 0)
+        evicted.append(entry)
+
+    return evicted
+
+
+def clear_cache(namespace: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Remove every entry from the cache.
+
+    Args:
+        namespace: Only remove entries of this namespace
+
+    Returns:
+        Metadata of the removed entries
+    """
+    return prune_cache(max_size=0, namespace=namespace)
@@ -6,23 +6,83 @@ It generates the requirements.txt file with the appropriate pruned packages and
 handles the vendoring process.
 """
 
+import dataclasses
 import subprocess
 import sys
+import time
+from datetime import datetime
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
 import typer
 from rich.console import Console
 from rich.panel import Panel
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.table import Table
 
+from .artifacts import compute_artifact_key, restore_artifact, store_artifact
+from .bundle import (
+    BUNDLE_FORMATS,
+    LOADER_MODULE,
+    bundle_vendor_dir,
+    load_bundle_exclusions,
+)
+from .bytecode import COMPILE_MODES, check_bytecode, compile_vendor_dir
+from .cache import (
+    clear_cache,
+    compute_cache_key,
+    format_size,
+    get_cache_dir,
+    get_cache_max_size,
+    list_entries,
+    parse_size,
+    prune_cache,
+)
+from .lockfile import load_lockfile
+from .manifest import MANIFEST_FILE, verify_manifest, write_manifest
+from .minify import load_minify_exclusions, minify_vendor_dir
+from .pipeline import (
+    Checkpoints,
+    PipelineStopped,
+    StaleCheckpoint,
+    Step,
+    run_pipeline,
+)
+from .profiling import (
+    Profiler,
+    process_usage,
+    run_command,
+    span,
+    start_profiling,
+    stop_profiling,
+)
+from .prune import PruneProfile, load_prune_profiles, prune_vendor_dir
+from .registry import BuiltInRegistry
+from .size import load_size_budget, measure_vendor_dir
+from .staging import rollback_vendor_dir, staged_vendor_dir
+from .treeshake import load_tree_shake_allowlist, tree_shake
 from .utils import (
-    CLOUDFLARE_BUILT_IN_PACKAGES,
+    BACKENDS,
+    BUILT_IN_PACKAGES,
+    PIPELINE_STATE_FILE,
+    STATE_DIR,
+    VENDOR_GLOB,
+    build_wheelhouse,
+    compute_detection_fingerprint,
     configure_wrangler_for_vendor,
     create_pyodide_env,
-    create_virtual_env,
     create_vendor_file,
+    create_virtual_env,
     detect_packages_to_vendor,
+    get_built_in_registry,
+    get_installed_version,
+    install_fallback_packages,
+    install_packages_natively,
     install_packages_to_vendor,
+    load_cached_detection,
+    read_vendor_requirements,
+    read_worker_entry_point,
+    resolve_vendor_file,
 )
 
 app = typer.Typer(
@@ -31,6 +91,33 @@ app = typer.Typer(
 )
 console = Console()
 
+cache_app = typer.Typer(help="Inspect and prune the vendorpy cache")
+app.add_typer(cache_app, name="cache")
+
+wheelhouse_app = typer.Typer(help="Prepare a local wheelhouse for offline vendoring")
+app.add_typer(wheelhouse_app, name="wheelhouse")
+
+
+def _validate_backend(backend: str) -> str:
+    """Reject unknown --backend values before any work is done."""
+    if backend not in BACKENDS:
+        raise typer.BadParameter(f"must be one of {', '.join(BACKENDS)}")
+    return backend
+
+
+def _validate_compile_mode(mode: str) -> str:
+    """Reject unknown --compile-mode values before any work is done."""
+    if mode not in COMPILE_MODES:
+        raise typer.BadParameter(f"must be one of {', '.join(COMPILE_MODES)}")
+    return mode
+
+
+def _validate_bundle(bundle_format: Optional[str]) -> Optional[str]:
+    """Reject unknown --bundle values before any work is done."""
+    if bundle_format is not None and bundle_format not in BUNDLE_FORMATS:
+        raise typer.BadParameter(f"must be one of {', '.join(BUNDLE_FORMATS)}")
+    return bundle_format
+
 
 @app.command()
 def auto_vendor(
@@ -58,6 +145,139 @@ def auto_vendor(
         "-p",
         help="Python version to use for vendoring (must be 3.12 for Cloudflare Workers)",
     ),
+    pyodide_build_version: Optional[str] = typer.Option(  # noqa: B008
+        None,
+        "--pyodide-build-version",
+        help="Version of pyodide-build to install (defaults to the latest)",
+    ),
+    backend: str = typer.Option(  # noqa: B008
+        "auto",
+        "--backend",
+        callback=_validate_backend,
+        help="Tool creating the toolchain environment: uv, pip, or auto (uv when installed)",
+    ),
+    use_cache: bool = typer.Option(  # noqa: B008
+        True,
+        "--cache/--no-cache",
+        help="Reuse cached toolchains and dependency analysis instead of redoing them on every run",
+    ),
+    incremental: bool = typer.Option(  # noqa: B008
+        False,
+        "--incremental",
+        "-i",
+        help="Only install added/upgraded packages and remove dropped ones",
+    ),
+    wheel_store: bool = typer.Option(  # noqa: B008
+        False,
+        "--wheel-store",
+        help="Hardlink packages from a content-addressed wheel store shared by all projects",
+    ),
+    native: bool = typer.Option(  # noqa: B008
+        False,
+        "--native",
+        help="Unpack pure-Python wheels in-process and only use the Pyodide toolchain for the rest",
+    ),
+    wheelhouse: Optional[Path] = typer.Option(  # noqa: B008
+        None,
+        "--wheelhouse",
+        "--find-links",
+        help="Install everything from this directory of wheels instead of a package index",
+    ),
+    jobs: int = typer.Option(  # noqa: B008
+        1,
+        "--jobs",
+        "-j",
+        min=1,
+        help="Resolve once, then fetch and unpack this many packages in parallel",
+    ),
+    prune: Optional[str] = typer.Option(  # noqa: B008
+        None,
+        "--prune",
+        help="Prune profile removing files the Worker never uses after installing: safe, aggressive, a profile from pyproject.toml, or none",
+    ),
+    budget: Optional[str] = typer.Option(  # noqa: B008
+        None,
+        "--budget",
+        help="Fail if the compressed vendor directory exceeds this size, e.g. 3M (defaults to tool.vendorpy.size.budget in pyproject.toml)",
+    ),
+    shake: bool = typer.Option(  # noqa: B008
+        False,
+        "--tree-shake",
+        help="Remove vendored modules the Worker's entry point (main in the wrangler configuration) never imports",
+    ),
+    keep_module: List[str] = typer.Option(  # noqa: B008
+        [],
+        "--keep-module",
+        help="Module name pattern --tree-shake keeps anyway, e.g. 'babel.*' (repeatable, added to tool.vendorpy.tree-shake.keep)",
+    ),
+    minify: bool = typer.Option(  # noqa: B008
+        False,
+        "--minify",
+        help="Strip comments and unused annotations from the vendored modules",
+    ),
+    minify_docstrings: bool = typer.Option(  # noqa: B008
+        False,
+        "--minify-docstrings",
+        help="Also strip docstrings with --minify (breaks packages reading them at runtime, e.g. click/typer help)",
+    ),
+    minify_exclude: List[str] = typer.Option(  # noqa: B008
+        [],
+        "--minify-exclude",
+        help="Package --minify leaves alone (repeatable, added to tool.vendorpy.minify.exclude)",
+    ),
+    compile_bytecode: bool = typer.Option(  # noqa: B008
+        False,
+        "--compile",
+        help="Precompile the vendored modules to bytecode for the Workers Python version",
+    ),
+    compile_mode: str = typer.Option(  # noqa: B008
+        "alongside",
+        "--compile-mode",
+        callback=_validate_compile_mode,
+        help="Ship the bytecode alongside the sources or instead of them",
+    ),
+    check_bytecode_magic: bool = typer.Option(  # noqa: B008
+        False,
+        "--check-bytecode",
+        help="Fail if any vendored bytecode was compiled for another Python version",
+    ),
+    bundle: Optional[str] = typer.Option(  # noqa: B008
+        None,
+        "--bundle",
+        callback=_validate_bundle,
+        help="Pack the vendor directory into a single archive imported through a loader module: zip",
+    ),
+    artifact_cache: Optional[Path] = typer.Option(  # noqa: B008
+        None,
+        "--artifact-cache",
+        envvar="VENDORPY_ARTIFACT_CACHE",
+        help="Directory storing finished vendor directories by their inputs, restored instead of installing on a hit (e.g. a CI cache mount)",
+    ),
+    resume: bool = typer.Option(  # noqa: B008
+        False,
+        "--resume",
+        help="Skip the steps whose inputs are unchanged since they last succeeded, restarting where the previous run failed",
+    ),
+    profile: bool = typer.Option(  # noqa: B008
+        False,
+        "--profile",
+        help="Time every step and subprocess (wall, CPU, peak RSS) and print a summary",
+    ),
+    profile_trace: Optional[Path] = typer.Option(  # noqa: B008
+        None,
+        "--profile-trace",
+        help="Also write the timings as a Chrome/Perfetto trace JSON file (implies --profile)",
+    ),
+    pyodide_lock: Optional[Path] = typer.Option(  # noqa: B008
+        None,
+        "--pyodide-lock",
+        help="pyodide-lock.json listing the built-in packages, or a directory of <compatibility-date>.json lock files",
+    ),
+    compatibility_date: Optional[str] = typer.Option(  # noqa: B008
+        None,
+        "--compatibility-date",
+        help="Workers compatibility date selecting the lock file (defaults to the wrangler configuration)",
+    ),
 ) -> None:
     """
     Automatically detect and vendor packages for Cloudflare Workers.
@@ -65,173 +285,396 @@ def auto_vendor(
     This command automatically detects which packages need to be vendored by analyzing your
     project dependencies and comparing them with Cloudflare's built-in packages. It then
     handles the entire vendoring process in a single step.
+
+    Every step that succeeds is checkpointed in .vendorpy/state; with --resume, the
+    steps whose inputs are unchanged are skipped.
     """
+    profiler = start_profiling() if profile or profile_trace else None
     try:
-        console.print(
-            Panel.fit(
-                "Detecting packages that need to be vendored",
-                title="[bold green]Step 1: Package Detection[/bold green]",
-            )
+        registry = get_built_in_registry(pyodide_lock, compatibility_date)
+        prune_profile = _resolve_prune_profile(prune)
+        size_budget = _resolve_size_budget(budget)
+        entry_point = _resolve_entry_point() if shake else None
+        keep_modules = [*load_tree_shake_allowlist(), *keep_module]
+        minify_excludes = (
+            [*load_minify_exclusions(), *minify_exclude] if minify else None
         )
+        bundle_excludes = load_bundle_exclusions() if bundle else []
+        wrangler_globs = [VENDOR_GLOB]
+        if bundle:
+            wrangler_globs.append(f"{vendor_dir.name}.{bundle}")
 
-        # Detect packages to vendor
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console,
-        ) as progress:
-            task = progress.add_task("Analyzing project dependencies...", total=1)
-
-            try:
-                package_results = detect_packages_to_vendor()
-                vendor_packages = package_results["vendor"]
-                built_in_packages = package_results["built_in"]
-                progress.update(task, completed=1)
-            except Exception as e:
-                progress.update(
-                    task,
-                    completed=1,
-                    description=f"Failed to analyze dependencies: {e}",
+        def detect(results: Dict[str, Any]) -> Dict[str, Any]:
+            """Detect the packages to vendor and stop if there are none."""
+            console.print(
+                Panel.fit(
+                    "Detecting packages that need to be vendored",
+                    title="[bold green]Step 1: Package Detection[/bold green]",
                 )
-                raise
+            )
 
-        # Display results in a table
-        table = Table(title="Package Analysis Results")
-        table.add_column("Package Type", style="cyan")
-        table.add_column("Count", style="green")
-        table.add_column("Packages", style="yellow")
+            # Reuse the previous analysis if uv.lock, pyproject.toml and the built-in
+            # package registry are unchanged
+            fingerprint = (
+                compute_detection_fingerprint(registry=registry) if use_cache else None
+            )
+            cached_results = load_cached_detection(fingerprint) if fingerprint else None
 
-        table.add_row(
-            "Need Vendoring",
-            str(len(vendor_packages)),
-            ", ".join(vendor_packages) if vendor_packages else "None",
-        )
-        table.add_row(
-            "Built-in (No Vendoring Required)",
-            str(len(built_in_packages)),
-            ", ".join(built_in_packages) if built_in_packages else "None",
-        )
+            if cached_results is not None:
+                package_results = cached_results
+                console.print("✅ Dependencies unchanged, reusing the cached analysis")
+            else:
+                # Detect packages to vendor
+                with Progress(
+                    SpinnerColumn(),
+                    TextColumn("[progress.description]{task.description}"),
+                    console=console,
+                ) as progress:
+                    task = progress.add_task(
+                        "Analyzing project dependencies...", total=1
+                    )
+
+                    try:
+                        package_results = detect_packages_to_vendor(
+                            use_cache=use_cache, registry=registry
+                        )
+                        progress.update(task, completed=1)
+                    except Exception as e:
+                        progress.update(
+                            task,
+                            completed=1,
+                            description=f"Failed to analyze dependencies: {e}",
+                        )
+                        raise
 
-        console.print(table)
+            vendor_packages = package_results["vendor"]
+            built_in_packages = package_results["built_in"]
 
-        # If there are no packages to vendor, notify and exit
-        if not vendor_packages:
+            # Display results in a table
+            table = Table(title="Package Analysis Results")
+            table.add_column("Package Type", style="cyan")
+            table.add_column("Count", style="green")
+            table.add_column("Packages", style="yellow")
+
+            table.add_row(
+                "Need Vendoring",
+                str(len(vendor_packages)),
+                ", ".join(vendor_packages) if vendor_packages else "None",
+            )
+            table.add_row(
+                "Built-in (No Vendoring Required)",
+                str(len(built_in_packages)),
+                ", ".join(built_in_packages) if built_in_packages else "None",
+            )
+
+            console.print(table)
+
+            # If there are no packages to vendor, notify and skip the other steps
+            if not vendor_packages:
+                console.print(
+                    Panel.fit(
+                        "No packages need to be vendored! All your dependencies are already built into Cloudflare Workers.",
+                        title="[bold green]No Action Required[/bold green]",
+                    )
+                )
+                raise PipelineStopped()
+
+            return {"vendor": vendor_packages, "cached": cached_results is not None}
+
+        def write_vendor_file(results: Dict[str, Any]) -> None:
+            """Create vendor.txt, unless the cached analysis already produced it."""
+            vendor_packages = results["detect"]["vendor"]
             console.print(
                 Panel.fit(
-                    "No packages need to be vendored! All your dependencies are already built into Cloudflare Workers.",
-                    title="[bold green]No Action Required[/bold green]",
+                    f"Creating {vendor_file} with {len(vendor_packages)} packages that need vendoring",
+                    title="[bold green]Step 2: Vendor File Creation[/bold green]",
                 )
             )
-            return
+            if (
+                results["detect"]["cached"]
+                and vendor_file.exists()
+                and read_vendor_requirements(vendor_file) == vendor_packages
+            ):
+                console.print(f"✅ {vendor_file} is up to date")
+            else:
+                create_vendor_file(vendor_packages, vendor_file)
+                console.print(f"✅ Created {vendor_file}")
 
-        # Create vendor.txt file
-        console.print(
-            Panel.fit(
-                f"Creating {vendor_file} with {len(vendor_packages)} packages that need vendoring",
-                title="[bold green]Step 2: Vendor File Creation[/bold green]",
+        def write_requirements(results: Dict[str, Any]) -> None:
+            """Generate requirements.txt with pruned packages."""
+            console.print(
+                Panel.fit(
+                    "Generating requirements.txt with pruned built-in packages",
+                    title="[bold green]Step 3: Requirements Generation[/bold green]",
+                )
             )
-        )
-        create_vendor_file(vendor_packages, vendor_file)
-        console.print(f"✅ Created {vendor_file}")
+            generate_requirements(requirements_file, registry)
 
-        # Generate requirements.txt with pruned packages
-        console.print(
-            Panel.fit(
-                "Generating requirements.txt with pruned built-in packages",
-                title="[bold green]Step 3: Requirements Generation[/bold green]",
+        def setup_python_env(results: Dict[str, Any]) -> Path:
+            """Create the Python virtual environment with pyodide-build."""
+            console.print(
+                Panel.fit(
+                    "Setting up Python environment for vendoring",
+                    title="[bold green]Step 4: Environment Setup[/bold green]",
+                )
             )
-        )
-        generate_requirements(requirements_file)
-
-        # Create virtual environments and vendor packages
-        console.print(
-            Panel.fit(
-                "Setting up Python environment for vendoring",
-                title="[bold green]Step 4: Environment Setup[/bold green]",
+            venv_path = create_virtual_env(
+                python_version,
+                pyodide_build_version=pyodide_build_version,
+                use_cache=use_cache,
+                backend=backend,
+                wheelhouse=wheelhouse,
             )
-        )
+            console.print("✅ Created Python virtual environment")
+            return venv_path
 
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console,
-        ) as progress:
-            # Create Python virtual environment
-            task1 = progress.add_task("Creating Python virtual environment...", total=1)
-            venv_path = create_virtual_env(python_version)
-            progress.update(task1, completed=1)
-
-            # Create Pyodide virtual environment
-            task2 = progress.add_task(
-                "Creating Pyodide virtual environment...", total=1
+        def setup_pyodide_env(results: Dict[str, Any]) -> Path:
+            """Create the Pyodide virtual environment."""
+            pyodide_venv_path = create_pyodide_env(
+                results["python_env"], use_cache=use_cache, wheelhouse=wheelhouse
             )
-            pyodide_venv_path = create_pyodide_env(venv_path)
-            progress.update(task2, completed=1)
+            console.print("✅ Created Pyodide virtual environment")
+            return pyodide_venv_path
 
-            # Install packages to vendor directory
-            task3 = progress.add_task(
-                "Installing packages to vendor directory...", total=1
-            )
-            install_packages_to_vendor(pyodide_venv_path, vendor_file, vendor_dir)
-            progress.update(task3, completed=1)
+        def install(results: Dict[str, Any]) -> None:
+            """Vendor the packages listed in vendor.txt."""
+            if native:
+                console.print(
+                    Panel.fit(
+                        "Setting up Python environment for vendoring",
+                        title="[bold green]Step 4: Environment Setup[/bold green]",
+                    )
+                )
 
-        console.print(
-            Panel.fit(
-                f"✅ Successfully vendored {len(vendor_packages)} packages to {vendor_dir}",
-                title="[bold green]Vendoring Complete[/bold green]",
+            _setup_and_install(
+                vendor_file,
+                vendor_dir,
+                python_version=python_version,
+                pyodide_build_version=pyodide_build_version,
+                backend=backend,
+                use_cache=use_cache,
+                incremental=incremental,
+                wheel_store=wheel_store,
+                native=native,
+                wheelhouse=wheelhouse,
+                jobs=jobs,
+                prune_profile=prune_profile,
+                entry_point=entry_point,
+                keep_modules=keep_modules,
+                minify_excludes=minify_excludes,
+                minify_docstrings=minify_docstrings,
+                compile_mode=compile_mode if compile_bytecode else None,
+                check_bytecode_magic=check_bytecode_magic,
+                size_budget=size_budget,
+                bundle_format=bundle,
+                bundle_excludes=bundle_excludes,
+                artifact_cache=artifact_cache,
+                pyodide_venv_path=results.get("pyodide_env"),
+                venv_path=results.get("python_env"),
             )
-        )
 
-        # Configure wrangler.toml or wrangler.jsonc
-        console.print(
-            Panel.fit(
-                "Configuring wrangler for vendoring",
-                title="[bold green]Step 5: Wrangler Configuration[/bold green]",
+            console.print(
+                Panel.fit(
+                    f"✅ Successfully vendored {len(results['detect']['vendor'])} packages to {vendor_dir}",
+                    title="[bold green]Vendoring Complete[/bold green]",
+                )
             )
-        )
 
-        config_result = configure_wrangler_for_vendor()
-
-        if config_result is None:
+        def configure_wrangler(results: Dict[str, Any]) -> None:
+            """Configure wrangler.toml or wrangler.jsonc."""
             console.print(
                 Panel.fit(
-                    "No wrangler.toml or wrangler.jsonc found in the current directory.\n\n"
-                    "Please manually configure your wrangler file to include the vendor directory:\n"
-                    """
-[[rules]]
-globs = ["vendor/**"]
-type = "Data"
-fallthrough = true
-                    """,
-                    title="[bold yellow]Manual Configuration Required[/bold yellow]",
+                    "Configuring wrangler for vendoring",
+                    title="[bold green]Step 5: Wrangler Configuration[/bold green]",
                 )
             )
-        else:
-            success, message = config_result
-            if success:
-                console.print(f"✅ {message}")
-            else:
+
+            config_result = configure_wrangler_for_vendor(wrangler_globs)
+
+            if config_result is None:
                 console.print(
                     Panel.fit(
-                        f"{message}\n\n"
-                        "Please manually add the following to your wrangler configuration:\n"
-                        """
-[[rules]]
-globs = ["vendor/**"]
-type = "Data"
-fallthrough = true
-                        """,
+                        "No wrangler.toml or wrangler.jsonc found in the current directory.\n\n"
+                        "Please manually configure your wrangler file to include the vendor directory:\n"
+                        + _wrangler_rules(wrangler_globs),
                         title="[bold yellow]Manual Configuration Required[/bold yellow]",
                     )
                 )
+            else:
+                success, message = config_result
+                if success:
+                    console.print(f"✅ {message}")
+                else:
+                    console.print(
+                        Panel.fit(
+                            f"{message}\n\n"
+                            "Please manually add the following to your wrangler configuration:\n"
+                            + _wrangler_rules(wrangler_globs),
+                            title="[bold yellow]Manual Configuration Required[/bold yellow]",
+                        )
+                    )
+
+        # Checkpoint fingerprints cover the inputs of each step besides the results
+        # it requires. Writing vendor.txt and configuring wrangler are cheap and
+        # idempotent, so they always run.
+        def detection_fingerprint(results: Dict[str, Any]) -> Optional[str]:
+            """Fingerprint uv.lock, pyproject.toml and the built-in packages."""
+            return compute_detection_fingerprint(registry=registry)
+
+        def restore_detection(result: Dict[str, Any]) -> Dict[str, Any]:
+            """Reuse the packages detected by a previous run."""
+            console.print(
+                f"✅ Resuming: reusing the analysis of the previous run "
+                f"({len(result['vendor'])} packages to vendor)"
+            )
+            return result
+
+        def requirements_fingerprint(results: Dict[str, Any]) -> Optional[str]:
+            """Fingerprint the inputs of requirements.txt."""
+            fingerprint = compute_detection_fingerprint(registry=registry)
+            if fingerprint is None:
+                return None
+            return compute_cache_key(fingerprint, str(requirements_file))
+
+        def restore_requirements(result: None) -> None:
+            """Keep the requirements.txt of a previous run."""
+            if not requirements_file.is_file():
+                raise StaleCheckpoint()
+            console.print(f"✅ Resuming: {requirements_file} is up to date")
+
+        def python_env_fingerprint(results: Dict[str, Any]) -> str:
+            """Fingerprint the options selecting the toolchain."""
+            return compute_cache_key(
+                python_version,
+                pyodide_build_version or "latest",
+                backend,
+                str(wheelhouse),
+                str(use_cache),
+            )
+
+        def restore_env(result: str) -> Path:
+            """Reuse an environment created by a previous run."""
+            env_path = Path(result)
+            if not env_path.is_dir():
+                raise StaleCheckpoint()
+            console.print(f"✅ Resuming: reusing the environment in {env_path}")
+            return env_path
+
+        def install_fingerprint(results: Dict[str, Any]) -> str:
+            """Fingerprint vendor.txt, uv.lock and the options shaping the result."""
+            return compute_cache_key(
+                compute_artifact_key(
+                    vendor_file,
+                    vendor_dir,
+                    python_version,
+                    _toolchain_version(
+                        results.get("python_env"), pyodide_build_version
+                    ),
+                    {
+                        **_installer_options(backend, incremental, wheel_store, native),
+                        **_vendor_dir_options(
+                            prune_profile,
+                            entry_point,
+                            keep_modules,
+                            minify_excludes,
+                            minify_docstrings,
+                            compile_mode if compile_bytecode else None,
+                            bundle,
+                            bundle_excludes,
+                        ),
+                    },
+                    entry_point=entry_point,
+                    wheelhouse=wheelhouse,
+                ),
+                str(size_budget),
+                str(check_bytecode_magic),
+            )
+
+        def restore_install(result: None) -> None:
+            """Keep the vendor directory of a previous run, if still untouched."""
+            try:
+                drift = verify_manifest(vendor_file.with_name(MANIFEST_FILE))
+            except (OSError, ValueError, KeyError):
+                raise StaleCheckpoint() from None
+            if any(drift.values()):
+                raise StaleCheckpoint()
+            console.print(f"✅ Resuming: {vendor_dir} is up to date")
+
+        # The cached toolchain is built while the dependencies are analyzed, and once
+        # detection found packages to vendor, writing vendor.txt and generating
+        # requirements.txt run concurrently with it. If there is nothing to vendor,
+        # the cached toolchain is left unused, and nothing is written to the project:
+        # .venv (with --no-cache) and .venv-pyodide are only replaced once detection
+        # found packages to vendor. The native installer decides itself whether the
+        # toolchain is needed at all.
+        steps = [
+            Step(
+                "detect",
+                detect,
+                fingerprint=detection_fingerprint,
+                restore=restore_detection,
+            ),
+            Step("vendor_file", write_vendor_file, requires=("detect",)),
+            Step(
+                "requirements",
+                write_requirements,
+                requires=("detect",),
+                fingerprint=requirements_fingerprint,
+                restore=restore_requirements,
+            ),
+        ]
+        install_requires: Tuple[str, ...] = ("vendor_file",)
+        if not native:
+            steps += [
+                Step(
+                    "python_env",
+                    setup_python_env,
+                    requires=() if use_cache else ("detect",),
+                    fingerprint=python_env_fingerprint,
+                    restore=restore_env,
+                ),
+                Step(
+                    "pyodide_env",
+                    setup_pyodide_env,
+                    requires=("python_env", "detect"),
+                    fingerprint=lambda results: "",
+                    restore=restore_env,
+                ),
+            ]
+            install_requires += ("pyodide_env",)
+        steps += [
+            Step(
+                "install",
+                install,
+                requires=install_requires,
+                fingerprint=install_fingerprint,
+                restore=restore_install,
+            ),
+            Step("wrangler", configure_wrangler, requires=("install", "requirements")),
+        ]
+
+        # Checkpoints are always recorded, so a failed run can be resumed
+        checkpoints = Checkpoints(STATE_DIR / PIPELINE_STATE_FILE, resume=resume)
+        results = run_pipeline(steps, checkpoints=checkpoints)
+        if "wrangler" not in results:
+            return
 
         console.print("\n[bold]Next steps:[/bold]")
-        console.print("1. Import your vendored packages in your code")
+        if bundle:
+            console.print(
+                f"1. Import {LOADER_MODULE} in your entry point before your vendored "
+                "packages"
+            )
+        else:
+            console.print("1. Import your vendored packages in your code")
         console.print("2. Run 'wrangler dev' to test your worker")
 
     except Exception as e:
         console.print(f"[bold red]Error:[/bold red] {e!s}")
         sys.exit(1)
+    finally:
+        if profiler is not None:
+            _finish_profiling(profiler, profile_trace)
 
 
 @app.command()
@@ -261,6 +704,134 @@ def vendor(
         "-p",
         help="Python version to use for vendoring (must be 3.12 for Cloudflare Workers)",
     ),
+    pyodide_build_version: Optional[str] = typer.Option(  # noqa: B008
+        None,
+        "--pyodide-build-version",
+        help="Version of pyodide-build to install (defaults to the latest)",
+    ),
+    backend: str = typer.Option(  # noqa: B008
+        "auto",
+        "--backend",
+        callback=_validate_backend,
+        help="Tool creating the toolchain environment: uv, pip, or auto (uv when installed)",
+    ),
+    use_cache: bool = typer.Option(  # noqa: B008
+        True,
+        "--cache/--no-cache",
+        help="Reuse cached toolchains instead of rebuilding environments on every run",
+    ),
+    incremental: bool = typer.Option(  # noqa: B008
+        False,
+        "--incremental",
+        "-i",
+        help="Only install added/upgraded packages and remove dropped ones",
+    ),
+    wheel_store: bool = typer.Option(  # noqa: B008
+        False,
+        "--wheel-store",
+        help="Hardlink packages from a content-addressed wheel store shared by all projects",
+    ),
+    native: bool = typer.Option(  # noqa: B008
+        False,
+        "--native",
+        help="Unpack pure-Python wheels in-process and only use the Pyodide toolchain for the rest",
+    ),
+    wheelhouse: Optional[Path] = typer.Option(  # noqa: B008
+        None,
+        "--wheelhouse",
+        "--find-links",
+        help="Install everything from this directory of wheels instead of a package index",
+    ),
+    jobs: int = typer.Option(  # noqa: B008
+        1,
+        "--jobs",
+        "-j",
+        min=1,
+        help="Resolve once, then fetch and unpack this many packages in parallel",
+    ),
+    prune: Optional[str] = typer.Option(  # noqa: B008
+        None,
+        "--prune",
+        help="Prune profile removing files the Worker never uses after installing: safe, aggressive, a profile from pyproject.toml, or none",
+    ),
+    budget: Optional[str] = typer.Option(  # noqa: B008
+        None,
+        "--budget",
+        help="Fail if the compressed vendor directory exceeds this size, e.g. 3M (defaults to tool.vendorpy.size.budget in pyproject.toml)",
+    ),
+    shake: bool = typer.Option(  # noqa: B008
+        False,
+        "--tree-shake",
+        help="Remove vendored modules the Worker's entry point (main in the wrangler configuration) never imports",
+    ),
+    keep_module: List[str] = typer.Option(  # noqa: B008
+        [],
+        "--keep-module",
+        help="Module name pattern --tree-shake keeps anyway, e.g. 'babel.*' (repeatable, added to tool.vendorpy.tree-shake.keep)",
+    ),
+    minify: bool = typer.Option(  # noqa: B008
+        False,
+        "--minify",
+        help="Strip comments and unused annotations from the vendored modules",
+    ),
+    minify_docstrings: bool = typer.Option(  # noqa: B008
+        False,
+        "--minify-docstrings",
+        help="Also strip docstrings with --minify (breaks packages reading them at runtime, e.g. click/typer help)",
+    ),
+    minify_exclude: List[str] = typer.Option(  # noqa: B008
+        [],
+        "--minify-exclude",
+        help="Package --minify leaves alone (repeatable, added to tool.vendorpy.minify.exclude)",
+    ),
+    compile_bytecode: bool = typer.Option(  # noqa: B008
+        False,
+        "--compile",
+        help="Precompile the vendored modules to bytecode for the Workers Python version",
+    ),
+    compile_mode: str = typer.Option(  # noqa: B008
+        "alongside",
+        "--compile-mode",
+        callback=_validate_compile_mode,
+        help="Ship the bytecode alongside the sources or instead of them",
+    ),
+    check_bytecode_magic: bool = typer.Option(  # noqa: B008
+        False,
+        "--check-bytecode",
+        help="Fail if any vendored bytecode was compiled for another Python version",
+    ),
+    bundle: Optional[str] = typer.Option(  # noqa: B008
+        None,
+        "--bundle",
+        callback=_validate_bundle,
+        help="Pack the vendor directory into a single archive imported through a loader module: zip",
+    ),
+    artifact_cache: Optional[Path] = typer.Option(  # noqa: B008
+        None,
+        "--artifact-cache",
+        envvar="VENDORPY_ARTIFACT_CACHE",
+        help="Directory storing finished vendor directories by their inputs, restored instead of installing on a hit (e.g. a CI cache mount)",
+    ),
+    profile: bool = typer.Option(  # noqa: B008
+        False,
+        "--profile",
+        help="Time every step and subprocess (wall, CPU, peak RSS) and print a summary",
+    ),
+    profile_trace: Optional[Path] = typer.Option(  # noqa: B008
+        None,
+        "--profile-trace",
+        help="Also write the timings as a Chrome/Perfetto trace JSON file (implies --profile)",
+    ),
+    pyodide_lock: Optional[Path] = typer.Option(  # noqa: B008
+        None,
+        "--pyodide-lock",
+        help="pyodide-lock.json listing the built-in packages, or a directory of <compatibility-date>.json lock files",
+    ),
+    compatibility_date: Optional[str] = typer.Option(  # noqa: B008
+        None,
+        "--compatibility-date",
+        help="Workers compatibility date selecting the lock file (defaults to the wrangler configuration)",
+    ),
     skip_built_in: bool = typer.Option(  # noqa: B008
         True,
         "--skip-built-in/--include-built-in",
@@ -274,7 +845,20 @@ def vendor(
     It generates the requirements.txt file with the appropriate pruned packages and
     handles the vendoring process.
     """
+    profiler = start_profiling() if profile or profile_trace else None
     try:
+        prune_profile = _resolve_prune_profile(prune)
+        size_budget = _resolve_size_budget(budget)
+        entry_point = _resolve_entry_point() if shake else None
+        keep_modules = [*load_tree_shake_allowlist(), *keep_module]
+        minify_excludes = (
+            [*load_minify_exclusions(), *minify_exclude] if minify else None
+        )
+        bundle_excludes = load_bundle_exclusions() if bundle else []
+        wrangler_globs = [VENDOR_GLOB]
+        if bundle:
+            wrangler_globs.append(f"{vendor_dir.name}.{bundle}")
+
         # Create vendor directory if it doesn't exist
         vendor_dir.mkdir(parents=True, exist_ok=True)
 
@@ -286,7 +870,11 @@ def vendor(
                     title="[bold green]Step 1: Requirements Generation[/bold green]",
                 )
             )
-            generate_requirements(requirements_file)
+            with span("requirements", "step"):
+                generate_requirements(
+                    requirements_file,
+                    get_built_in_registry(pyodide_lock, compatibility_date),
+                )
 
         # Create virtual environments and vendor packages
         console.print(
@@ -296,59 +884,629 @@ def vendor(
             )
         )
 
+        install_requires = ["requirements"] if skip_built_in else []
+        with span("install", "step", requires=install_requires):
+            _setup_and_install(
+                vendor_file,
+                vendor_dir,
+                python_version=python_version,
+                pyodide_build_version=pyodide_build_version,
+                backend=backend,
+                use_cache=use_cache,
+                incremental=incremental,
+                wheel_store=wheel_store,
+                native=native,
+                wheelhouse=wheelhouse,
+                jobs=jobs,
+                prune_profile=prune_profile,
+                entry_point=entry_point,
+                keep_modules=keep_modules,
+                minify_excludes=minify_excludes,
+                minify_docstrings=minify_docstrings,
+                compile_mode=compile_mode if compile_bytecode else None,
+                check_bytecode_magic=check_bytecode_magic,
+                size_budget=size_budget,
+                bundle_format=bundle,
+                bundle_excludes=bundle_excludes,
+                artifact_cache=artifact_cache,
+            )
+
+        console.print(
+            Panel.fit(
+                f"✅ Successfully vendored packages from {vendor_file} to {vendor_dir}",
+                title="[bold green]Vendoring Complete[/bold green]",
+            )
+        )
+
+        console.print("\n[bold]Next steps:[/bold]")
+        console.print("1. Make sure your wrangler.toml includes the vendor directory:")
+        console.print(_wrangler_rules(wrangler_globs), style="green")
+        if bundle:
+            console.print(
+                f"2. Import {LOADER_MODULE} in your entry point before your vendored "
+                "packages"
+            )
+        else:
+            console.print("2. Import your vendored packages in your code")
+        console.print("3. Run 'wrangler dev' to test your worker")
+
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] {e!s}")
+        sys.exit(1)
+    finally:
+        if profiler is not None:
+            _finish_profiling(profiler, profile_trace)
+
+
+def _setup_and_install(
+    vendor_file: Path,
+    vendor_dir: Path,
+    python_version: str,
+    pyodide_build_version: Optional[str],
+    backend: str,
+    use_cache: bool,
+    incremental: bool,
+    wheel_store: bool,
+    native: bool,
+    wheelhouse: Optional[Path],
+    jobs: int = 1,
+    prune_profile: Optional[PruneProfile] = None,
+    entry_point: Optional[Path] = None,
+    keep_modules: Optional[List[str]] = None,
+    minify_excludes: Optional[List[str]] = None,
+    minify_docstrings: bool = False,
+    compile_mode: Optional[str] = None,
+    check_bytecode_magic: bool = False,
+    size_budget: Optional[int] = None,
+    bundle_format: Optional[str] = None,
+    bundle_excludes: Optional[List[str]] = None,
+    artifact_cache: Optional[Path] = None,
+    pyodide_venv_path: Optional[Path] = None,
+    venv_path: Optional[Path] = None,
+) -> None:
+    """
+    Set up the vendoring toolchain and install the packages in vendor.txt.
+
+    If pyodide_venv_path is given, the Pyodide environment (created from the
+    toolchain at venv_path) was already prepared and is used as is. If entry_point is given, the vendored modules it never imports
+    (except those matching keep_modules) are removed after installing. If
+    minify_excludes is given, the vendored modules of the other packages are
+    minified, and their docstrings stripped if minify_docstrings is set. If compile_mode is given, the vendored modules are then compiled to
+    bytecode. If bundle_format is given, the vendor directory (except the packages
+    in bundle_excludes) is finally packed into a single archive. The vendor.lock
+    manifest of the result is written next to vendor_file.
+
+    If artifact_cache is given, the finished vendor directory is restored from it
+    when it holds one built from the same inputs, and stored in it otherwise. The
+    inputs include the versions pip resolves vendor.txt to, so the toolchain is
+    always set up then.
+    """
+    bundle_archive = (
+        vendor_dir.parent / f"{vendor_dir.name}.{bundle_format}"
+        if bundle_format is not None
+        else None
+    )
+    artifact_key = None
+    if artifact_cache is not None:
+        if pyodide_venv_path is None:
+            with span("python env"):
+                venv_path = create_virtual_env(
+                    python_version,
+                    pyodide_build_version=pyodide_build_version,
+                    use_cache=use_cache,
+                    backend=backend,
+                    wheelhouse=wheelhouse,
+                )
+            with span("pyodide env"):
+                pyodide_venv_path = create_pyodide_env(
+                    venv_path, use_cache=use_cache, wheelhouse=wheelhouse
+                )
+        with span("resolve"):
+            resolved = resolve_vendor_file(pyodide_venv_path, vendor_file, wheelhouse)
+        artifact_key = compute_artifact_key(
+            vendor_file,
+            vendor_dir,
+            python_version,
+            _toolchain_version(venv_path, pyodide_build_version),
+            {
+                **_installer_options(backend, incremental, wheel_store, native),
+                **_vendor_dir_options(
+                    prune_profile,
+                    entry_point,
+                    keep_modules,
+                    minify_excludes,
+                    minify_docstrings,
+                    compile_mode,
+                    bundle_format,
+                    bundle_excludes,
+                ),
+            },
+            entry_point=entry_point,
+            resolved=resolved,
+            wheelhouse=wheelhouse,
+        )
+        # Bundled files are only checked before they are packed into the archive
+        checked = bundle_format is None or (
+            size_budget is None and not check_bytecode_magic
+        )
+        restored = False
+        if checked:
+            with span("restore artifact"):
+                restored = restore_artifact(artifact_cache, artifact_key, vendor_dir)
+        if restored:
+            console.print(
+                f"✅ Restored {vendor_dir} from the artifact cache ({artifact_key})"
+            )
+            try:
+                _check_vendor_dir(
+                    vendor_dir,
+                    vendor_dir,
+                    python_version,
+                    check_bytecode_magic,
+                    size_budget,
+                )
+            except Exception:
+                # The budget and bytecode checks are not part of the key
+                rollback_vendor_dir(vendor_dir)
+                raise
+            write_manifest(vendor_dir, vendor_file, bundle_archive=bundle_archive)
+            return
+
+    # Build the new tree aside, the vendor directory only changes if every stage succeeds
+    bundle_files = (
+        [bundle_archive.name, f"{LOADER_MODULE}.py"]
+        if bundle_archive is not None
+        else []
+    )
+    # A full pip install -t neither upgrades nor removes what is already there
+    with staged_vendor_dir(
+        vendor_dir,
+        extra_files=bundle_files,
+        seed=incremental or wheel_store or native,
+    ) as stage:
+        install_summary: Dict[str, List[str]] = {}
+        fallback: Optional[List[str]] = None
+
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             console=console,
         ) as progress:
-            # Create Python virtual environment
-            task1 = progress.add_task("Creating Python virtual environment...", total=1)
-            venv_path = create_virtual_env(python_version)
-            progress.update(task1, completed=1)
+            if native:
+                # Install pure-Python packages without building any environment
+                task0 = progress.add_task(
+                    "Installing pure-Python packages natively...", total=1
+                )
+                with span("install natively"):
+                    install_summary, fallback = install_packages_natively(
+                        vendor_file,
+                        stage,
+                        wheelhouse=wheelhouse,
+                        python_version=python_version,
+                    )
+                progress.update(task0, completed=1)
 
-            # Create Pyodide virtual environment
-            task2 = progress.add_task(
-                "Creating Pyodide virtual environment...", total=1
+            # The toolchain is only needed if some packages were left to pip
+            if fallback != [] and pyodide_venv_path is None:
+                # Create Python virtual environment
+                task1 = progress.add_task(
+                    "Creating Python virtual environment...", total=1
+                )
+                with span("python env"):
+                    venv_path = create_virtual_env(
+                        python_version,
+                        pyodide_build_version=pyodide_build_version,
+                        use_cache=use_cache,
+                        backend=backend,
+                        wheelhouse=wheelhouse,
+                    )
+                progress.update(task1, completed=1)
+
+                # Create Pyodide virtual environment
+                task2 = progress.add_task(
+                    "Creating Pyodide virtual environment...", total=1
+                )
+                with span("pyodide env"):
+                    pyodide_venv_path = create_pyodide_env(
+                        venv_path, use_cache=use_cache, wheelhouse=wheelhouse
+                    )
+                progress.update(task2, completed=1)
+
+            if fallback != [] and pyodide_venv_path is not None:
+                # Install packages to vendor directory
+                task3 = progress.add_task(
+                    "Installing packages to vendor directory...", total=1
+                )
+                with span("pip install"):
+                    if fallback is None:
+                        install_summary = install_packages_to_vendor(
+                            pyodide_venv_path,
+                            vendor_file,
+                            stage,
+                            incremental=incremental,
+                            use_store=wheel_store,
+                            jobs=jobs,
+                            wheelhouse=wheelhouse,
+                        )
+                    else:
+                        fallback_summary = install_fallback_packages(
+                            pyodide_venv_path, fallback, stage, wheelhouse=wheelhouse
+                        )
+                        install_summary["installed"] += fallback_summary["installed"]
+                progress.update(task3, completed=1)
+
+            prune_report = None
+            if prune_profile is not None:
+                task4 = progress.add_task("Pruning vendor directory...", total=1)
+                with span("prune"):
+                    prune_report = prune_vendor_dir(stage, prune_profile)
+                progress.update(task4, completed=1)
+
+            shake_report = None
+            if entry_point is not None:
+                task5 = progress.add_task(
+                    f"Tree-shaking modules unreachable from {entry_point}...", total=1
+                )
+                with span("tree-shake"):
+                    shake_report = tree_shake(
+                        entry_point,
+                        stage,
+                        keep=keep_modules or (),
+                        exclude=[vendor_dir],
+                    )
+                progress.update(task5, completed=1)
+
+            minify_report = None
+            minify_seconds = 0.0
+            if minify_excludes is not None:
+                task6 = progress.add_task("Minifying vendored modules...", total=1)
+                started = time.perf_counter()
+                with span("minify"):
+                    minify_report = minify_vendor_dir(
+                        stage,
+                        exclude=minify_excludes,
+                        strip_docstrings=minify_docstrings,
+                    )
+                minify_seconds = time.perf_counter() - started
+                progress.update(task6, completed=1)
+
+            compile_summary = None
+            if compile_mode is not None:
+                task7 = progress.add_task(
+                    "Compiling vendored modules to bytecode...", total=1
+                )
+                with span("compile"):
+                    compile_summary = compile_vendor_dir(
+                        stage, python_version, compile_mode
+                    )
+                progress.update(task7, completed=1)
+
+        if native and not fallback:
+            console.print(
+                "✅ All packages were pure Python, skipped the Pyodide toolchain"
             )
-            pyodide_venv_path = create_pyodide_env(venv_path)
-            progress.update(task2, completed=1)
+        if incremental or native:
+            _print_install_summary(install_summary)
+        if prune_report is not None and prune_profile is not None:
+            _print_prune_report(
+                f"Pruned with the {prune_profile.name} profile", prune_report
+            )
+        if shake_report is not None:
+            _print_prune_report(f"Modules unreachable from {entry_point}", shake_report)
+        if minify_report is not None:
+            _print_minify_report(minify_report, minify_seconds)
+        if compile_summary is not None:
+            console.print(
+                f"✅ Compiled {len(compile_summary['compiled'])} modules to Python "
+                f"{python_version} bytecode ({compile_mode} the sources)"
+            )
+            if compile_summary["failed"]:
+                console.print(
+                    f"  {len(compile_summary['failed'])} modules failed to compile and "
+                    "are shipped as source",
+                    style="yellow",
+                )
+
+        _check_vendor_dir(
+            stage, vendor_dir, python_version, check_bytecode_magic, size_budget
+        )
 
-            # Install packages to vendor directory
-            task3 = progress.add_task(
-                "Installing packages to vendor directory...", total=1
+        if bundle_archive is not None:
+            with span("bundle"):
+                # Written next to the stage, and swapped in with it
+                bundle = bundle_vendor_dir(
+                    stage,
+                    exclude=bundle_excludes or (),
+                    archive_path=stage.parent / bundle_archive.name,
+                )
+            console.print(
+                f"✅ Bundled {bundle.files} files into {bundle.archive.name} "
+                f"({format_size(bundle.size)}), loaded by {bundle.loader.name}"
             )
-            install_packages_to_vendor(pyodide_venv_path, vendor_file, vendor_dir)
-            progress.update(task3, completed=1)
+            if bundle.kept:
+                console.print(
+                    f"  Left in {vendor_dir.name}: {', '.join(bundle.kept)}",
+                    style="yellow",
+                )
 
+    if artifact_cache is not None and artifact_key is not None:
+        extra_files = []
+        if bundle_archive is not None:
+            extra_files = [
+                bundle_archive,
+                bundle_archive.with_name(f"{LOADER_MODULE}.py"),
+            ]
+        with span("store artifact"):
+            artifact_path = store_artifact(
+                artifact_cache, artifact_key, vendor_dir, extra_files
+            )
         console.print(
-            Panel.fit(
-                f"✅ Successfully vendored packages from {vendor_file} to {vendor_dir}",
-                title="[bold green]Vendoring Complete[/bold green]",
+            f"✅ Stored {vendor_dir} in the artifact cache ({artifact_path.name})"
+        )
+
+    with span("write manifest"):
+        manifest_path = write_manifest(
+            vendor_dir, vendor_file, bundle_archive=bundle_archive
+        )
+    console.print(f"✅ Recorded the vendored files in {manifest_path.name}")
+
+
+def _check_vendor_dir(
+    tree: Path,
+    vendor_dir: Path,
+    python_version: str,
+    check_bytecode_magic: bool,
+    size_budget: Optional[int],
+) -> None:
+    """Check the bytecode and size budget of a vendor tree, built or restored."""
+    if check_bytecode_magic:
+        with span("check bytecode"):
+            mismatched = check_bytecode(tree, python_version)
+        if mismatched:
+            shown = ", ".join(mismatched[:5])
+            more = f" and {len(mismatched) - 5} more" if len(mismatched) > 5 else ""
+            raise RuntimeError(
+                f"Bytecode not compiled for Python {python_version}: {shown}{more}"
             )
+        console.print(f"✅ All vendored bytecode targets Python {python_version}")
+
+    with span("measure size"):
+        size_report = measure_vendor_dir(tree)
+    if not _print_size_report(size_report, size_budget):
+        raise RuntimeError(f"{vendor_dir} exceeds the size budget")
+
+
+def _toolchain_version(
+    venv_path: Optional[Path], pyodide_build_version: Optional[str]
+) -> Optional[str]:
+    """Get the pyodide-build version of the toolchain, installed or requested."""
+    if venv_path is not None:
+        installed = get_installed_version(venv_path, "pyodide-build")
+        if installed is not None:
+            return installed
+    return pyodide_build_version
+
+
+def _installer_options(
+    backend: str, incremental: bool, wheel_store: bool, native: bool
+) -> Dict[str, Any]:
+    """Collect the options selecting how packages are installed, as JSON."""
+    return {
+        "backend": backend,
+        "incremental": incremental,
+        "wheel_store": wheel_store,
+        "native": native,
+    }
+
+
+def _vendor_dir_options(
+    prune_profile: Optional[PruneProfile],
+    entry_point: Optional[Path],
+    keep_modules: Optional[List[str]],
+    minify_excludes: Optional[List[str]],
+    minify_docstrings: bool,
+    compile_mode: Optional[str],
+    bundle_format: Optional[str],
+    bundle_excludes: Optional[List[str]],
+) -> Dict[str, Any]:
+    """Collect the post-install options shaping the vendor directory, as JSON."""
+    return {
+        "prune": dataclasses.asdict(prune_profile) if prune_profile else None,
+        "keep_modules": keep_modules if entry_point is not None else None,
+        "minify_excludes": minify_excludes,
+        "minify_docstrings": minify_docstrings if minify_excludes is not None else None,
+        "compile_mode": compile_mode,
+        "bundle_format": bundle_format,
+        "bundle_excludes": bundle_excludes if bundle_format else None,
+    }
+
+
+def _resolve_prune_profile(name: Optional[str]) -> Optional[PruneProfile]:
+    """Look up the prune profile to apply, defaulting to the one in pyproject.toml."""
+    profiles, default = load_prune_profiles()
+    name = name or default
+    if name is None or name == "none":
+        return None
+    if name not in profiles:
+        raise ValueError(
+            f"Unknown prune profile: {name} (available: {', '.join(sorted(profiles))}, none)"
         )
+    return profiles[name]
 
-        console.print("\n[bold]Next steps:[/bold]")
-        console.print("1. Make sure your wrangler.toml includes the vendor directory:")
+
+def _resolve_entry_point() -> Path:
+    """Find the Worker's entry point tree-shaking starts from."""
+    entry_point = read_worker_entry_point()
+    if entry_point is None:
+        raise RuntimeError(
+            "--tree-shake needs the Worker's entry point: set main in wrangler.toml "
+            "or wrangler.jsonc"
+        )
+    return entry_point
+
+
+def _resolve_size_budget(budget: Optional[str]) -> Optional[int]:
+    """Parse the --budget option, defaulting to the budget in pyproject.toml."""
+    return parse_size(budget) if budget else load_size_budget()
+
+
+def _print_size_report(
+    report: Dict[str, Dict[str, int]], budget: Optional[int] = None
+) -> bool:
+    """Print the size of the vendor directory per package and check the budget."""
+    table = Table(title="Vendor Directory Size")
+    table.add_column("Package", style="cyan")
+    table.add_column("Files", style="yellow", justify="right")
+    table.add_column("Size", style="green", justify="right")
+    table.add_column("Compressed", style="magenta", justify="right")
+    for name, stats in sorted(report.items(), key=lambda item: -item[1]["compressed"]):
+        table.add_row(
+            name,
+            str(stats["files"]),
+            format_size(stats["bytes"]),
+            format_size(stats["compressed"]),
+        )
+    console.print(table)
+
+    files = sum(stats["files"] for stats in report.values())
+    raw = sum(stats["bytes"] for stats in report.values())
+    compressed = sum(stats["compressed"] for stats in report.values())
+    console.print(
+        f"Total: {files} files, {format_size(raw)} ({format_size(compressed)} compressed)"
+    )
+    if budget is None:
+        return True
+    if compressed > budget:
         console.print(
-            """
-[[rules]]
-globs = ["vendor/**"]
-type = "Data"
-fallthrough = true
-        """,
-            style="green",
+            f"[bold red]Over budget:[/bold red] {format_size(compressed)} compressed "
+            f"exceeds {format_size(budget)} by {format_size(compressed - budget)}"
         )
-        console.print("2. Import your vendored packages in your code")
-        console.print("3. Run 'wrangler dev' to test your worker")
+        return False
+    console.print(f"✅ Within the {format_size(budget)} budget")
+    return True
 
-    except Exception as e:
-        console.print(f"[bold red]Error:[/bold red] {e!s}")
-        sys.exit(1)
+
+def _print_prune_report(title: str, report: Dict[str, Dict[str, int]]) -> None:
+    """Print the files and bytes a prune stage removed, per package."""
+    if not report:
+        console.print(f"✅ {title}: nothing to prune")
+        return
+
+    table = Table(title=title)
+    table.add_column("Package", style="cyan")
+    table.add_column("Files", style="yellow", justify="right")
+    table.add_column("Saved", style="green", justify="right")
+    for name, stats in sorted(report.items(), key=lambda item: -item[1]["bytes"]):
+        table.add_row(name, str(stats["files"]), format_size(stats["bytes"]))
+    console.print(table)
+
+    files = sum(stats["files"] for stats in report.values())
+    saved = sum(stats["bytes"] for stats in report.values())
+    console.print(f"✅ Pruned {files} files, saved {format_size(saved)}")
+
+
+def _wrangler_rules(globs: List[str]) -> str:
+    """Format the wrangler rules uploading the vendored files."""
+    return "".join(
+        f'\n[[rules]]\nglobs = ["{glob}"]\ntype = "Data"\nfallthrough = true\n'
+        for glob in globs
+    )
+
+
+def _print_minify_report(report: Dict[str, Dict[str, int]], seconds: float) -> None:
+    """Print the files minified, bytes saved and CPU time spent, per package."""
+    if not report:
+        console.print(f"✅ Nothing to minify ({seconds:.1f}s)")
+        return
+
+    table = Table(title="Minified modules")
+    table.add_column("Package", style="cyan")
+    table.add_column("Files", style="yellow", justify="right")
+    table.add_column("Saved", style="green", justify="right")
+    table.add_column("CPU time", justify="right")
+    for name, stats in sorted(report.items(), key=lambda item: -item[1]["bytes"]):
+        table.add_row(
+            name,
+            str(stats["files"]),
+            format_size(stats["bytes"]),
+            f"{stats['milliseconds'] / 1000:.2f}s",
+        )
+    console.print(table)
+
+    files = sum(stats["files"] for stats in report.values())
+    saved = sum(stats["bytes"] for stats in report.values())
+    console.print(
+        f"✅ Minified {files} files in {seconds:.1f}s, saved {format_size(saved)}"
+    )
+
+
+def _finish_profiling(profiler: Profiler, trace_path: Optional[Path]) -> None:
+    """Stop profiling, print the timings and write them as a trace if requested."""
+    stop_profiling()
+    elapsed = time.perf_counter() - profiler.origin
+    critical_path = set(profiler.critical_path())
+
+    table = Table(title="Profile", caption="* on the critical path")
+    table.add_column("", style="bold red")
+    table.add_column("Step", style="cyan")
+    table.add_column("Kind")
+    table.add_column("Wall", justify="right", style="green")
+    table.add_column("CPU", justify="right")
+    table.add_column("Peak RSS", justify="right")
+    for record in sorted(profiler.spans, key=lambda record: record.start):
+        on_path = record.category == "step" and record.name in critical_path
+        table.add_row(
+            "*" if on_path else "",
+            "  " * record.depth + record.name,
+            record.category,
+            f"{record.wall:.2f}s",
+            f"{record.cpu:.2f}s",
+            format_size(record.rss) if record.rss else "-",
+        )
+    console.print(table)
+
+    usage = process_usage()
+    summary = f"Total {elapsed:.2f}s"
+    if usage is not None:
+        summary += (
+            f", vendorpy itself used {usage['cpu']:.2f}s of CPU and peaked at "
+            f"{format_size(usage['peak_rss'])}"
+        )
+    console.print(summary)
+
+    if trace_path is not None:
+        profiler.write_trace(trace_path)
+        console.print(
+            f"✅ Wrote the trace to {trace_path}, open it in https://ui.perfetto.dev "
+            "or chrome://tracing"
+        )
 
 
-def generate_requirements(requirements_file: Path) -> None:
+def _print_install_summary(summary: Dict[str, List[str]]) -> None:
+    """Print what an incremental install changed in the vendor directory."""
+    console.print(
+        f"Installed {len(summary['installed'])}, removed {len(summary['removed'])}, "
+        f"unchanged {len(summary['unchanged'])} packages"
+    )
+    if summary["installed"]:
+        console.print(f"  + {', '.join(summary['installed'])}", style="green")
+    if summary["removed"]:
+        console.print(f"  - {', '.join(summary['removed'])}", style="red")
+
+
+def generate_requirements(
+    requirements_file: Path, registry: BuiltInRegistry = BUILT_IN_PACKAGES
+) -> None:
     """Generate requirements.txt with pruned built-in packages."""
 
+    # Render straight from uv.lock when possible, without spawning uv
+    graph = load_lockfile()
+    if graph is not None:
+        requirements_file.parent.mkdir(parents=True, exist_ok=True)
+        requirements_file.write_text(graph.export_requirements(prune=registry))
+        console.print(f"✅ Generated {requirements_file} with pruned built-in packages")
+        return
+
     # Build the uv export command with all the prune flags
     cmd = [
         "uv",
@@ -364,13 +1522,13 @@ def generate_requirements(requirements_file: Path) -> None:
     ]
 
     # Add all built-in packages as prune flags
-    for package in CLOUDFLARE_BUILT_IN_PACKAGES:
+    for package in registry.names:
         cmd.extend(["--prune", package])
 
     try:
         # Using subprocess with a fixed command list is safe as we're not using shell=True
         # and not accepting user input for the command itself
-        subprocess.run(cmd, check=True, capture_output=True, text=True)  # nosec B603
+        run_command(cmd, check=True, capture_output=True, text=True)  # nosec B603
         console.print(f"✅ Generated {requirements_file} with pruned built-in packages")
     except subprocess.CalledProcessError as e:
         console.print(f"[bold red]Error generating requirements.txt:[/bold red] {e}")
@@ -378,11 +1536,32 @@ def generate_requirements(requirements_file: Path) -> None:
 
 
 @app.command()
-def list_built_in() -> None:
+def list_built_in(
+    pyodide_lock: Optional[Path] = typer.Option(  # noqa: B008
+        None,
+        "--pyodide-lock",
+        help="pyodide-lock.json listing the built-in packages, or a directory of <compatibility-date>.json lock files",
+    ),
+    compatibility_date: Optional[str] = typer.Option(  # noqa: B008
+        None,
+        "--compatibility-date",
+        help="Workers compatibility date selecting the lock file (defaults to the wrangler configuration)",
+    ),
+) -> None:
     """List all built-in packages available in Cloudflare Workers."""
+    try:
+        registry = get_built_in_registry(pyodide_lock, compatibility_date)
+        lines = []
+        for pkg in registry.names:
+            version = registry.get_version(pkg)
+            lines.append(f"- {pkg} {version}" if version else f"- {pkg}")
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] {e!s}")
+        sys.exit(1)
+
     console.print(
         Panel.fit(
-            "\n".join(f"- {pkg}" for pkg in sorted(CLOUDFLARE_BUILT_IN_PACKAGES)),
+            "\n".join(lines),
             title="[bold green]Cloudflare Workers Built-in Packages[/bold green]",
         )
     )
@@ -403,6 +1582,16 @@ def isbuiltin(
         "-v",
         help="Path to the vendor.txt file",
     ),
+    pyodide_lock: Optional[Path] = typer.Option(  # noqa: B008
+        None,
+        "--pyodide-lock",
+        help="pyodide-lock.json listing the built-in packages, or a directory of <compatibility-date>.json lock files",
+    ),
+    compatibility_date: Optional[str] = typer.Option(  # noqa: B008
+        None,
+        "--compatibility-date",
+        help="Workers compatibility date selecting the lock file (defaults to the wrangler configuration)",
+    ),
 ) -> None:
     """Check if a package is built-in or needs to be vendored.
 
@@ -414,43 +1603,20 @@ def isbuiltin(
             console.print("[bold red]Error:[/bold red] Package name cannot be empty.")
             sys.exit(1)
 
-        # Normalize package name (convert to lowercase and replace dashes with underscores)
-        normalized_name = package_name.lower().replace("-", "_")
-
-        # Check if the package is in the built-in packages list
-        is_built_in = any(
-            pkg.lower().replace("-", "_") == normalized_name
-            for pkg in CLOUDFLARE_BUILT_IN_PACKAGES
-        )
+        # Look the package up under its PEP 503 normalized name
+        registry = get_built_in_registry(pyodide_lock, compatibility_date)
+        exact_name = registry.get(package_name.strip())
 
-        if is_built_in:
-            try:
-                # Find the exact package name with correct casing
-                exact_name = next(
-                    pkg
-                    for pkg in CLOUDFLARE_BUILT_IN_PACKAGES
-                    if pkg.lower().replace("-", "_") == normalized_name
-                )
-                console.print(
-                    Panel.fit(
-                        f"[bold green]✓ {exact_name}[/bold green] is a built-in package in Cloudflare Workers.\n\n"
-                        "You can use it directly without vendoring.\n\n"
-                        "Add it to your requirements.txt file:"
-                        f"\n  {exact_name}",
-                        title="[bold green]Built-in Package[/bold green]",
-                    )
-                )
-            except StopIteration:
-                # This should not happen, but handle it just in case
-                console.print(
-                    Panel.fit(
-                        f"[bold green]✓ {package_name}[/bold green] is a built-in package in Cloudflare Workers.\n\n"
-                        "You can use it directly without vendoring.\n\n"
-                        "Add it to your requirements.txt file:"
-                        f"\n  {package_name}",
-                        title="[bold green]Built-in Package[/bold green]",
-                    )
+        if exact_name is not None:
+            console.print(
+                Panel.fit(
+                    f"[bold green]✓ {exact_name}[/bold green] is a built-in package in Cloudflare Workers.\n\n"
+                    "You can use it directly without vendoring.\n\n"
+                    "Add it to your requirements.txt file:"
+                    f"\n  {exact_name}",
+                    title="[bold green]Built-in Package[/bold green]",
                 )
+            )
         else:
             console.print(
                 Panel.fit(
@@ -512,6 +1678,255 @@ def isbuiltin(
         sys.exit(1)
 
 
+@app.command()
+def size(
+    vendor_dir: Path = typer.Option(  # noqa: B008
+        "src/vendor",
+        "--vendor-dir",
+        "-d",
+        help="Directory the packages were vendored to",
+        exists=True,
+        file_okay=False,
+    ),
+    budget: Optional[str] = typer.Option(  # noqa: B008
+        None,
+        "--budget",
+        help="Fail if the compressed vendor directory exceeds this size, e.g. 3M (defaults to tool.vendorpy.size.budget in pyproject.toml)",
+    ),
+) -> None:
+    """
+    Show how much each vendored package adds to the Worker upload.
+
+    Files are attributed to packages through their .dist-info RECORD files and
+    counted raw and compressed. Exits with status 1 if the budget is exceeded.
+    """
+    try:
+        size_budget = _resolve_size_budget(budget)
+        within_budget = _print_size_report(measure_vendor_dir(vendor_dir), size_budget)
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] {e!s}")
+        sys.exit(1)
+
+    if not within_budget:
+        sys.exit(1)
+
+
+@app.command()
+def rollback(
+    vendor_dir: Path = typer.Option(  # noqa: B008
+        "src/vendor",
+        "--vendor-dir",
+        "-d",
+        help="Directory the packages were vendored to",
+    ),
+) -> None:
+    """
+    Restore the vendor directory the last vendoring run replaced.
+
+    The replaced tree is kept by every run, so rolling back is a rename. Rolling back
+    twice undoes the rollback. The --bundle archive and loader are restored with the
+    tree; vendor.lock is not, run verify to see how it differs.
+    """
+    try:
+        restored = rollback_vendor_dir(vendor_dir)
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] {e!s}")
+        sys.exit(1)
+
+    if not restored:
+        console.print(f"[bold red]Error:[/bold red] No previous tree of {vendor_dir}")
+        sys.exit(1)
+    console.print(f"✅ Restored the previous tree of {vendor_dir}")
+
+
+@app.command()
+def verify(
+    lock_file: Path = typer.Option(  # noqa: B008
+        "vendor.lock",
+        "--lock-file",
+        "-l",
+        help="vendor.lock manifest written when vendoring",
+        exists=True,
+        dir_okay=False,
+    ),
+) -> None:
+    """
+    Check that the vendor directory matches its vendor.lock manifest.
+
+    Every vendored file is hashed again and compared with the manifest, which also
+    detects changes to vendor.txt since vendoring. Exits with status 1 on drift.
+    """
+    try:
+        started = time.perf_counter()
+        drift = verify_manifest(lock_file)
+        elapsed = time.perf_counter() - started
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] {e!s}")
+        sys.exit(1)
+
+    if not any(drift.values()):
+        console.print(
+            f"✅ The vendor directory matches {lock_file.name} ({elapsed:.2f}s)"
+        )
+        return
+
+    for key, label, style in (
+        ("requirements", "changed since vendoring", "yellow"),
+        ("modified", "modified", "yellow"),
+        ("missing", "missing", "red"),
+        ("added", "not in the manifest", "red"),
+    ):
+        if drift[key]:
+            shown = ", ".join(drift[key][:10])
+            more = f" and {len(drift[key]) - 10} more" if len(drift[key]) > 10 else ""
+            console.print(f"  {len(drift[key])} {label}: {shown}{more}", style=style)
+    console.print(
+        f"[bold red]The vendor directory drifted from {lock_file.name}[/bold red] "
+        f"({elapsed:.2f}s)"
+    )
+    sys.exit(1)
+
+
+@cache_app.command("info")
+def cache_info() -> None:
+    """Show the location, size and entries of the vendorpy cache."""
+    entries = list_entries()
+    total_size = sum(entry.get("size", 0) for entry in entries)
+
+    table = Table(title=f"Cache: {get_cache_dir()}")
+    table.add_column("Namespace", style="cyan")
+    table.add_column("Key", style="yellow")
+    table.add_column("Size", style="green", justify="right")
+    table.add_column("Last Used", style="magenta")
+
+    for entry in entries:
+        last_used = datetime.fromtimestamp(entry.get("last_used", 0))
+        table.add_row(
+            entry.get("namespace", "?"),
+            entry.get("key", "?"),
+            format_size(entry.get("size", 0)),
+            last_used.strftime("%Y-%m-%d %H:%M"),
+        )
+
+    console.print(table)
+    console.print(
+        f"Total: {format_size(total_size)} in {len(entries)} entries "
+        f"(limit {format_size(get_cache_max_size())})"
+    )
+
+
+@cache_app.command("prune")
+def cache_prune(
+    max_size: Optional[str] = typer.Option(  # noqa: B008
+        None,
+        "--max-size",
+        help="Size budget to prune to, e.g. 500M or 2G (defaults to VENDORPY_CACHE_MAX_SIZE or 2G)",
+    ),
+    clear: bool = typer.Option(  # noqa: B008
+        False,
+        "--all",
+        help="Remove every cache entry",
+    ),
+) -> None:
+    """Evict least recently used cache entries until the cache fits its budget."""
+    try:
+        if clear:
+            evicted = clear_cache()
+        else:
+            evicted = prune_cache(parse_size(max_size) if max_size else None)
+    except ValueError as e:
+        console.print(f"[bold red]Error:[/bold red] {e!s}")
+        sys.exit(1)
+
+    freed = sum(entry.get("size", 0) for entry in evicted)
+    console.print(
+        f"✅ Removed {len(evicted)} cache entries, freed {format_size(freed)}"
+    )
+
+
+@wheelhouse_app.command("build")
+def wheelhouse_build(
+    wheelhouse: Path = typer.Option(  # noqa: B008
+        "wheelhouse",
+        "--wheelhouse",
+        "-w",
+        help="Directory to download the wheels to",
+    ),
+    vendor_file: Path = typer.Option(  # noqa: B008
+        "vendor.txt",
+        "--vendor-file",
+        "-v",
+        help="Path to the vendor.txt file containing packages to vendor",
+        exists=True,
+    ),
+    python_version: str = typer.Option(  # noqa: B008
+        "3.12",
+        "--python-version",
+        "-p",
+        help="Python version to use for vendoring (must be 3.12 for Cloudflare Workers)",
+    ),
+    pyodide_build_version: Optional[str] = typer.Option(  # noqa: B008
+        None,
+        "--pyodide-build-version",
+        help="Version of pyodide-build to fetch (defaults to the latest)",
+    ),
+    backend: str = typer.Option(  # noqa: B008
+        "auto",
+        "--backend",
+        callback=_validate_backend,
+        help="Tool creating the toolchain environment: uv, pip, or auto (uv when installed)",
+    ),
+    use_cache: bool = typer.Option(  # noqa: B008
+        True,
+        "--cache/--no-cache",
+        help="Reuse cached toolchains instead of rebuilding environments on every run",
+    ),
+) -> None:
+    """
+    Download every wheel needed to vendor vendor.txt into a wheelhouse.
+
+    pyodide-build and the packages in vendor.txt (with all their dependencies) are
+    fetched in one bulk pass, so `vendorpy vendor --wheelhouse DIR` can run without
+    network access afterwards.
+    """
+    try:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=console,
+        ) as progress:
+            task1 = progress.add_task("Creating Python virtual environment...", total=1)
+            venv_path = create_virtual_env(
+                python_version,
+                pyodide_build_version=pyodide_build_version,
+                use_cache=use_cache,
+                backend=backend,
+            )
+            progress.update(task1, completed=1)
+
+            task2 = progress.add_task(
+                "Creating Pyodide virtual environment...", total=1
+            )
+            pyodide_venv_path = create_pyodide_env(venv_path, use_cache=use_cache)
+            progress.update(task2, completed=1)
+
+            task3 = progress.add_task(f"Downloading wheels to {wheelhouse}...", total=1)
+            files = build_wheelhouse(
+                wheelhouse,
+                vendor_file,
+                venv_path,
+                pyodide_venv_path,
+                pyodide_build_version=pyodide_build_version,
+            )
+            progress.update(task3, completed=1)
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] {e!s}")
+        sys.exit(1)
+
+    console.print(f"✅ Downloaded {len(files)} distributions to {wheelhouse}")
+    console.print(f"Vendor offline with: vendorpy vendor --wheelhouse {wheelhouse}")
+
+
 def main() -> None:
     """Main entry point for the CLI."""
     app()
@@ -0,0 +1,198 @@
+"""
+Helpers for the distributions installed in a vendor directory.
+
+Packages installed with ``pip install -t`` leave a ``*.dist-info`` directory per
+distribution, whose ``METADATA`` and ``RECORD`` files tell which distribution and
+version owns which files. These helpers read them so the vendor directory can be
+diffed against the requested packages and updated in place.
+"""
+
+import csv
+import io
+import os
+import re
+from dataclasses import dataclass, field
+from email.parser import HeaderParser
+from pathlib import Path
+from typing import AbstractSet, Dict, Iterable, List, Optional, Tuple
+
+# Name the files no distribution's RECORD lists are attributed to
+UNOWNED = "(unowned)"
+
+
+@dataclass
+class InstalledDistribution:
+    """A distribution installed in a target directory."""
+
+    name: str
+    version: str
+    dist_info: Path
+    files: List[str] = field(default_factory=list)
+
+    @property
+    def canonical_name(self) -> str:
+        """The PEP 503 normalized name of the distribution."""
+        return canonicalize_name(self.name)
+
+
+def canonicalize_name(name: str) -> str:
+    """
+    Normalize a distribution name as described in PEP 503.
+
+    Args:
+        name: Distribution name, e.g. "Jinja2" or "zope.interface"
+
+    Returns:
+        The normalized name, e.g. "jinja2" or "zope-interface"
+    """
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def read_record(dist_info: Path) -> List[Tuple[str, str, str]]:
+    """
+    Read the RECORD file of a distribution.
+
+    Args:
+        dist_info: Path to the distribution's .dist-info directory
+
+    Returns:
+        List of (path, hash, size) rows, with paths relative to the install directory
+    """
+    record_path = dist_info / "RECORD"
+    if not record_path.exists():
+        return []
+
+    rows = []
+    with open(record_path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if not row or not row[0]:
+                continue
+            path, file_hash, size = (row + ["", ""])[:3]
+            rows.append((path, file_hash, size))
+    return rows
+
+
+def rewrite_record(
+    dist_info: Path,
+    removed: AbstractSet[str] = frozenset(),
+    added: Iterable[Tuple[str, str, str]] = (),
+) -> None:
+    """
+    Update the RECORD file of a distribution after files were removed or added.
+
+    RECORD may be hardlinked from the wheel store, so it is replaced, never written
+    in place.
+
+    Args:
+        dist_info: Path to the distribution's .dist-info directory
+        removed: Paths of the files to drop from RECORD
+        added: (path, hash, size) rows to append to RECORD
+    """
+    record_path = dist_info / "RECORD"
+    rows = [row for row in read_record(dist_info) if row[0] not in removed]
+    rows.extend(added)
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+
+    tmp_path = record_path.with_name("RECORD.tmp")
+    tmp_path.write_text(buffer.getvalue(), encoding="utf-8")
+    os.replace(tmp_path, record_path)
+
+
+def _read_name_and_version(dist_info: Path) -> Optional[Tuple[str, str]]:
+    """Read the name and version of a distribution from its METADATA file."""
+    metadata_path = dist_info / "METADATA"
+    if metadata_path.exists():
+        with open(metadata_path, "r", encoding="utf-8", errors="replace") as f:
+            headers = HeaderParser().parse(f, headersonly=True)
+        if headers.get("Name") and headers.get("Version"):
+            return str(headers["Name"]), str(headers["Version"])
+
+    # Fall back to the directory name: <name>-<version>.dist-info
+    stem = dist_info.name[: -len(".dist-info")]
+    name, _, version = stem.partition("-")
+    if name and version:
+        return name, version
+    return None
+
+
+def find_installed_distributions(target_dir: Path) -> Dict[str, InstalledDistribution]:
+    """
+    Find the distributions installed in a target directory.
+
+    Args:
+        target_dir: Directory packages were installed into with `pip install -t`
+
+    Returns:
+        Dictionary mapping canonical distribution names to installed distributions
+    """
+    distributions: Dict[str, InstalledDistribution] = {}
+    if not target_dir.is_dir():
+        return distributions
+
+    for dist_info in sorted(target_dir.glob("*.dist-info")):
+        if not dist_info.is_dir():
+            continue
+        name_and_version = _read_name_and_version(dist_info)
+        if name_and_version is None:
+            continue
+        name, version = name_and_version
+        files = [path for path, _hash, _size in read_record(dist_info)]
+        distribution = InstalledDistribution(name, version, dist_info, files)
+        distributions[distribution.canonical_name] = distribution
+
+    return distributions
+
+
+def remove_distribution(distribution: InstalledDistribution, target_dir: Path) -> int:
+    """
+    Remove the files of an installed distribution from a target directory.
+
+    Only files listed in RECORD that live inside target_dir are removed, together
+    with their cached bytecode. Directories left empty are removed as well.
+
+    Args:
+        distribution: The distribution to remove
+        target_dir: Directory the distribution was installed into
+
+    Returns:
+        Number of files removed
+    """
+    root = target_dir.resolve()
+    removed = 0
+    parents = set()
+
+    for relative_path in [*distribution.files, f"{distribution.dist_info.name}/RECORD"]:
+        path = (target_dir / relative_path).resolve()
+        # Never touch files outside the target directory (e.g. ../../bin scripts)
+        if root not in path.parents:
+            continue
+        if path.suffix == ".py":
+            pycache = path.parent / "__pycache__"
+            for pyc in pycache.glob(f"{path.stem}.*.pyc"):
+                pyc.unlink()
+            parents.add(pycache)
+        if path.is_file() or path.is_symlink():
+            path.unlink()
+            removed += 1
+        parents.add(path.parent)
+
+    # Remove leftovers of the .dist-info directory (e.g. files not in RECORD)
+    dist_info = distribution.dist_info.resolve()
+    if dist_info.is_dir():
+        for path in dist_info.rglob("*"):
+            if path.is_file():
+                path.unlink()
+                removed += 1
+        parents.add(dist_info)
+
+    # Prune directories that are now empty, deepest first
+    for directory in sorted(parents, key=lambda p: len(p.parts), reverse=True):
+        while directory != root and root in directory.parents:
+            try:
+                directory.rmdir()
+            except OSError:
+                break
+            directory = directory.parent
+
+    return removed
@@ -0,0 +1,320 @@
+"""
+In-process reader for uv.lock files.
+
+Parsing the lockfile directly gives vendorpy the project's full dependency graph
+without spawning `uv export`. The graph is built once per lockfile (and cached
+until the file changes), then serves both package detection and requirements.txt
+generation.
+"""
+
+import os
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+import tomli
+from packaging.markers import InvalidMarker, Marker
+
+from .distributions import canonicalize_name
+from .wheels import PYODIDE_MARKER_ENVIRONMENT
+
+# Default location of the lockfile, relative to the project directory
+DEFAULT_LOCKFILE = Path("uv.lock")
+
+
+@dataclass(frozen=True)
+class LockedDependency:
+    """An edge of the lockfile's dependency graph."""
+
+    name: str
+    extras: Tuple[str, ...] = ()
+    marker: Optional[str] = None
+    version: Optional[str] = None
+
+
+@dataclass
+class LockedPackage:
+    """A package pinned in the lockfile."""
+
+    name: str
+    version: str
+    source: Dict[str, Any] = field(default_factory=dict)
+    dependencies: List[LockedDependency] = field(default_factory=list)
+    optional_dependencies: Dict[str, List[LockedDependency]] = field(
+        default_factory=dict
+    )
+    dev_dependencies: Dict[str, List[LockedDependency]] = field(default_factory=dict)
+    hashes: List[str] = field(default_factory=list)
+
+    @property
+    def canonical_name(self) -> str:
+        """The PEP 503 normalized name of the package."""
+        return canonicalize_name(self.name)
+
+    def requirement(self, include_hashes: bool = True) -> str:
+        """
+        Format the package as a pinned requirements.txt entry.
+
+        Args:
+            include_hashes: Append the --hash options of registry packages
+
+        Returns:
+            The requirement line(s)
+        """
+        if "git" in self.source:
+            # e.g. https://github.com/org/repo?rev=main#<commit>
+            url, _, commit = self.source["git"].partition("#")
+            url = url.split("?", 1)[0]
+            return (
+                f"{self.name} @ git+{url}@{commit}"
+                if commit
+                else f"{self.name} @ git+{url}"
+            )
+        if "url" in self.source:
+            return f"{self.name} @ {self.source['url']}"
+        for kind in ("editable", "directory", "path"):
+            if kind in self.source:
+                path = self.source[kind]
+                path = path if path.startswith((".", "/")) else f"./{path}"
+                return f"-e {path}" if kind == "editable" else path
+
+        line = f"{self.name}=={self.version}"
+        if include_hashes and self.hashes:
+            line += "".join(f" \\\n    --hash={digest}" for digest in self.hashes)
+        return line
+
+
+def _parse_dependencies(entries: Iterable[Dict[str, Any]]) -> List[LockedDependency]:
+    """Parse a list of dependency tables from the lockfile."""
+    return [
+        LockedDependency(
+            name=canonicalize_name(entry["name"]),
+            extras=tuple(entry.get("extra", ())),
+            marker=entry.get("marker"),
+            version=entry.get("version"),
+        )
+        for entry in entries
+    ]
+
+
+class LockGraph:
+    """The dependency graph recorded in a uv.lock file."""
+
+    def __init__(self, packages: List[LockedPackage], members: Iterable[str] = ()):
+        """
+        Build the graph from the locked packages.
+
+        Args:
+            packages: Every package in the lockfile
+            members: Names of the workspace members (the project roots)
+        """
+        self.packages: Dict[str, List[LockedPackage]] = {}
+        for package in packages:
+            self.packages.setdefault(package.canonical_name, []).append(package)
+
+        member_names = {canonicalize_name(name) for name in members}
+        self.roots = [
+            package
+            for package in packages
+            if package.canonical_name in member_names
+            or package.source.get("editable") == "."
+            or package.source.get("virtual") == "."
+        ]
+
+    @classmethod
+    def from_file(cls, lockfile: Path) -> "LockGraph":
+        """
+        Parse a uv.lock file.
+
+        Args:
+            lockfile: Path to the uv.lock file
+
+        Returns:
+            The dependency graph of the lockfile
+
+        Raises:
+            OSError: If the file cannot be read
+            tomli.TOMLDecodeError: If the file is not valid TOML
+            KeyError: If a package entry lacks its name
+        """
+        with open(lockfile, "rb") as f:
+            data = tomli.load(f)
+
+        packages = []
+        for entry in data.get("package", []):
+            hashes = []
+            sdist = entry.get("sdist")
+            if sdist and sdist.get("hash"):
+                hashes.append(sdist["hash"])
+            hashes.extend(
+                wheel["hash"] for wheel in entry.get("wheels", []) if wheel.get("hash")
+            )
+
+            packages.append(
+                LockedPackage(
+                    name=entry["name"],
+                    version=str(entry.get("version", "")),
+                    source=entry.get("source", {}),
+                    dependencies=_parse_dependencies(entry.get("dependencies", [])),
+                    optional_dependencies={
+                        extra: _parse_dependencies(deps)
+                        for extra, deps in entry.get(
+                            "optional-dependencies", {}
+                        ).items()
+                    },
+                    dev_dependencies={
+                        group: _parse_dependencies(deps)
+                        for group, deps in entry.get("dev-dependencies", {}).items()
+                    },
+                    hashes=hashes,
+                )
+            )
+
+        members = data.get("manifest", {}).get("members", [])
+        return cls(packages, members)
+
+    def resolve(self, dependency: LockedDependency) -> List[LockedPackage]:
+        """
+        Find the locked package(s) a dependency edge points to.
+
+        Args:
+            dependency: The dependency edge
+
+        Returns:
+            Matching packages (several if the lock forks on markers and the edge
+            does not pin a version)
+        """
+        candidates = self.packages.get(dependency.name, [])
+        if dependency.version is not None:
+            candidates = [p for p in candidates if p.version == dependency.version]
+        return candidates
+
+    def walk(
+        self,
+        prune: Iterable[str] = (),
+        include_dev: bool = False,
+        python_version: str = "3.12",
+    ) -> List[LockedPackage]:
+        """
+        Collect the packages the project needs in the Workers runtime.
+
+        Edges whose markers do not hold for Pyodide are skipped. Pruned packages are
+        not entered, so dependencies only reachable through them are left out as
+        well (like `uv export --prune`).
+
+        Args:
+            prune: Names of packages to prune from the graph
+            include_dev: Also follow the roots' development dependency groups
+            python_version: Python version of the Workers runtime
+
+        Returns:
+            The reachable packages, excluding the project roots, sorted by name
+        """
+        environment = {
+            **PYODIDE_MARKER_ENVIRONMENT,
+            "python_version": ".".join(python_version.split(".")[:2]),
+            "python_full_version": python_version,
+            "implementation_version": python_version,
+            "extra": "",
+        }
+        pruned = {canonicalize_name(name) for name in prune}
+
+        def applies(dependency: LockedDependency) -> bool:
+            if not dependency.marker:
+                return True
+            try:
+                return Marker(dependency.marker).evaluate(environment)
+            except InvalidMarker:
+                return True
+
+        root_ids = {id(root) for root in self.roots}
+
+        def edges(
+            package: LockedPackage, extra: Optional[str]
+        ) -> List[LockedDependency]:
+            if extra is not None:
+                return package.optional_dependencies.get(extra, [])
+            if include_dev and id(package) in root_ids:
+                return package.dependencies + [
+                    dep for deps in package.dev_dependencies.values() for dep in deps
+                ]
+            return package.dependencies
+
+        reachable: Dict[int, LockedPackage] = {}
+        seen: Set[Tuple[int, Optional[str]]] = set()
+        queue: Deque[Tuple[LockedPackage, Optional[str]]] = deque(
+            (root, None) for root in self.roots
+        )
+
+        while queue:
+            package, extra = queue.popleft()
+            if (id(package), extra) in seen:
+                continue
+            seen.add((id(package), extra))
+
+            for dependency in edges(package, extra):
+                if dependency.name in pruned or not applies(dependency):
+                    continue
+                for target in self.resolve(dependency):
+                    if id(target) not in root_ids:
+                        reachable[id(target)] = target
+                    queue.append((target, None))
+                    queue.extend((target, dep_extra) for dep_extra in dependency.extras)
+
+        return sorted(reachable.values(), key=lambda p: (p.canonical_name, p.version))
+
+    def export_requirements(
+        self,
+        prune: Iterable[str] = (),
+        include_hashes: bool = True,
+        python_version: str = "3.12",
+    ) -> str:
+        """
+        Render the project's non-development dependencies as a requirements.txt.
+
+        Args:
+            prune: Names of packages to prune, together with dependencies only
+                reachable through them
+            include_hashes: Include the --hash options of registry packages
+            python_version: Python version of the Workers runtime
+
+        Returns:
+            The requirements.txt content
+        """
+        lines = ["# This file was autogenerated by vendorpy from uv.lock"]
+        for package in self.walk(prune=prune, python_version=python_version):
+            lines.append(package.requirement(include_hashes=include_hashes))
+        return "\n".join(lines) + "\n"
+
+
+_LOCKFILE_CACHE: Dict[Tuple[str, int, int], LockGraph] = {}
+
+
+def load_lockfile(lockfile: Path = DEFAULT_LOCKFILE) -> Optional[LockGraph]:
+    """
+    Load the dependency graph of a uv.lock file, reusing it while the file is unchanged.
+
+    Args:
+        lockfile: Path to the uv.lock file
+
+    Returns:
+        The dependency graph, or None if the lockfile is missing, unreadable or has
+        no project root (callers then fall back to `uv export`)
+    """
+    try:
+        stat = os.stat(lockfile)
+    except OSError:
+        return None
+
+    cache_key = (str(Path(lockfile).resolve()), stat.st_mtime_ns, stat.st_size)
+    graph = _LOCKFILE_CACHE.get(cache_key)
+    if graph is None:
+        try:
+            graph = LockGraph.from_file(lockfile)
+        except (OSError, tomli.TOMLDecodeError, KeyError, TypeError, AttributeError):
+            return None
+        _LOCKFILE_CACHE.clear()
+        _LOCKFILE_CACHE[cache_key] = graph
+
+    return graph if graph.roots else None
@@ -0,0 +1,230 @@
+"""
+The vendor.lock manifest of a vendor directory.
+
+After vendoring, vendorpy writes ``vendor.lock`` next to ``vendor.txt``: the
+vendored distributions with their versions, the SHA-256 of every file of the vendor
+directory, and the SHA-256 of ``vendor.txt`` itself (and of the bundle archive and
+its loader module, if the vendor directory was bundled). ``vendorpy verify`` re-hashes
+the vendor directory against it, so CI can check that the committed vendor directory
+is exactly what ``vendor.txt`` produced.
+
+Files are hashed on a thread pool through memory maps: hashlib releases the GIL
+while hashing large buffers, and mapping a file avoids copying it into Python.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .bundle import LOADER_MODULE
+from .distributions import UNOWNED, find_installed_distributions
+
+MANIFEST_FILE = "vendor.lock"
+
+# Bumped when the manifest format changes
+MANIFEST_VERSION = 1
+
+
+def _hash_file(path: str) -> str:
+    """Compute the SHA-256 hex digest of a file through a memory map."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files cannot be mapped
+            return hashlib.sha256().hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return hashlib.sha256(mapped).hexdigest()
+
+
+def hash_vendor_dir(
+    vendor_dir: Path, max_workers: Optional[int] = None
+) -> Dict[str, str]:
+    """
+    Hash every file of a vendor directory.
+
+    Args:
+        vendor_dir: Directory the packages were vendored to
+        max_workers: Number of files hashed at once (defaults to the CPU count)
+
+    Returns:
+        Dictionary mapping paths relative to vendor_dir to SHA-256 hex digests
+    """
+    relative_paths: List[str] = []
+    for root, _dirs, files in os.walk(vendor_dir):
+        relative_root = Path(root).relative_to(vendor_dir).as_posix()
+        for name in files:
+            relative_paths.append(
+                name if relative_root == "." else f"{relative_root}/{name}"
+            )
+
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        digests = executor.map(
+            _hash_file, [os.path.join(vendor_dir, path) for path in relative_paths]
+        )
+        return dict(zip(relative_paths, digests))
+
+
+def _hash_optional(path: Path) -> Optional[str]:
+    """Hash a file, or return None if it does not exist."""
+    try:
+        return _hash_file(str(path))
+    except FileNotFoundError:
+        return None
+
+
+def build_manifest(
+    vendor_dir: Path,
+    vendor_file: Path,
+    bundle_archive: Optional[Path] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Describe the current contents of a vendor directory.
+
+    Args:
+        vendor_dir: Directory the packages were vendored to
+        vendor_file: The vendor.txt the packages were installed from
+        bundle_archive: Archive the vendor directory was bundled into, if any
+        max_workers: Number of files hashed at once (defaults to the CPU count)
+
+    Returns:
+        The manifest, see write_manifest
+    """
+    hashes = hash_vendor_dir(vendor_dir, max_workers)
+    distributions: Dict[str, Dict[str, Any]] = {}
+    for dist in find_installed_distributions(vendor_dir).values():
+        files = {path: hashes.pop(path) for path in dist.files if path in hashes}
+        distributions[dist.name] = {"version": dist.version, "files": files}
+
+    manifest: Dict[str, Any] = {
+        "version": MANIFEST_VERSION,
+        "vendor_dir": vendor_dir.as_posix(),
+        "requirements": {
+            "path": vendor_file.as_posix(),
+            "sha256": _hash_optional(vendor_file),
+        },
+        "distributions": distributions,
+        UNOWNED: hashes,
+    }
+    if bundle_archive is not None:
+        loader = bundle_archive.with_name(f"{LOADER_MODULE}.py")
+        manifest["bundle"] = {
+            "path": bundle_archive.as_posix(),
+            "sha256": _hash_file(str(bundle_archive)),
+            "loader": {"path": loader.as_posix(), "sha256": _hash_file(str(loader))},
+        }
+    return manifest
+
+
+def write_manifest(
+    vendor_dir: Path,
+    vendor_file: Path,
+    manifest_path: Optional[Path] = None,
+    bundle_archive: Optional[Path] = None,
+) -> Path:
+    """
+    Write the vendor.lock manifest of a vendor directory.
+
+    The manifest is a JSON document with sorted keys, so it diffs cleanly:
+
+        {
+          "version": 1,
+          "vendor_dir": "src/vendor",
+          "requirements": {"path": "vendor.txt", "sha256": "..."},
+          "distributions": {
+            "Jinja2": {"version": "3.1.4", "files": {"jinja2/__init__.py": "..."}}
+          },
+          "(unowned)": {}
+        }
+
+    Args:
+        vendor_dir: Directory the packages were vendored to
+        vendor_file: The vendor.txt the packages were installed from
+        manifest_path: Where to write the manifest (defaults to vendor.lock next to
+            vendor_file)
+        bundle_archive: Archive the vendor directory was bundled into, if any
+
+    Returns:
+        Path of the manifest written
+    """
+    if manifest_path is None:
+        manifest_path = vendor_file.with_name(MANIFEST_FILE)
+    manifest = build_manifest(vendor_dir, vendor_file, bundle_archive)
+
+    tmp_path = manifest_path.with_name(f"{manifest_path.name}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, manifest_path)
+    return manifest_path
+
+
+def verify_manifest(
+    manifest_path: Path, max_workers: Optional[int] = None
+) -> Dict[str, List[str]]:
+    """
+    Compare a vendor directory with its vendor.lock manifest.
+
+    The vendor directory, vendor.txt, bundle archive and its loader are looked up at
+    the paths recorded in the manifest, relative to the current directory.
+
+    Args:
+        manifest_path: Path to the vendor.lock manifest
+        max_workers: Number of files hashed at once (defaults to the CPU count)
+
+    Returns:
+        Dictionary with the "modified", "missing" and "added" file paths (relative to
+        the vendor directory, or the archive's and loader's paths), and the "requirements" files
+        that changed since the manifest was written; all empty if nothing drifted
+
+    Raises:
+        FileNotFoundError: If the manifest does not exist
+        ValueError: If the manifest cannot be read
+    """
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+    except json.JSONDecodeError as err:
+        raise ValueError(f"Failed to read {manifest_path}: {err}") from err
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(
+            f"Unsupported {manifest_path.name} version: {manifest.get('version')}, "
+            "vendor again to regenerate it"
+        )
+
+    expected: Dict[str, str] = dict(manifest.get(UNOWNED, {}))
+    for dist in manifest["distributions"].values():
+        expected.update(dist["files"])
+    vendor_dir = Path(manifest["vendor_dir"])
+    actual = hash_vendor_dir(vendor_dir, max_workers) if vendor_dir.is_dir() else {}
+
+    drift: Dict[str, List[str]] = {
+        "modified": sorted(
+            path
+            for path, digest in expected.items()
+            if path in actual and actual[path] != digest
+        ),
+        "missing": sorted(expected.keys() - actual.keys()),
+        "added": sorted(actual.keys() - expected.keys()),
+        "requirements": [],
+    }
+
+    requirements = manifest["requirements"]
+    if _hash_optional(Path(requirements["path"])) != requirements["sha256"]:
+        drift["requirements"].append(requirements["path"])
+
+    bundle = manifest.get("bundle")
+    if bundle is not None:
+        for bundle_file in (bundle, bundle.get("loader")):
+            if bundle_file is None:
+                continue
+            digest = _hash_optional(Path(bundle_file["path"]))
+            if digest is None:
+                drift["missing"].append(bundle_file["path"])
+            elif digest != bundle_file["sha256"]:
+                drift["modified"].append(bundle_file["path"])
+
+    return drift
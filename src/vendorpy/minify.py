@@ -0,0 +1,265 @@
+"""
+AST-based minification of the vendored sources.
+
+Vendored modules are parsed and unparsed, which drops comments and formatting, and
+transformed along the way:
+
+- ``if TYPE_CHECKING:`` blocks, which only matter to type checkers, are emptied;
+- annotations of local variables inside functions, which are never evaluated, are
+  dropped from assignments.
+
+Docstrings can be removed too, on request only: many packages read them at runtime,
+for the help of click and typer commands, argparse descriptions or through
+``inspect.getdoc``, which would silently lose them. Modules referring to ``__doc__``
+keep theirs anyway, but that does not catch every reader.
+
+Annotations that may be read at runtime (function signatures, class attributes used
+by dataclasses, pydantic models, ...) are kept. A module is only rewritten if its
+minified form compiles and is smaller. Files are minified on a process pool, since
+parsing is CPU bound. Its workers are not forked from vendorpy, which may be running
+other pipeline steps on threads: forking a multithreaded process can deadlock.
+"""
+
+import ast
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import tomli
+
+from .distributions import (
+    UNOWNED,
+    canonicalize_name,
+    find_installed_distributions,
+    rewrite_record,
+)
+from .utils import DEFAULT_PYPROJECT
+from .wheels import record_hash
+
+# Packages reading their own docstrings at runtime (e.g. ply grammars)
+DEFAULT_EXCLUDED_PACKAGES = ("ply", "pycparser")
+
+_FunctionNode = Union[ast.FunctionDef, ast.AsyncFunctionDef]
+
+# Start method of the worker processes, see the module docstring
+_POOL_START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+class _Minifier(ast.NodeTransformer):
+    """Strip what the runtime never uses from a module's syntax tree."""
+
+    def __init__(self, strip_docstrings: bool):
+        self.strip_docstrings = strip_docstrings
+        self.function_depth = 0
+
+    def _strip_docstring(
+        self, node: Union[ast.Module, ast.ClassDef, _FunctionNode]
+    ) -> None:
+        if (
+            self.strip_docstrings
+            and node.body
+            and isinstance(node.body[0], ast.Expr)
+            and isinstance(node.body[0].value, ast.Constant)
+            and isinstance(node.body[0].value.value, str)
+        ):
+            node.body = node.body[1:] or [ast.Pass()]
+
+    def visit_Module(self, node: ast.Module) -> ast.AST:
+        self.generic_visit(node)
+        self._strip_docstring(node)
+        return node
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> ast.AST:
+        # Annotations in a class body are class attributes, even inside a function
+        depth, self.function_depth = self.function_depth, 0
+        self.generic_visit(node)
+        self.function_depth = depth
+        self._strip_docstring(node)
+        return node
+
+    def _visit_function(self, node: _FunctionNode) -> ast.AST:
+        self.function_depth += 1
+        self.generic_visit(node)
+        self.function_depth -= 1
+        self._strip_docstring(node)
+        return node
+
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+
+    def visit_If(self, node: ast.If) -> ast.AST:
+        self.generic_visit(node)
+        test = node.test
+        if (isinstance(test, ast.Name) and test.id == "TYPE_CHECKING") or (
+            isinstance(test, ast.Attribute) and test.attr == "TYPE_CHECKING"
+        ):
+            node.body = [ast.Pass()]
+        return node
+
+    def visit_AnnAssign(self, node: ast.AnnAssign) -> ast.AST:
+        if self.function_depth and node.value is not None and node.simple:
+            return ast.Assign(targets=[node.target], value=node.value)
+        return node
+
+
+def minify_source(source: bytes, strip_docstrings: bool = False) -> str:
+    """
+    Minify the source code of a module.
+
+    Args:
+        source: Source code of the module
+        strip_docstrings: Remove docstrings (kept anyway if the module uses __doc__)
+
+    Returns:
+        The minified source code
+
+    Raises:
+        SyntaxError: If the module cannot be parsed
+        ValueError: If the module contains null bytes
+    """
+    tree = ast.parse(source)
+    strip_docstrings = strip_docstrings and b"__doc__" not in source
+    tree = ast.fix_missing_locations(_Minifier(strip_docstrings).visit(tree))
+    return ast.unparse(tree) + "\n"
+
+
+def _minify_file(path: str, strip_docstrings: bool) -> Tuple[int, int, str, float]:
+    """
+    Minify a module in place.
+
+    Returns:
+        The original and final size of the module, the RECORD hash of the minified
+        module (empty if it was left alone) and the seconds spent
+    """
+    started = time.process_time()
+    with open(path, "rb") as f:
+        source = f.read()
+    try:
+        minified = minify_source(source, strip_docstrings).encode("utf-8")
+        compile(minified, path, "exec", dont_inherit=True)
+    except (SyntaxError, ValueError, RecursionError):
+        minified = source
+    if len(minified) >= len(source):
+        return len(source), len(source), "", time.process_time() - started
+
+    # The file may be hardlinked from the wheel store, never write it in place
+    tmp_path = f"{path}.minify.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(minified)
+    os.replace(tmp_path, path)
+    digest = record_hash(Path(path))
+    return len(source), len(minified), digest, time.process_time() - started
+
+
+def load_minify_exclusions(pyproject: Path = DEFAULT_PYPROJECT) -> List[str]:
+    """
+    Read the packages excluded from minification from pyproject.toml.
+
+        [tool.vendorpy.minify]
+        exclude = ["docopt"]
+
+    Args:
+        pyproject: Path to the project's pyproject.toml
+
+    Returns:
+        The configured package names
+
+    Raises:
+        ValueError: If the configuration is invalid
+    """
+    try:
+        with open(pyproject, "rb") as f:
+            config = tomli.load(f).get("tool", {}).get("vendorpy", {}).get("minify", {})
+    except FileNotFoundError:
+        return []
+    except (OSError, tomli.TOMLDecodeError) as err:
+        raise ValueError(f"Failed to read {pyproject}: {err}") from err
+
+    exclude = config.get("exclude", [])
+    if not isinstance(exclude, list) or not all(isinstance(p, str) for p in exclude):
+        raise ValueError("tool.vendorpy.minify.exclude must be a list of package names")
+    return exclude
+
+
+def minify_vendor_dir(
+    vendor_dir: Path,
+    exclude: Iterable[str] = (),
+    strip_docstrings: bool = False,
+    jobs: Optional[int] = None,
+) -> Dict[str, Dict[str, int]]:
+    """
+    Minify the vendored modules, except those of excluded distributions.
+
+    Args:
+        vendor_dir: Directory the packages were vendored to
+        exclude: Names of distributions to leave alone, in addition to
+            DEFAULT_EXCLUDED_PACKAGES
+        strip_docstrings: Remove docstrings (see the module docstring for the risk)
+        jobs: Number of worker processes (defaults to the CPU count)
+
+    Returns:
+        Dictionary mapping distribution names (UNOWNED for files no RECORD lists) to
+        the "files" minified, "bytes" saved and CPU "milliseconds" spent;
+        distributions nothing was minified in are omitted
+    """
+    excluded = {
+        canonicalize_name(name) for name in (*DEFAULT_EXCLUDED_PACKAGES, *exclude)
+    }
+    distributions = find_installed_distributions(vendor_dir)
+    owners = {path: dist for dist in distributions.values() for path in dist.files}
+
+    relative_paths = []
+    for root, dirs, files in os.walk(vendor_dir):
+        dirs[:] = [name for name in dirs if name != "__pycache__"]
+        relative_root = Path(root).relative_to(vendor_dir).as_posix()
+        for name in files:
+            relative_path = name if relative_root == "." else f"{relative_root}/{name}"
+            owner = owners.get(relative_path)
+            if name.endswith(".py") and (
+                owner is None or owner.canonical_name not in excluded
+            ):
+                relative_paths.append(relative_path)
+
+    with ProcessPoolExecutor(
+        max_workers=jobs, mp_context=multiprocessing.get_context(_POOL_START_METHOD)
+    ) as executor:
+        results = executor.map(
+            partial(_minify_file, strip_docstrings=strip_docstrings),
+            [str(vendor_dir / path) for path in relative_paths],
+            chunksize=16,
+        )
+        report: Dict[str, Dict[str, int]] = {}
+        updated: Dict[str, List[Tuple[str, str, str]]] = {}
+        for relative_path, (original_size, size, digest, seconds) in zip(
+            relative_paths, results
+        ):
+            owner = owners.get(relative_path)
+            stats = report.setdefault(
+                owner.name if owner else UNOWNED,
+                {"files": 0, "bytes": 0, "milliseconds": 0},
+            )
+            stats["milliseconds"] += round(seconds * 1000)
+            if not digest:
+                continue
+            stats["files"] += 1
+            stats["bytes"] += original_size - size
+            if owner is not None:
+                updated.setdefault(owner.canonical_name, []).append(
+                    (relative_path, digest, str(size))
+                )
+
+    # Keep the hashes and sizes in RECORD accurate
+    for name, rows in updated.items():
+        rewrite_record(
+            distributions[name].dist_info,
+            removed={path for path, _digest, _size in rows},
+            added=rows,
+        )
+
+    return {name: stats for name, stats in report.items() if stats["files"]}
@@ -0,0 +1,255 @@
+"""
+Small scheduler running the steps of a pipeline concurrently.
+
+A pipeline is a DAG of named steps. Every step starts on a thread pool as soon as
+the steps it requires have finished, and receives their results, so independent
+work (e.g. building the toolchain and generating requirements.txt) overlaps.
+
+Steps can be checkpointed: a step with a fingerprint records it, with its result,
+once it succeeds. A later run given the checkpoints skips every step whose
+fingerprint and required results are unchanged, and restarts at the first one that
+changed or never finished.
+"""
+
+import json
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .cache import compute_cache_key
+from .profiling import span
+
+# Bumped when the checkpoint format changes
+CHECKPOINT_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineStopped(Exception):
+    """Raised by a step to end the pipeline early without an error."""
+
+
+class StaleCheckpoint(Exception):
+    """Raised when restoring a step whose recorded result can no longer be used."""
+
+
+@dataclass
+class Step:
+    """
+    A step of a pipeline.
+
+    fingerprint identifies the inputs of the step besides the results it requires,
+    None (or a fingerprint returning None) meaning the step always runs. restore
+    turns a recorded result back into the step's result, raising StaleCheckpoint if
+    what the step produced is gone.
+    """
+
+    name: str
+    run: Callable[[Dict[str, Any]], Any]
+    requires: Tuple[str, ...] = ()
+    fingerprint: Optional[Callable[[Dict[str, Any]], Optional[str]]] = None
+    restore: Optional[Callable[[Any], Any]] = None
+
+
+class Checkpoints:
+    """
+    Checkpoints of the steps of a pipeline, persisted as JSON.
+
+    Results of checkpointed steps must be JSON serializable (paths are recorded as
+    strings). The file is rewritten atomically after every step, so an interrupted
+    run keeps the checkpoints of the steps that finished.
+    """
+
+    def __init__(self, path: Path, resume: bool = True):
+        """
+        Load the checkpoints recorded by previous runs.
+
+        Args:
+            path: File the checkpoints are persisted to
+            resume: Whether to reuse the checkpoints recorded by previous runs
+        """
+        self.path = path
+        self.resumed: List[str] = []
+        self._steps: Dict[str, Dict[str, Any]] = {}
+        if resume:
+            try:
+                with open(path, "r") as f:
+                    state = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                state = {}
+            if isinstance(state, dict) and state.get("version") == CHECKPOINT_VERSION:
+                self._steps = dict(state.get("steps", {}))
+
+    def lookup(self, name: str, fingerprint: str) -> Tuple[bool, Any]:
+        """
+        Find the recorded result of a step.
+
+        Args:
+            name: Name of the step
+            fingerprint: Fingerprint of the step's current inputs
+
+        Returns:
+            Whether the step finished with these inputs, and its recorded result
+        """
+        checkpoint = self._steps.get(name)
+        if checkpoint is None or checkpoint.get("fingerprint") != fingerprint:
+            return False, None
+        return True, checkpoint.get("result")
+
+    def record(self, name: str, fingerprint: str, result: Any) -> None:
+        """
+        Record that a step finished, and persist the checkpoints.
+
+        Args:
+            name: Name of the step
+            fingerprint: Fingerprint of the step's inputs
+            result: Result of the step
+        """
+        self._steps[name] = {
+            "fingerprint": fingerprint,
+            "result": json.loads(json.dumps(result, default=str)),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"version": CHECKPOINT_VERSION, "steps": self._steps},
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+        os.replace(tmp_path, self.path)
+
+
+def _step_fingerprint(step: Step, results: Dict[str, Any]) -> Optional[str]:
+    """Fingerprint a step's inputs, including the results it requires."""
+    if step.fingerprint is None:
+        return None
+    fingerprint = step.fingerprint(results)
+    if fingerprint is None:
+        return None
+    required = json.dumps(
+        {name: results[name] for name in step.requires}, sort_keys=True, default=str
+    )
+    return compute_cache_key(step.name, fingerprint, required)
+
+
+def _run_step(
+    step: Step, results: Dict[str, Any], checkpoints: Optional[Checkpoints]
+) -> Tuple[Any, Optional[str], bool]:
+    """Run a step, or restore it from its checkpoint, and return how it went."""
+    with span(step.name, "step", requires=list(step.requires)):
+        fingerprint = _step_fingerprint(step, results) if checkpoints else None
+        if checkpoints is not None and fingerprint is not None:
+            found, recorded = checkpoints.lookup(step.name, fingerprint)
+            if found:
+                try:
+                    restored = step.restore(recorded) if step.restore else recorded
+                    return restored, fingerprint, True
+                except StaleCheckpoint:
+                    pass
+        return step.run(results), fingerprint, False
+
+
+def _check_steps(steps: List[Step]) -> None:
+    """Ensure the steps form a DAG with unique names and known dependencies."""
+    names = [step.name for step in steps]
+    if len(set(names)) != len(names):
+        raise ValueError("Pipeline step names must be unique")
+
+    remaining = {step.name: set(step.requires) for step in steps}
+    for name, requires in remaining.items():
+        unknown = requires - remaining.keys()
+        if unknown:
+            raise ValueError(f"Step {name} requires unknown steps: {sorted(unknown)}")
+
+    done: Set[str] = set()
+    while remaining:
+        ready = [name for name, requires in remaining.items() if requires <= done]
+        if not ready:
+            raise ValueError(f"Pipeline steps form a cycle: {sorted(remaining)}")
+        for name in ready:
+            done.add(name)
+            del remaining[name]
+
+
+def run_pipeline(
+    steps: List[Step],
+    max_workers: Optional[int] = None,
+    checkpoints: Optional[Checkpoints] = None,
+) -> Dict[str, Any]:
+    """
+    Run the steps of a pipeline, each as soon as its dependencies are done.
+
+    When a step fails or raises PipelineStopped, no further steps are started; steps
+    already running are waited for. Once the pipeline is stopped, the steps still
+    running are no longer needed: their failures are logged as warnings instead of
+    being raised.
+
+    Args:
+        steps: The steps of the pipeline
+        max_workers: Maximum number of steps running at once (defaults to one
+            thread per step)
+        checkpoints: Checkpoints to skip unchanged steps with and to record the
+            finished ones to (defaults to running every step)
+
+    Returns:
+        Results of the steps that ran, by step name
+
+    Raises:
+        ValueError: If the steps do not form a DAG
+        Exception: The error of the first step that failed
+    """
+    _check_steps(steps)
+
+    results: Dict[str, Any] = {}
+    pending = {step.name: step for step in steps}
+    running: Dict[Future, str] = {}
+    error: Optional[BaseException] = None
+    stopped = False
+
+    with ThreadPoolExecutor(max_workers=max_workers or max(len(steps), 1)) as executor:
+        while True:
+            if error is None and not stopped:
+                for name, step in list(pending.items()):
+                    if all(required in results for required in step.requires):
+                        del pending[name]
+                        # Each step sees a snapshot of the results it may depend on
+                        future = executor.submit(
+                            _run_step, step, dict(results), checkpoints
+                        )
+                        running[future] = name
+
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    result, fingerprint, resumed = future.result()
+                except PipelineStopped:
+                    stopped = True
+                    continue
+                except Exception as err:
+                    if stopped:
+                        logger.warning(
+                            "Step %s failed after the pipeline stopped: %s", name, err
+                        )
+                    elif error is None:
+                        error = err
+                    continue
+
+                results[name] = result
+                if checkpoints is not None and fingerprint is not None:
+                    if resumed:
+                        checkpoints.resumed.append(name)
+                    else:
+                        checkpoints.record(name, fingerprint, result)
+
+    if error is not None:
+        raise error
+    return results
@@ -0,0 +1,322 @@
+"""
+Timing of vendorpy's steps and subprocesses, for ``--profile``.
+
+While profiling, every pipeline step, post-install stage and subprocess is recorded
+as a span with its wall-clock time, CPU time and, for subprocesses, the peak RSS
+of the child (including the children it waited for). Steps and stages are charged
+the CPU time of their own thread plus that of the subprocesses they ran, and the
+largest RSS among those.
+
+The spans are summarized in a table, and can be exported as a Chrome trace (the
+JSON format read by ``chrome://tracing`` and https://ui.perfetto.dev) to see which
+steps overlapped and which ones made up the critical path.
+
+All subprocesses go through run_command. When profiling is off it is a plain
+``subprocess.run``.
+"""
+
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows has no resource
+    resource = None  # type: ignore[assignment]
+
+# Kinds of spans, from the outermost
+SPAN_CATEGORIES = ("step", "stage", "subprocess")
+
+# ru_maxrss is in bytes on macOS and in KiB elsewhere
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+@dataclass
+class Span:
+    """A timed step, stage or subprocess, in seconds since profiling started."""
+
+    name: str
+    category: str
+    start: float
+    thread: int
+    depth: int
+    end: float = 0.0
+    cpu: float = 0.0
+    rss: int = 0
+    args: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def wall(self) -> float:
+        """Wall-clock duration of the span."""
+        return self.end - self.start
+
+
+class Profiler:
+    """Collector of the spans of one vendorpy run."""
+
+    def __init__(self) -> None:
+        """Start the clock spans are measured against."""
+        self.origin = time.perf_counter()
+        self.spans: List[Span] = []
+        self.threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> List[Span]:
+        """Get the spans open on the current thread, innermost last."""
+        stack: Optional[List[Span]] = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextlib.contextmanager
+    def span(self, name: str, category: str, **args: Any) -> Iterator[Span]:
+        """
+        Time a block, charging its CPU time and peak RSS to the enclosing span.
+
+        Args:
+            name: Name of the span
+            category: Kind of span, see SPAN_CATEGORIES
+            args: Details shown with the span in the trace
+
+        Yields:
+            The span, whose cpu and rss the block may add to
+        """
+        thread = threading.current_thread()
+        stack = self._stack()
+        record = Span(
+            name,
+            category,
+            start=time.perf_counter() - self.origin,
+            thread=thread.ident or 0,
+            depth=len(stack),
+            args=dict(args),
+        )
+        with self._lock:
+            self.threads.setdefault(record.thread, thread.name)
+            self.spans.append(record)
+        stack.append(record)
+        cpu_start = time.thread_time()
+        try:
+            yield record
+        finally:
+            thread_cpu = time.thread_time() - cpu_start
+            record.end = time.perf_counter() - self.origin
+            stack.pop()
+            if stack:
+                # The enclosing span runs on this thread too, so it only lacks the
+                # CPU time of the subprocesses
+                stack[-1].cpu += record.cpu
+                stack[-1].rss = max(stack[-1].rss, record.rss)
+            record.cpu += thread_cpu
+
+    def critical_path(self) -> List[str]:
+        """
+        Find the chain of pipeline steps that determined the total run time.
+
+        Starting from the step that finished last, each step is preceded by the step
+        it required that finished last.
+
+        Returns:
+            Names of the steps on the critical path, in execution order
+        """
+        steps = {span.name: span for span in self.spans if span.category == "step"}
+        if not steps:
+            return []
+        current: Optional[Span] = max(steps.values(), key=lambda span: span.end)
+        path: List[str] = []
+        while current is not None:
+            path.append(current.name)
+            required = [
+                steps[name]
+                for name in current.args.get("requires", ())
+                if name in steps
+            ]
+            current = max(required, key=lambda span: span.end) if required else None
+        return path[::-1]
+
+    def to_trace(self) -> Dict[str, Any]:
+        """
+        Convert the spans to the Chrome trace event format.
+
+        Returns:
+            The trace, as JSON serializable data
+        """
+        pid = os.getpid()
+        tids = {thread: index for index, thread in enumerate(self.threads, 1)}
+        events: List[Dict[str, Any]] = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tids[thread],
+                "args": {"name": name},
+            }
+            for thread, name in self.threads.items()
+        ]
+        for span in self.spans:
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": round(span.start * 1e6),
+                    "dur": round(span.wall * 1e6),
+                    "pid": pid,
+                    "tid": tids[span.thread],
+                    "args": {
+                        **span.args,
+                        "cpu_ms": round(span.cpu * 1e3, 3),
+                        "peak_rss": span.rss,
+                    },
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_trace(self, path: Path) -> None:
+        """
+        Write the spans as a Chrome trace JSON file.
+
+        Args:
+            path: Where to write the trace
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_trace(), f)
+
+
+_active: Optional[Profiler] = None
+
+
+def start_profiling() -> Profiler:
+    """
+    Start recording spans.
+
+    Returns:
+        The profiler recording them
+    """
+    global _active
+    _active = Profiler()
+    return _active
+
+
+def stop_profiling() -> None:
+    """Stop recording spans."""
+    global _active
+    _active = None
+
+
+@contextlib.contextmanager
+def span(name: str, category: str = "stage", **args: Any) -> Iterator[None]:
+    """
+    Time a block if profiling, see Profiler.span.
+
+    Args:
+        name: Name of the span
+        category: Kind of span, see SPAN_CATEGORIES
+        args: Details shown with the span in the trace
+    """
+    profiler = _active
+    if profiler is None:
+        yield
+        return
+    with profiler.span(name, category, **args):
+        yield
+
+
+def _command_label(cmd: Sequence[str]) -> str:
+    """Name a command by its program and up to two arguments, e.g. "uv pip install"."""
+    label = [Path(cmd[0]).name]
+    for arg in cmd[1:3]:
+        # Paths and inline scripts only make the label longer
+        if os.sep in arg or any(char.isspace() for char in arg):
+            break
+        label.append(arg)
+    return " ".join(label)
+
+
+def _run_with_usage(
+    cmd: Sequence[str],
+    capture_output: bool = False,
+    text: bool = False,
+    **kwargs: Any,
+) -> Tuple[subprocess.CompletedProcess, Any]:
+    """Run a command, reaping it with wait4 to get the resources it used."""
+    with tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+        if capture_output:
+            kwargs.update(stdout=stdout, stderr=stderr)
+        process = subprocess.Popen(cmd, **kwargs)
+        try:
+            _pid, status, usage = os.wait4(process.pid, 0)
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+        process.returncode = os.waitstatus_to_exitcode(status)
+
+        output: Any = None
+        errors: Any = None
+        if capture_output:
+            stdout.seek(0)
+            stderr.seek(0)
+            output, errors = stdout.read(), stderr.read()
+            if text:
+                output, errors = output.decode(), errors.decode()
+
+    return subprocess.CompletedProcess(cmd, process.returncode, output, errors), usage
+
+
+def run_command(cmd: Sequence[str], **kwargs: Any) -> subprocess.CompletedProcess:
+    """
+    Run a command like ``subprocess.run``, recording it as a span if profiling.
+
+    Args:
+        cmd: The command and its arguments
+        kwargs: Arguments of subprocess.run (check, capture_output, text, cwd, env)
+
+    Returns:
+        The completed process
+
+    Raises:
+        subprocess.CalledProcessError: If check is set and the command fails
+        FileNotFoundError: If the program does not exist
+    """
+    profiler = _active
+    if profiler is None or resource is None or not hasattr(os, "wait4"):
+        with span(_command_label(cmd), "subprocess", command=list(cmd)):
+            return subprocess.run(cmd, check=kwargs.pop("check", False), **kwargs)
+
+    check = kwargs.pop("check", False)
+    with profiler.span(_command_label(cmd), "subprocess", command=list(cmd)) as record:
+        completed, usage = _run_with_usage(cmd, **kwargs)
+        record.cpu += usage.ru_utime + usage.ru_stime
+        record.rss = usage.ru_maxrss * _MAXRSS_UNIT
+        record.args["returncode"] = completed.returncode
+    if check:
+        completed.check_returncode()
+    return completed
+
+
+def process_usage() -> Optional[Dict[str, float]]:
+    """
+    Get the resources used by vendorpy itself so far.
+
+    Returns:
+        Dictionary with the "cpu" seconds and "peak_rss" bytes of this process, or
+        None where they cannot be measured
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return {
+        "cpu": usage.ru_utime + usage.ru_stime,
+        "peak_rss": usage.ru_maxrss * _MAXRSS_UNIT,
+    }
@@ -0,0 +1,350 @@
+"""
+Post-install pruning of files the Workers runtime never uses.
+
+``pip install -t`` leaves tests, bytecode caches, type stubs, C sources and other
+build leftovers in the vendor directory, and all of them are uploaded with the
+Worker. A prune profile lists glob patterns of files to drop (and to keep anyway),
+globally and per distribution; the vendor directory is walked once after
+installation and every matching file is removed.
+
+Patterns use ``/`` separators and are matched against paths relative to the vendor
+directory. ``*`` and ``?`` do not cross directories, ``**`` does. As in
+``.gitignore``, a pattern without a ``/`` matches a file or directory name at any
+depth, and a pattern matching a directory matches everything below it.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Pattern, Set, Tuple
+
+import tomli
+
+from .distributions import (
+    UNOWNED,
+    InstalledDistribution,
+    canonicalize_name,
+    find_installed_distributions,
+    rewrite_record,
+)
+from .utils import DEFAULT_PYPROJECT
+
+# Files never pruned, since vendorpy reads them to diff the vendor directory
+PROTECTED_FILES = ("*.dist-info/METADATA", "*.dist-info/RECORD")
+
+
+@dataclass(frozen=True)
+class PruneRules:
+    """Glob patterns of files to drop, and of files to keep even if dropped."""
+
+    drop: Tuple[str, ...] = ()
+    keep: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class PruneProfile:
+    """A named set of prune rules, with extra rules per distribution."""
+
+    name: str
+    rules: PruneRules = PruneRules()
+    packages: Mapping[str, PruneRules] = field(default_factory=dict)
+
+
+SAFE_PROFILE = PruneProfile(
+    "safe",
+    PruneRules(
+        drop=(
+            "__pycache__",
+            "*.pyc",
+            "*.pyo",
+            "*.pyi",
+            "py.typed",
+            "*.c",
+            "*.cc",
+            "*.cpp",
+            "*.h",
+            "*.hpp",
+            "*.pyx",
+            "*.pxd",
+            "*.pxi",
+            "*.dist-info/INSTALLER",
+            "*.dist-info/REQUESTED",
+            "*.dist-info/direct_url.json",
+        )
+    ),
+)
+
+AGGRESSIVE_PROFILE = PruneProfile(
+    "aggressive",
+    PruneRules(
+        drop=SAFE_PROFILE.rules.drop
+        + (
+            "tests",
+            "test",
+            "conftest.py",
+            "docs",
+            "doc",
+            "examples",
+            "benchmarks",
+            "*.md",
+            "*.rst",
+        )
+    ),
+)
+
+BUILT_IN_PROFILES = {
+    profile.name: profile for profile in (SAFE_PROFILE, AGGRESSIVE_PROFILE)
+}
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """Translate a prune glob pattern into a regular expression."""
+    pattern = pattern.strip("/")
+    anchored = "/" in pattern
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    prefix = "" if anchored else "(?:.*/)?"
+    # Matching a directory matches everything below it
+    return f"{prefix}{''.join(parts)}(?:/.*)?"
+
+
+def compile_globs(patterns: Tuple[str, ...]) -> Optional[Pattern[str]]:
+    """
+    Compile glob patterns into a single regular expression.
+
+    Args:
+        patterns: Prune glob patterns
+
+    Returns:
+        A regular expression fully matching the paths any pattern matches, or None
+        if there are no patterns
+    """
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{_glob_to_regex(p)})" for p in patterns))
+
+
+def _parse_rules(table: Mapping[str, Any], where: str) -> PruneRules:
+    """Parse the drop/keep lists of a profile table from pyproject.toml."""
+    rules = {}
+    for key in ("drop", "keep"):
+        patterns = table.get(key, [])
+        if not isinstance(patterns, list) or not all(
+            isinstance(p, str) for p in patterns
+        ):
+            raise ValueError(f"{where}.{key} must be a list of glob patterns")
+        rules[key] = tuple(patterns)
+    return PruneRules(**rules)
+
+
+def load_prune_profiles(
+    pyproject: Path = DEFAULT_PYPROJECT,
+) -> Tuple[Dict[str, PruneProfile], Optional[str]]:
+    """
+    Load the prune profiles available to a project.
+
+    Profiles are defined in pyproject.toml, and may extend another profile:
+
+        [tool.vendorpy.prune]
+        profile = "slim"  # used when --prune is not given
+
+        [tool.vendorpy.prune.profiles.slim]
+        extends = "safe"
+        drop = ["tests", "*.md"]
+
+        [tool.vendorpy.prune.profiles.slim.packages.numpy]
+        keep = ["numpy/testing"]
+
+    Args:
+        pyproject: Path to the project's pyproject.toml
+
+    Returns:
+        The built-in and project profiles by name, and the project's default profile
+
+    Raises:
+        ValueError: If the configuration is invalid
+    """
+    try:
+        with open(pyproject, "rb") as f:
+            config = tomli.load(f).get("tool", {}).get("vendorpy", {}).get("prune", {})
+    except FileNotFoundError:
+        config = {}
+    except (OSError, tomli.TOMLDecodeError) as err:
+        raise ValueError(f"Failed to read {pyproject}: {err}") from err
+
+    tables = config.get("profiles", {})
+    profiles: Dict[str, PruneProfile] = dict(BUILT_IN_PROFILES)
+    resolving: List[str] = []
+
+    def resolve(name: str, built_in: bool = False) -> PruneProfile:
+        if built_in or name not in tables:
+            if name in BUILT_IN_PROFILES:
+                return BUILT_IN_PROFILES[name]
+            raise ValueError(f"Unknown prune profile: {name}")
+        if name in resolving:
+            raise ValueError(f"Prune profiles extend each other: {resolving}")
+        resolving.append(name)
+
+        table = tables[name]
+        where = f"tool.vendorpy.prune.profiles.{name}"
+        extends = table.get("extends")
+        # A project profile may extend the built-in profile it overrides
+        base = (
+            resolve(extends, built_in=extends == name)
+            if extends
+            else PruneProfile(name)
+        )
+        rules = _parse_rules(table, where)
+        packages = dict(base.packages)
+        for package, package_table in table.get("packages", {}).items():
+            package_rules = _parse_rules(package_table, f"{where}.packages.{package}")
+            inherited = packages.get(canonicalize_name(package), PruneRules())
+            packages[canonicalize_name(package)] = PruneRules(
+                inherited.drop + package_rules.drop,
+                inherited.keep + package_rules.keep,
+            )
+
+        resolving.pop()
+        return PruneProfile(
+            name,
+            PruneRules(base.rules.drop + rules.drop, base.rules.keep + rules.keep),
+            packages,
+        )
+
+    for name in tables:
+        profiles[name] = resolve(name)
+
+    default = config.get("profile")
+    if default is not None and default not in profiles:
+        raise ValueError(f"Unknown prune profile: {default}")
+    return profiles, default
+
+
+def remove_vendor_files(
+    vendor_dir: Path,
+    relative_paths: Iterable[str],
+    distributions: Optional[Dict[str, InstalledDistribution]] = None,
+) -> Dict[str, Dict[str, int]]:
+    """
+    Remove files from a vendor directory, keeping the RECORD files consistent.
+
+    Removed files are dropped from the RECORD of the distribution owning them, and
+    directories left empty are removed.
+
+    Args:
+        vendor_dir: Directory the packages were installed into
+        relative_paths: Paths of the files to remove, relative to vendor_dir
+        distributions: The distributions installed in vendor_dir, if already read
+
+    Returns:
+        Dictionary mapping distribution names (UNOWNED for files no RECORD lists) to
+        the "files" removed and "bytes" saved; untouched distributions are omitted
+    """
+    if distributions is None:
+        distributions = find_installed_distributions(vendor_dir)
+    owners = {path: dist for dist in distributions.values() for path in dist.files}
+
+    report: Dict[str, Dict[str, int]] = {}
+    removed_by_dist: Dict[str, Set[str]] = {}
+    directories = set()
+
+    for relative_path in relative_paths:
+        path = vendor_dir / relative_path
+        try:
+            size = path.lstat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        directories.add(path.parent)
+
+        owner = owners.get(relative_path)
+        stats = report.setdefault(
+            owner.name if owner else UNOWNED, {"files": 0, "bytes": 0}
+        )
+        stats["files"] += 1
+        stats["bytes"] += size
+        if owner is not None:
+            removed_by_dist.setdefault(owner.canonical_name, set()).add(relative_path)
+
+    for name, removed in removed_by_dist.items():
+        rewrite_record(distributions[name].dist_info, removed=removed)
+
+    # Remove directories left empty, deepest first
+    root = vendor_dir.resolve()
+    for directory in sorted(directories, key=lambda p: len(p.parts), reverse=True):
+        directory = directory.resolve()
+        while directory != root and root in directory.parents:
+            try:
+                directory.rmdir()
+            except OSError:
+                break
+            directory = directory.parent
+
+    return report
+
+
+def prune_vendor_dir(
+    vendor_dir: Path, profile: PruneProfile
+) -> Dict[str, Dict[str, int]]:
+    """
+    Remove the files a prune profile drops from a vendor directory.
+
+    Args:
+        vendor_dir: Directory the packages were installed into
+        profile: The prune profile to apply
+
+    Returns:
+        Files removed and bytes saved per distribution, see remove_vendor_files
+    """
+    distributions = find_installed_distributions(vendor_dir)
+    owners = {path: dist for dist in distributions.values() for path in dist.files}
+
+    protected = compile_globs(PROTECTED_FILES)
+    drop = compile_globs(profile.rules.drop)
+    keep = compile_globs(profile.rules.keep)
+    package_matchers = {
+        name: (compile_globs(rules.drop), compile_globs(rules.keep))
+        for name, rules in profile.packages.items()
+    }
+
+    dropped_paths = []
+    for root, _dirs, files in os.walk(vendor_dir):
+        relative_root = Path(root).relative_to(vendor_dir).as_posix()
+        for name in files:
+            relative_path = name if relative_root == "." else f"{relative_root}/{name}"
+            if protected is not None and protected.fullmatch(relative_path):
+                continue
+
+            owner = owners.get(relative_path)
+            package_drop, package_keep = package_matchers.get(
+                owner.canonical_name if owner else "", (None, None)
+            )
+            dropped = (drop is not None and drop.fullmatch(relative_path)) or (
+                package_drop is not None and package_drop.fullmatch(relative_path)
+            )
+            if not dropped:
+                continue
+            if (keep is not None and keep.fullmatch(relative_path)) or (
+                package_keep is not None and package_keep.fullmatch(relative_path)
+            ):
+                continue
+            dropped_paths.append(relative_path)
+
+    return remove_vendor_files(vendor_dir, dropped_paths, distributions)
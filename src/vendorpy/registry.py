@@ -0,0 +1,249 @@
+"""
+Registry of the packages built into the Cloudflare Workers Python runtime.
+
+Package names are indexed by their PEP 503 normalized form once, when the registry
+is first used, so membership checks and display-name lookups are dictionary lookups
+no matter how a name is spelled (``PyYAML``, ``pyyaml``, ``zope.interface``, ...).
+
+Besides the hard-coded default, a registry can be generated from the
+``pyodide-lock.json`` of the Pyodide release a Worker runs on. The lock file is
+compiled once into a compact index kept in the vendorpy cache, next to the
+toolchains, and only read when the registry is first queried.
+"""
+
+import hashlib
+import json
+import os
+from datetime import date
+from functools import cached_property
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from .cache import (
+    commit_entry,
+    compute_cache_key,
+    discard_entry,
+    entry_lock,
+    get_entry_path,
+    lookup_entry,
+)
+from .distributions import canonicalize_name
+
+# Cache namespace holding registries compiled from pyodide-lock.json files
+REGISTRY_CACHE_NAMESPACE = "registries"
+
+# Name of the compiled index inside a registry cache entry
+REGISTRY_INDEX_FILE = "index.json"
+
+# Bumped whenever the layout of the compiled index changes
+REGISTRY_INDEX_FORMAT = 1
+
+
+class BuiltInRegistry:
+    """An immutable, PEP 503 indexed set of built-in packages."""
+
+    def __init__(
+        self,
+        packages: Iterable[str] = (),
+        versions: Optional[Mapping[str, str]] = None,
+        index_path: Optional[Path] = None,
+    ):
+        """
+        Create a registry of built-in packages.
+
+        Args:
+            packages: Display names of the built-in packages
+            versions: Versions of the built-in packages, by display name
+            index_path: Compiled index to load the packages from instead, on first use
+        """
+        self._packages = list(packages)
+        self._versions = dict(versions or {})
+        self._index_path = index_path
+
+    @cached_property
+    def _entries(self) -> Mapping[str, Tuple[str, Optional[str]]]:
+        """Canonical name -> (display name, version) of every built-in package."""
+        entries: Dict[str, Tuple[str, Optional[str]]] = {}
+        if self._index_path is not None:
+            with open(self._index_path, "r") as f:
+                for canonical, (name, version) in json.load(f)["packages"].items():
+                    entries[canonical] = (name, version)
+        else:
+            for name in self._packages:
+                # The first spelling of a package wins
+                entries.setdefault(
+                    canonicalize_name(name), (name, self._versions.get(name))
+                )
+        return MappingProxyType(entries)
+
+    def __contains__(self, name: object) -> bool:
+        """Check whether a package, spelled in any PEP 503 equivalent way, is built in."""
+        return isinstance(name, str) and canonicalize_name(name) in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the display names of the built-in packages."""
+        return (name for name, _version in self._entries.values())
+
+    def __len__(self) -> int:
+        """Number of built-in packages."""
+        return len(self._entries)
+
+    def get(self, name: str) -> Optional[str]:
+        """
+        Look up the display name of a built-in package.
+
+        Args:
+            name: Package name in any PEP 503 equivalent spelling
+
+        Returns:
+            The name the package is listed under, or None if it is not built in
+        """
+        entry = self._entries.get(canonicalize_name(name))
+        return entry[0] if entry else None
+
+    def get_version(self, name: str) -> Optional[str]:
+        """
+        Look up the version of a built-in package.
+
+        Args:
+            name: Package name in any PEP 503 equivalent spelling
+
+        Returns:
+            The version the runtime ships, or None if unknown or not built in
+        """
+        entry = self._entries.get(canonicalize_name(name))
+        return entry[1] if entry else None
+
+    @property
+    def names(self) -> List[str]:
+        """The display names of the built-in packages, sorted."""
+        return sorted(self)
+
+    @property
+    def version(self) -> str:
+        """A digest identifying the built-in packages and their versions."""
+        return compute_cache_key(
+            *(
+                f"{canonical}=={version or ''}"
+                for canonical, (_name, version) in sorted(self._entries.items())
+            )
+        )
+
+
+def compile_pyodide_lock(lock_path: Path) -> Path:
+    """
+    Compile a pyodide-lock.json file into a registry index kept in the cache.
+
+    The index is keyed by the content of the lock file, so each Pyodide release is
+    only compiled once across runs and projects.
+
+    Args:
+        lock_path: Path to the pyodide-lock.json file
+
+    Returns:
+        Path of the compiled index
+
+    Raises:
+        RuntimeError: If the lock file cannot be read or is not a pyodide-lock.json
+    """
+    try:
+        with open(lock_path, "rb") as f:
+            content = f.read()
+    except OSError as err:
+        raise RuntimeError(f"Failed to read {lock_path}: {err}") from err
+
+    key = compute_cache_key(
+        str(REGISTRY_INDEX_FORMAT), hashlib.sha256(content).hexdigest()
+    )
+    entry_path = lookup_entry(REGISTRY_CACHE_NAMESPACE, key)
+    if entry_path is not None:
+        return entry_path / REGISTRY_INDEX_FILE
+
+    try:
+        lock = json.loads(content)
+        packages = {
+            canonicalize_name(info.get("name", name)): [
+                info.get("name", name),
+                info.get("version"),
+            ]
+            for name, info in lock["packages"].items()
+        }
+    except (ValueError, KeyError, TypeError, AttributeError) as err:
+        raise RuntimeError(f"Invalid pyodide-lock.json file: {lock_path}") from err
+    pyodide_version = lock.get("info", {}).get("version")
+
+    with entry_lock(REGISTRY_CACHE_NAMESPACE, key):
+        entry_path = get_entry_path(REGISTRY_CACHE_NAMESPACE, key)
+        discard_entry(entry_path)
+        entry_path.mkdir(parents=True)
+        tmp_path = entry_path / f"{REGISTRY_INDEX_FILE}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "format": REGISTRY_INDEX_FORMAT,
+                    "pyodide_version": pyodide_version,
+                    "packages": packages,
+                },
+                f,
+                separators=(",", ":"),
+                sort_keys=True,
+            )
+        os.replace(tmp_path, entry_path / REGISTRY_INDEX_FILE)
+        commit_entry(
+            REGISTRY_CACHE_NAMESPACE,
+            key,
+            {"pyodide_version": pyodide_version, "source": str(lock_path)},
+        )
+
+    return entry_path / REGISTRY_INDEX_FILE
+
+
+def select_pyodide_lock(
+    path: Path, compatibility_date: Optional[str] = None
+) -> Optional[Path]:
+    """
+    Select the pyodide-lock.json matching a Workers compatibility date.
+
+    Args:
+        path: A pyodide-lock.json file, or a directory of lock files named after
+            the compatibility date they apply from (e.g. ``2025-01-16.json``)
+        compatibility_date: Compatibility date of the Worker (YYYY-MM-DD), the
+            newest lock file is used if not given
+
+    Returns:
+        The lock file to use, or None if no lock file applies to the date
+
+    Raises:
+        ValueError: If the compatibility date is not a valid date
+    """
+    if not path.is_dir():
+        return path
+
+    cutoff = date.fromisoformat(compatibility_date) if compatibility_date else None
+    candidates = []
+    for lock_path in path.glob("*.json"):
+        try:
+            since = date.fromisoformat(lock_path.stem)
+        except ValueError:
+            continue
+        if cutoff is None or since <= cutoff:
+            candidates.append((since, lock_path))
+
+    return max(candidates)[1] if candidates else None
+
+
+def load_pyodide_lock_registry(lock_path: Path) -> BuiltInRegistry:
+    """
+    Load the registry of built-in packages described by a pyodide-lock.json file.
+
+    Args:
+        lock_path: Path to the pyodide-lock.json file
+
+    Returns:
+        A registry reading the compiled index on first use
+
+    Raises:
+        RuntimeError: If the lock file cannot be compiled
+    """
+    return BuiltInRegistry(index_path=compile_pyodide_lock(lock_path))
@@ -0,0 +1,102 @@
+"""
+Size accounting for the vendor directory.
+
+Every file of the vendor directory is attributed to the distribution whose RECORD
+lists it, and counted both raw and compressed (Workers limits apply to the
+compressed upload). Files are read and compressed on a thread pool, since zlib
+releases the GIL while compressing.
+"""
+
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import tomli
+
+from .cache import parse_size
+from .distributions import UNOWNED, find_installed_distributions
+from .utils import DEFAULT_PYPROJECT
+
+# Compression level approximating what wrangler uses for the upload
+COMPRESSION_LEVEL = 6
+
+
+def _measure_file(path: str) -> Tuple[int, int]:
+    """Return the raw and compressed size of a file."""
+    with open(path, "rb") as f:
+        content = f.read()
+    return len(content), len(zlib.compress(content, COMPRESSION_LEVEL))
+
+
+def measure_vendor_dir(
+    vendor_dir: Path, max_workers: Optional[int] = None
+) -> Dict[str, Dict[str, int]]:
+    """
+    Measure the size of a vendor directory per distribution.
+
+    Args:
+        vendor_dir: Directory the packages were installed into
+        max_workers: Number of files measured at once (defaults to the CPU count)
+
+    Returns:
+        Dictionary mapping distribution names (UNOWNED for files no RECORD lists) to
+        their number of "files", raw "bytes" and "compressed" bytes
+    """
+    distributions = find_installed_distributions(vendor_dir)
+    owners = {path: dist.name for dist in distributions.values() for path in dist.files}
+
+    paths: List[str] = []
+    names: List[str] = []
+    for root, _dirs, files in os.walk(vendor_dir):
+        relative_root = Path(root).relative_to(vendor_dir).as_posix()
+        for name in files:
+            relative_path = name if relative_root == "." else f"{relative_root}/{name}"
+            paths.append(os.path.join(root, name))
+            names.append(owners.get(relative_path, UNOWNED))
+
+    report: Dict[str, Dict[str, int]] = {
+        dist.name: {"files": 0, "bytes": 0, "compressed": 0}
+        for dist in distributions.values()
+    }
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        for name, (raw, compressed) in zip(names, executor.map(_measure_file, paths)):
+            stats = report.setdefault(name, {"files": 0, "bytes": 0, "compressed": 0})
+            stats["files"] += 1
+            stats["bytes"] += raw
+            stats["compressed"] += compressed
+
+    return report
+
+
+def load_size_budget(pyproject: Path = DEFAULT_PYPROJECT) -> Optional[int]:
+    """
+    Read the size budget of the vendor directory from pyproject.toml.
+
+    The budget caps the compressed size, e.g. the Workers script size limit:
+
+        [tool.vendorpy.size]
+        budget = "3M"
+
+    Args:
+        pyproject: Path to the project's pyproject.toml
+
+    Returns:
+        The budget in bytes, or None if none is configured
+
+    Raises:
+        ValueError: If the configuration is invalid
+    """
+    try:
+        with open(pyproject, "rb") as f:
+            config = tomli.load(f).get("tool", {}).get("vendorpy", {}).get("size", {})
+    except FileNotFoundError:
+        return None
+    except (OSError, tomli.TOMLDecodeError) as err:
+        raise ValueError(f"Failed to read {pyproject}: {err}") from err
+
+    budget = config.get("budget")
+    if budget is None:
+        return None
+    return budget if isinstance(budget, int) else parse_size(str(budget))
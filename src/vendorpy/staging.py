@@ -0,0 +1,227 @@
+"""
+Staged updates of the vendor directory.
+
+Vendoring never writes into the vendor directory itself. The new tree is built in a
+staging directory, seeded with hardlinks to the current files so incremental
+installs still only touch what changed, and swapped in once every stage succeeded.
+A failed run only leaves a staging directory behind, which the next run discards,
+and ``wrangler dev`` never sees a partially written tree.
+
+On Linux, the swap atomically exchanges the two directories with ``renameat2``;
+elsewhere the vendor directory is briefly missing between two renames. The previous
+tree is kept, so a bad update can be rolled back instantly. Files that belong to
+the tree but live next to the vendor directory (the ``--bundle`` archive and its
+loader) are built next to the staging directory, and swapped and kept with it.
+
+Files of the vendor directory are shared with the staging directory (and the wheel
+store), so they must never be written in place: vendorpy always writes a temporary
+file and renames it over the original.
+"""
+
+import contextlib
+import ctypes
+import errno
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .cache import compute_cache_key
+from .utils import STATE_DIR
+
+# renameat2 arguments, from <fcntl.h> and <linux/fs.h>
+_AT_FDCWD = -100
+_RENAME_EXCHANGE = 2
+
+# Names of the files kept with the previous tree, in its work directory
+_EXTRA_FILES_LIST = "extra-files"
+
+
+def _work_dir(vendor_dir: Path) -> Path:
+    """Get the directory holding the staging and previous trees of a vendor dir."""
+    state_dir = STATE_DIR.resolve()
+    key = compute_cache_key(str(vendor_dir.resolve()))
+    vendor_dir.parent.mkdir(parents=True, exist_ok=True)
+    # Directories can only be renamed within a filesystem
+    anchor = state_dir if state_dir.exists() else state_dir.parent
+    if os.stat(anchor).st_dev == os.stat(vendor_dir.parent).st_dev:
+        return state_dir / "vendor-dirs" / key
+    return vendor_dir.parent / f".{vendor_dir.name}.vendorpy"
+
+
+def staging_path(vendor_dir: Path) -> Path:
+    """
+    Get the directory a vendor directory's next tree is built in.
+
+    It has the same name as the vendor directory, so names derived from it (e.g.
+    archive members) are the final ones.
+
+    Args:
+        vendor_dir: Directory the packages are vendored to
+
+    Returns:
+        Path of the staging directory
+    """
+    return _work_dir(vendor_dir) / "staging" / vendor_dir.name
+
+
+def previous_path(vendor_dir: Path) -> Path:
+    """
+    Get the directory the tree a vendor directory replaced is kept in.
+
+    Args:
+        vendor_dir: Directory the packages are vendored to
+
+    Returns:
+        Path of the previous tree
+    """
+    return _work_dir(vendor_dir) / "previous" / vendor_dir.name
+
+
+def _exchange(first: Path, second: Path) -> bool:
+    """Atomically exchange two paths, if the platform and filesystem allow it."""
+    if not sys.platform.startswith("linux"):
+        return False
+    libc = ctypes.CDLL(None, use_errno=True)
+    renameat2 = getattr(libc, "renameat2", None)
+    if renameat2 is None:
+        return False
+    if renameat2(
+        _AT_FDCWD, os.fsencode(first), _AT_FDCWD, os.fsencode(second), _RENAME_EXCHANGE
+    ):
+        code = ctypes.get_errno()
+        if code in (errno.EINVAL, errno.ENOSYS):
+            # The filesystem does not support exchanging
+            return False
+        raise OSError(code, os.strerror(code), str(first), None, str(second))
+    return True
+
+
+def _swap_back(kept: Path, live: Path) -> None:
+    """Exchange a kept path with the live one, either of which may be missing."""
+    if not kept.exists():
+        if live.exists():
+            os.replace(live, kept)
+    elif not live.exists():
+        os.replace(kept, live)
+    elif not _exchange(kept, live):
+        current = kept.with_name(f"{kept.name}.current")
+        os.replace(live, current)
+        os.replace(kept, live)
+        os.replace(current, kept)
+
+
+def swap_in(new_dir: Path, vendor_dir: Path, extra_files: Iterable[str] = ()) -> None:
+    """
+    Replace a vendor directory with a new tree, keeping the current one.
+
+    Args:
+        new_dir: The new tree, on the same filesystem as vendor_dir
+        vendor_dir: Directory the packages are vendored to
+        extra_files: Names of files next to new_dir that replace the files of the
+            same name next to vendor_dir (a missing one removes the current file)
+    """
+    previous = previous_path(vendor_dir)
+    if previous.parent.exists():
+        shutil.rmtree(previous.parent)
+    previous.parent.mkdir(parents=True)
+
+    if not vendor_dir.exists():
+        os.replace(new_dir, vendor_dir)
+    elif _exchange(new_dir, vendor_dir):
+        # new_dir now holds the tree that was replaced
+        os.replace(new_dir, previous)
+    else:
+        os.replace(vendor_dir, previous)
+        os.replace(new_dir, vendor_dir)
+
+    names = sorted(set(extra_files))
+    for name in names:
+        live = vendor_dir.parent / name
+        if live.exists():
+            os.replace(live, previous.parent / name)
+        staged = new_dir.parent / name
+        if staged.exists():
+            os.replace(staged, live)
+    # Recorded so a rollback knows which files to restore, or remove
+    (previous.parent / _EXTRA_FILES_LIST).write_text("".join(f"{n}\n" for n in names))
+
+
+def _link_or_copy(source: str, destination: str) -> None:
+    """Hardlink a file, or copy it where hardlinks are not supported."""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+@contextlib.contextmanager
+def staged_vendor_dir(
+    vendor_dir: Path, extra_files: Iterable[str] = (), seed: bool = True
+) -> Iterator[Path]:
+    """
+    Build the next tree of a vendor directory in a staging directory.
+
+    The staging directory starts as a copy of the vendor directory (made of
+    hardlinks, without the cached bytecode, which may not match the sources the
+    block leaves) if seed is set, and empty otherwise. It replaces the vendor
+    directory when the block succeeds, and is discarded when the block raises.
+
+    Args:
+        vendor_dir: Directory the packages are vendored to
+        extra_files: Names of files the block writes next to the staging directory,
+            which replace the files of the same name next to vendor_dir with it
+        seed: Start from the current tree, for installers that update it in place
+
+    Yields:
+        Path of the staging directory
+    """
+    staging = staging_path(vendor_dir)
+    # Left behind by an interrupted run
+    if staging.parent.exists():
+        shutil.rmtree(staging.parent)
+    staging.parent.mkdir(parents=True)
+    if seed and vendor_dir.is_dir():
+        shutil.copytree(
+            vendor_dir,
+            staging,
+            symlinks=True,
+            ignore=shutil.ignore_patterns("__pycache__"),
+            copy_function=_link_or_copy,
+        )
+    else:
+        staging.mkdir()
+
+    try:
+        yield staging
+    except BaseException:
+        shutil.rmtree(staging.parent, ignore_errors=True)
+        raise
+    swap_in(staging, vendor_dir, extra_files)
+    shutil.rmtree(staging.parent, ignore_errors=True)
+
+
+def rollback_vendor_dir(vendor_dir: Path) -> bool:
+    """
+    Restore the tree a vendor directory replaced, and the files kept with it.
+
+    The current tree becomes the previous one, so rolling back twice undoes the
+    rollback.
+
+    Args:
+        vendor_dir: Directory the packages are vendored to
+
+    Returns:
+        Whether there was a previous tree to restore
+    """
+    previous = previous_path(vendor_dir)
+    if not previous.is_dir():
+        return False
+    _swap_back(previous, vendor_dir)
+
+    extra_files = previous.parent / _EXTRA_FILES_LIST
+    if extra_files.is_file():
+        for name in extra_files.read_text().splitlines():
+            _swap_back(previous.parent / name, vendor_dir.parent / name)
+    return True
@@ -0,0 +1,328 @@
+"""
+Static tree-shaking of the vendored modules a Worker never imports.
+
+Starting from the Worker's entry point, the import statements of every reachable
+module are followed through the project sources and the vendor directory. Vendored
+modules that are never reached are removed, which shrinks the upload and the number
+of modules Pyodide has to load.
+
+The analysis is conservative. Imports anywhere in a module count, whether they run
+at import time, inside functions or in ``try`` blocks. A package using imports the
+analysis cannot follow (``importlib.import_module`` or ``__import__`` with a computed
+name), a package shipping compiled extension modules, or a reachable module that
+cannot be parsed, is kept as a whole. Modules loaded by other means, such as plugin
+entry points, have to be kept with an allowlist of module name patterns.
+"""
+
+import ast
+import fnmatch
+import os
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+import tomli
+
+from .prune import remove_vendor_files
+from .utils import DEFAULT_PYPROJECT
+
+# Suffixes of compiled extension modules
+EXTENSION_SUFFIXES = (".so", ".pyd")
+
+
+def _module_name(relative_path: Path) -> Optional[str]:
+    """Get the dotted name of a module from its path relative to a source root."""
+    parts = list(relative_path.with_suffix("").parts)
+    if parts[-1] == "__init__":
+        parts.pop()
+    if not parts or not all(part.isidentifier() for part in parts):
+        return None
+    return ".".join(parts)
+
+
+def index_modules(
+    root: Path, exclude: Iterable[Path] = ()
+) -> Tuple[Dict[str, Path], Set[str]]:
+    """
+    Index the Python modules below a source root.
+
+    Directories that are not valid package names (e.g. hidden directories) are
+    skipped, since nothing can be imported from them.
+
+    Args:
+        root: Directory modules are imported from
+        exclude: Directories below root to leave out (e.g. the vendor directory)
+
+    Returns:
+        The module paths by dotted name, and the names of the top-level packages
+        containing compiled extension modules
+    """
+    modules: Dict[str, Path] = {}
+    extensions: Set[str] = set()
+    excluded = {path.resolve() for path in exclude}
+
+    for current, dirs, files in os.walk(root):
+        current_path = Path(current)
+        # Never descend into the excluded directories, caches or package metadata
+        dirs[:] = sorted(
+            name
+            for name in dirs
+            if name.isidentifier()
+            and name != "__pycache__"
+            and (current_path / name).resolve() not in excluded
+        )
+        relative_root = current_path.relative_to(root)
+        for name in files:
+            relative_path = relative_root / name
+            if name.endswith(".py"):
+                module = _module_name(relative_path)
+                if module is not None:
+                    modules[module] = current_path / name
+            elif name.endswith(EXTENSION_SUFFIXES) and relative_root.parts:
+                extensions.add(relative_root.parts[0])
+
+    return modules, extensions
+
+
+def _resolve_relative(name: str, level: int, package: str) -> Optional[str]:
+    """Resolve a relative import against the package it is made from."""
+    if level == 0:
+        return name
+    parts = package.split(".") if package else []
+    if level - 1 > len(parts):
+        return None
+    base = ".".join(parts[: len(parts) - (level - 1)])
+    return f"{base}.{name}" if base and name else base or name
+
+
+def find_imports(source: bytes, module: str, is_package: bool) -> Tuple[Set[str], bool]:
+    """
+    Find the modules a module may import.
+
+    Args:
+        source: Source code of the module
+        module: Dotted name of the module
+        is_package: Whether the module is a package's __init__
+
+    Returns:
+        The imported module names (including names imported from modules, which may
+        be submodules), and whether the module imports names the analysis cannot
+        determine
+
+    Raises:
+        SyntaxError: If the module cannot be parsed
+    """
+    package = module if is_package else module.rpartition(".")[0]
+    imports: Set[str] = set()
+    dynamic = False
+
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            imports.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = _resolve_relative(node.module or "", node.level, package)
+            if base is None:
+                continue
+            imports.add(base)
+            for alias in node.names:
+                # `*` keeps every submodule, see find_reachable_modules
+                imports.add(f"{base}.{alias.name}")
+        elif isinstance(node, ast.Call):
+            func = node.func
+            func_name = (
+                func.id
+                if isinstance(func, ast.Name)
+                else func.attr
+                if isinstance(func, ast.Attribute)
+                else None
+            )
+            if func_name not in ("import_module", "__import__"):
+                continue
+            target = node.args[0] if node.args else None
+            if isinstance(target, ast.Constant) and isinstance(target.value, str):
+                name = target.value
+                level = len(name) - len(name.lstrip("."))
+                resolved = _resolve_relative(name[level:], level, package)
+                if resolved:
+                    imports.add(resolved)
+            else:
+                dynamic = True
+
+    return imports, dynamic
+
+
+def find_reachable_modules(
+    entry_point: Path,
+    vendor_dir: Path,
+    keep: Iterable[str] = (),
+    exclude: Iterable[Path] = (),
+) -> Tuple[Set[str], Dict[str, Path]]:
+    """
+    Find the vendored modules reachable from a Worker's entry point.
+
+    Modules are looked up in the entry point's directory first, then in the vendor
+    directory, like the Workers runtime does.
+
+    Args:
+        entry_point: The Worker's entry point module
+        vendor_dir: Directory the packages were vendored to
+        keep: Patterns (fnmatch) of vendored module names to keep anyway, e.g.
+            ``jinja2.ext`` or ``babel.*``
+        exclude: Other directories next to the project code that are not part of
+            it, e.g. the live vendor directory when vendor_dir is a staged copy
+
+    Returns:
+        The names of the reachable vendored modules, and every vendored module by name
+
+    Raises:
+        RuntimeError: If project code imports modules the analysis cannot determine
+            and no allowlist is given
+    """
+    project_modules, _ = index_modules(
+        entry_point.parent, exclude=[vendor_dir, *exclude]
+    )
+    vendor_modules, extensions = index_modules(vendor_dir)
+    modules = {**vendor_modules, **project_modules}
+
+    reachable: Set[str] = set()
+    whole_packages: Set[str] = set()
+    queue: Deque[Tuple[str, Path]] = deque()
+
+    def add(name: str) -> None:
+        """Mark a module, and the packages it is imported through, reachable."""
+        parts = name.split(".")
+        for i in range(1, len(parts) + 1):
+            prefix = ".".join(parts[:i])
+            if prefix in modules and prefix not in reachable:
+                reachable.add(prefix)
+                queue.append((prefix, modules[prefix]))
+        if parts[0] in extensions:
+            add_package(parts[0])
+
+    def add_package(top_level: str) -> None:
+        """Mark every module of a top-level package reachable."""
+        if top_level in whole_packages:
+            return
+        whole_packages.add(top_level)
+        for name in vendor_modules:
+            if name == top_level or name.startswith(f"{top_level}."):
+                add(name)
+
+    patterns = list(keep)
+    for name in vendor_modules:
+        if any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns):
+            add(name)
+
+    def visit(module: str, path: Path) -> None:
+        """Follow the imports of a reachable module."""
+        try:
+            imports, dynamic = find_imports(
+                path.read_bytes(), module, path.name == "__init__.py"
+            )
+        except (SyntaxError, ValueError):
+            imports, dynamic = set(), True
+        if dynamic:
+            if vendor_modules.get(module) == path:
+                add_package(module.split(".")[0])
+            elif not patterns:
+                # The project's own code may import any vendored module
+                raise RuntimeError(
+                    f"Cannot follow the imports of {path}: it imports modules by "
+                    "computed names or cannot be parsed. List the vendored modules "
+                    "it needs in the tree-shake allowlist."
+                )
+        for name in imports:
+            if name.endswith(".*"):
+                # Star imports may pull in any submodule
+                prefix = name[:-1]
+                for candidate in list(modules):
+                    if candidate.startswith(prefix):
+                        add(candidate)
+            else:
+                add(name)
+
+    visit("__main__", entry_point)
+    while queue:
+        visit(*queue.popleft())
+
+    return reachable & vendor_modules.keys(), vendor_modules
+
+
+def load_tree_shake_allowlist(pyproject: Path = DEFAULT_PYPROJECT) -> List[str]:
+    """
+    Read the module patterns tree-shaking keeps from pyproject.toml.
+
+        [tool.vendorpy.tree-shake]
+        keep = ["jinja2.ext", "babel.*"]
+
+    Args:
+        pyproject: Path to the project's pyproject.toml
+
+    Returns:
+        The configured patterns
+
+    Raises:
+        ValueError: If the configuration is invalid
+    """
+    try:
+        with open(pyproject, "rb") as f:
+            config = (
+                tomli.load(f).get("tool", {}).get("vendorpy", {}).get("tree-shake", {})
+            )
+    except FileNotFoundError:
+        return []
+    except (OSError, tomli.TOMLDecodeError) as err:
+        raise ValueError(f"Failed to read {pyproject}: {err}") from err
+
+    keep = config.get("keep", [])
+    if not isinstance(keep, list) or not all(isinstance(p, str) for p in keep):
+        raise ValueError("tool.vendorpy.tree-shake.keep must be a list of patterns")
+    return keep
+
+
+def tree_shake(
+    entry_point: Path,
+    vendor_dir: Path,
+    keep: Iterable[str] = (),
+    exclude: Iterable[Path] = (),
+) -> Dict[str, Dict[str, int]]:
+    """
+    Remove the vendored modules a Worker's entry point never reaches.
+
+    Only Python modules (and their cached bytecode) are removed; data files and
+    extension modules are left alone.
+
+    Args:
+        entry_point: The Worker's entry point module
+        vendor_dir: Directory the packages were vendored to
+        keep: Patterns of vendored module names to keep anyway
+        exclude: Other directories to leave out of the project code, see
+            find_reachable_modules
+
+    Returns:
+        Files removed and bytes saved per distribution, see remove_vendor_files
+
+    Raises:
+        FileNotFoundError: If the entry point does not exist
+        RuntimeError: If the imports of the project code cannot be followed
+    """
+    if not entry_point.is_file():
+        raise FileNotFoundError(f"Worker entry point not found: {entry_point}")
+
+    reachable, vendor_modules = find_reachable_modules(
+        entry_point, vendor_dir, keep, exclude
+    )
+
+    unreachable = []
+    for name, path in vendor_modules.items():
+        if name in reachable:
+            continue
+        relative_path = path.relative_to(vendor_dir)
+        unreachable.append(relative_path.as_posix())
+        pycache = path.parent / "__pycache__"
+        unreachable.extend(
+            pyc.relative_to(vendor_dir).as_posix()
+            for pyc in pycache.glob(f"{path.stem}.*.pyc")
+        )
+
+    return remove_vendor_files(vendor_dir, unreachable)
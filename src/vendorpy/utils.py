@@ -2,12 +2,93 @@
 Utility functions for the vendorpy CLI.
 """
 
+import hashlib
 import json
+import os
+import shutil
 import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
 import tomli
 import tomli_w
-from pathlib import Path
-from typing import List, Dict, Set, Optional, Tuple, Union, Any
+from packaging.requirements import InvalidRequirement, Requirement
+
+from .cache import (
+    ENTRY_METADATA_FILE,
+    commit_entry,
+    compute_cache_key,
+    discard_entry,
+    entry_lock,
+    get_entry_path,
+    lookup_entry,
+    prune_cache,
+)
+from .distributions import (
+    canonicalize_name,
+    find_installed_distributions,
+    remove_distribution,
+)
+from .lockfile import DEFAULT_LOCKFILE, load_lockfile
+from .profiling import run_command
+from .registry import (
+    BuiltInRegistry,
+    load_pyodide_lock_registry,
+    select_pyodide_lock,
+)
+from .wheels import (
+    add_wheel_to_store,
+    build_wheel_index,
+    hash_file,
+    link_file,
+    link_tree,
+    lookup_unpacked_wheel,
+    parse_wheel_filename,
+    resolve_pure_python,
+)
+
+# Cache namespace holding reusable Python + pyodide-build toolchains
+TOOLCHAIN_CACHE_NAMESPACE = "toolchains"
+
+# Seconds a toolchain with an unpinned pyodide-build is reused before it is rebuilt
+# with the latest release
+UNPINNED_TOOLCHAIN_TTL = 24 * 60 * 60
+
+# Backends creating the toolchain environment ("auto" picks uv when it is installed)
+BACKENDS = ("auto", "uv", "pip")
+
+# Cache namespace holding Pyodide virtual environments created by `pyodide venv`
+PYODIDE_ENV_CACHE_NAMESPACE = "pyodide-envs"
+
+# File recording which cache entry a project's .venv-pyodide was materialized from
+PYODIDE_ENV_MARKER_FILE = ".vendorpy-cache-key"
+
+# Directory of a wheelhouse holding the Pyodide cross-build environment `pyodide venv`
+# needs, so it does not download it
+WHEELHOUSE_XBUILDENV_DIR = "xbuildenv"
+
+# Directory holding vendorpy's per-project state
+STATE_DIR = Path(".vendorpy")
+
+# State file recording what incremental installs resolved vendor.txt to
+INCREMENTAL_STATE_FILE = "vendor-state.json"
+
+# State file caching the result of package detection
+DETECTION_CACHE_FILE = "cache.json"
+
+# State file recording the checkpoints of auto-vendor's steps, for --resume
+PIPELINE_STATE_FILE = "state"
+
+# Bumped whenever the detection logic changes, invalidating cached results
+DETECTION_CACHE_VERSION = 2
+
+# Project manifest hashed into the detection fingerprint
+DEFAULT_PYPROJECT = Path("pyproject.toml")
+
+# Glob of the wrangler rule uploading the vendor directory
+VENDOR_GLOB = "vendor/**"
 
 # List of built-in packages available in Cloudflare Workers
 # This list is based on the documentation and should be updated as needed
@@ -61,10 +142,23 @@ CLOUDFLARE_BUILT_IN_PACKAGES = [
     "starlette",
 ]
 
+# PEP 503 indexed registry of the built-in packages, used for all membership checks
+BUILT_IN_PACKAGES = BuiltInRegistry(CLOUDFLARE_BUILT_IN_PACKAGES)
+
 
-def extract_project_dependencies() -> Set[str]:
+def extract_project_dependencies(
+    lockfile: Path = DEFAULT_LOCKFILE, prune: Iterable[str] = ()
+) -> Set[str]:
     """
-    Extract all project dependencies using uv export.
+    Extract all project dependencies from the lockfile.
+
+    The uv.lock file is parsed in-process; `uv export` is only used as a fallback
+    when there is no readable lockfile.
+
+    Args:
+        lockfile: Path to the uv.lock file
+        prune: Packages to prune from the dependency graph, together with the
+            dependencies only reachable through them
 
     Returns:
         Set of package names that the project depends on
@@ -72,10 +166,18 @@ def extract_project_dependencies() -> Set[str]:
     Raises:
         RuntimeError: If uv is not available or if the command fails
     """
+    graph = load_lockfile(lockfile)
+    if graph is not None:
+        return {
+            package.canonical_name.replace("-", "_")
+            for package in graph.walk(prune=prune)
+        }
+
+    prune_args = [arg for name in prune for arg in ("--prune", name)]
     try:
         # Run uv export to get all dependencies from the lockfile
-        result = subprocess.run(
-            ["uv", "export", "--format", "json"],
+        result = run_command(
+            ["uv", "export", "--format", "json", *prune_args],
             check=True,
             capture_output=True,
             text=True,
@@ -106,56 +208,214 @@ def extract_project_dependencies() -> Set[str]:
         ) from err
 
 
-def detect_packages_to_vendor() -> Dict[str, List[str]]:
+def _read_wrangler_setting(key: str) -> Optional[str]:
+    """
+    Read a top-level string setting from the wrangler configuration.
+
+    Args:
+        key: Name of the setting, e.g. "main"
+
+    Returns:
+        The value of the setting, or None if it is not configured
+    """
+    config = find_wrangler_config()
+    if config is None:
+        return None
+
+    config_path, config_type = config
+    try:
+        if config_type == "toml":
+            with open(config_path, "rb") as f:
+                value = tomli.load(f).get(key)
+            return str(value) if value else None
+
+        # Avoid a JSONC parser, the settings read are plain string values
+        import re
+
+        match = re.search(
+            rf'"{re.escape(key)}"\s*:\s*"([^"]+)"', config_path.read_text()
+        )
+        return match.group(1) if match else None
+    except (OSError, tomli.TOMLDecodeError):
+        return None
+
+
+def read_compatibility_date() -> Optional[str]:
+    """
+    Read the compatibility date of the Worker from its wrangler configuration.
+
+    Returns:
+        The compatibility date (YYYY-MM-DD), or None if it is not configured
+    """
+    return _read_wrangler_setting("compatibility_date")
+
+
+def read_worker_entry_point() -> Optional[Path]:
+    """
+    Read the entry point of the Worker (`main`) from its wrangler configuration.
+
+    Returns:
+        Path of the entry point module, or None if it is not configured
+    """
+    main = _read_wrangler_setting("main")
+    return Path(main) if main else None
+
+
+def get_built_in_registry(
+    pyodide_lock: Optional[Path] = None, compatibility_date: Optional[str] = None
+) -> BuiltInRegistry:
+    """
+    Get the registry of built-in packages to detect against.
+
+    Args:
+        pyodide_lock: A pyodide-lock.json file, or a directory of lock files named
+            after the compatibility date they apply from; defaults to the built-in
+            package list shipped with vendorpy
+        compatibility_date: Compatibility date of the Worker, read from the
+            wrangler configuration if not given
+
+    Returns:
+        The registry of built-in packages
+
+    Raises:
+        RuntimeError: If no lock file applies or it cannot be loaded
+    """
+    if pyodide_lock is None:
+        return BUILT_IN_PACKAGES
+
+    if compatibility_date is None:
+        compatibility_date = read_compatibility_date()
+    try:
+        lock_path = select_pyodide_lock(pyodide_lock, compatibility_date)
+    except ValueError as err:
+        raise RuntimeError(f"Invalid compatibility date: {compatibility_date}") from err
+    if lock_path is None:
+        raise RuntimeError(
+            f"No pyodide-lock.json in {pyodide_lock} applies to compatibility date "
+            f"{compatibility_date}"
+        )
+    return load_pyodide_lock_registry(lock_path)
+
+
+def compute_detection_fingerprint(
+    lockfile: Path = DEFAULT_LOCKFILE,
+    pyproject: Path = DEFAULT_PYPROJECT,
+    registry: BuiltInRegistry = BUILT_IN_PACKAGES,
+) -> Optional[str]:
+    """
+    Fingerprint the inputs of package detection.
+
+    Args:
+        lockfile: Path to the uv.lock file
+        pyproject: Path to the pyproject.toml file
+        registry: Registry of the built-in packages
+
+    Returns:
+        Digest of the lockfile, the project manifest and the built-in package
+        registry, or None if there is no lockfile to fingerprint
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{DETECTION_CACHE_VERSION}\0".encode())
+    digest.update(f"{registry.version}\0".encode())
+    for path in (lockfile, pyproject):
+        try:
+            with open(path, "rb") as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        except FileNotFoundError:
+            # Without a lockfile `uv export` would lock from scratch, don't cache that
+            if path == lockfile:
+                return None
+            digest.update(b"missing")
+    return digest.hexdigest()
+
+
+def load_cached_detection(fingerprint: str) -> Optional[Dict[str, List[str]]]:
+    """
+    Load the result of a previous package detection.
+
+    Args:
+        fingerprint: Fingerprint of the current detection inputs
+
+    Returns:
+        The cached detection result, or None if the inputs changed since it was
+        recorded
+    """
+    try:
+        with open(STATE_DIR / DETECTION_CACHE_FILE, "r") as f:
+            cached = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    if not isinstance(cached, dict) or cached.get("fingerprint") != fingerprint:
+        return None
+    return {
+        "vendor": list(cached.get("vendor", [])),
+        "built_in": list(cached.get("built_in", [])),
+    }
+
+
+def _write_cached_detection(fingerprint: str, result: Dict[str, List[str]]) -> None:
+    """Record the result of package detection for the given inputs."""
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = STATE_DIR / f"{DETECTION_CACHE_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"fingerprint": fingerprint, **result}, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, STATE_DIR / DETECTION_CACHE_FILE)
+
+
+def detect_packages_to_vendor(
+    use_cache: bool = False, registry: BuiltInRegistry = BUILT_IN_PACKAGES
+) -> Dict[str, List[str]]:
     """
     Detect which packages need to be vendored by comparing project dependencies
     with built-in Cloudflare packages.
 
+    Args:
+        use_cache: Reuse the result cached in .vendorpy/cache.json while uv.lock,
+            pyproject.toml and the built-in package registry are unchanged
+        registry: Registry of the built-in packages
+
     Returns:
         Dictionary with 'vendor' and 'built_in' keys, containing lists of package names
 
     Raises:
         RuntimeError: If dependency extraction fails
     """
+    fingerprint = (
+        compute_detection_fingerprint(registry=registry) if use_cache else None
+    )
+    if fingerprint is not None:
+        cached = load_cached_detection(fingerprint)
+        if cached is not None:
+            return cached
+
     # Get all project dependencies
     project_dependencies = extract_project_dependencies()
 
-    # Normalize built-in package names for comparison
-    normalized_built_in = {
-        pkg.lower().replace("-", "_") for pkg in CLOUDFLARE_BUILT_IN_PACKAGES
-    }
+    # Dependencies of built-in packages are already available at runtime, so only
+    # packages reachable from the project without passing through a built-in
+    # package need vendoring
+    reachable_dependencies = extract_project_dependencies(prune=registry)
 
-    # Determine which packages need to be vendored
-    to_vendor = project_dependencies - normalized_built_in
-    built_in = project_dependencies & normalized_built_in
-
-    # Get original package names for the ones that need to be vendored
-    # This is needed because we normalized the names for comparison
-    vendor_packages = []
-    for package in to_vendor:
-        # Use the original name if available
-        # Note: This is a simple implementation that assumes the package name
-        # in the output of uv export is the same as what should be in vendor.txt
-        vendor_packages.append(package.replace("_", "-"))
-
-    # Get original package names for built-in packages
-    built_in_packages = []
-    for built_in_pkg in built_in:
-        # Find the exact package name with correct casing
-        exact_name = next(
-            (
-                pkg
-                for pkg in CLOUDFLARE_BUILT_IN_PACKAGES
-                if pkg.lower().replace("-", "_") == built_in_pkg
-            ),
-            built_in_pkg,  # Use normalized name if exact match not found
-        )
-        built_in_packages.append(exact_name)
+    # Vendor.txt lists the packages with hyphens, as in the lockfile
+    vendor_packages = [
+        package.replace("_", "-")
+        for package in reachable_dependencies
+        if package not in registry
+    ]
 
-    return {
+    # Report built-in packages under the name they are listed with
+    built_in_packages = [
+        name for name in map(registry.get, project_dependencies) if name is not None
+    ]
+
+    result = {
         "vendor": sorted(vendor_packages),
         "built_in": sorted(built_in_packages),
     }
+    if fingerprint is not None:
+        _write_cached_detection(fingerprint, result)
+    return result
 
 
 def create_vendor_file(vendor_packages: List[str], vendor_file: Path) -> None:
@@ -175,33 +435,70 @@ def create_vendor_file(vendor_packages: List[str], vendor_file: Path) -> None:
             f.write(f"{package}\n")
 
 
-def create_virtual_env(python_version: str = "3.12") -> Path:
+def select_backend(backend: str = "auto") -> str:
     """
-    Create a Python virtual environment.
+    Select the backend used to create environments and install packages into them.
 
     Args:
-        python_version: The Python version to use (must be 3.12 for Cloudflare Workers)
+        backend: "uv", "pip", or "auto" to use uv when it is installed
 
     Returns:
-        Path to the created virtual environment
+        The backend to use, "uv" or "pip"
 
     Raises:
-        RuntimeError: If Python is not available or if the virtual environment creation fails
-        FileNotFoundError: If pip is not found in the created environment
+        ValueError: If the backend is unknown
+        RuntimeError: If uv was requested but is not installed
     """
-    venv_path = Path(".venv")
+    if backend not in BACKENDS:
+        raise ValueError(
+            f"Unknown backend: {backend} (expected one of {', '.join(BACKENDS)})"
+        )
+    if backend == "pip":
+        return "pip"
+    if shutil.which("uv"):
+        return "uv"
+    if backend == "uv":
+        raise RuntimeError(
+            "uv command not found. Please install uv using 'pip install uv'"
+        )
+    return "pip"
 
-    # Remove existing virtual environment if it exists
-    if venv_path.exists():
-        import shutil
 
-        shutil.rmtree(venv_path)
+def _index_args(wheelhouse: Optional[Path]) -> List[str]:
+    """pip/uv options installing from a local wheelhouse only, without any index."""
+    if wheelhouse is None:
+        return []
+    return ["--no-index", "--find-links", str(wheelhouse)]
 
-    # Check if Python version is available
+
+def _check_python_version(python_version: str, backend: str = "pip") -> str:
+    """
+    Check that the requested Python interpreter is available.
+
+    Args:
+        python_version: The Python version to check (e.g. "3.12")
+        backend: "uv" to also find interpreters managed by uv, or "pip"
+
+    Returns:
+        The full version reported by the interpreter (e.g. "3.12.3")
+
+    Raises:
+        RuntimeError: If the interpreter is not available
+    """
     try:
+        interpreter = f"python{python_version}"
+        if backend == "uv":
+            # uv also knows the interpreters it installed itself
+            interpreter = run_command(
+                ["uv", "python", "find", python_version],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout.strip()  # nosec B603
+
         # Using capture_output instead of PIPE for stdout and stderr
-        subprocess.run(
-            [f"python{python_version}", "--version"],
+        result = run_command(
+            [interpreter, "--version"],
             check=True,
             capture_output=True,
             text=True,  # nosec B603
@@ -211,11 +508,51 @@ def create_virtual_env(python_version: str = "3.12") -> Path:
         msg = f"Python {python_version} is not available. Please install Python {python_version} and try again."
         raise RuntimeError(msg) from err
 
+    # "Python 3.12.3" -> "3.12.3"
+    output = (result.stdout or result.stderr or "").strip()
+    return output.split()[-1] if output else python_version
+
+
+def _build_toolchain(
+    venv_path: Path,
+    python_version: str,
+    pyodide_build_version: Optional[str],
+    backend: str = "pip",
+    wheelhouse: Optional[Path] = None,
+) -> None:
+    """
+    Create a virtual environment at venv_path and install pyodide-build into it.
+
+    Args:
+        venv_path: Where to create the virtual environment
+        python_version: The Python version to use
+        pyodide_build_version: Version of pyodide-build to install, or None for the latest
+        backend: "uv" to use `uv venv` and `uv pip install` (with uv's global cache),
+            or "pip" to use `python -m venv` and pip
+        wheelhouse: Directory of wheels to install from instead of the package index
+
+    Raises:
+        RuntimeError: If the virtual environment creation or the installation fails
+        FileNotFoundError: If pip is not found in the created environment
+    """
     # Create virtual environment
     try:
         # Using fixed command list is safe as we're not using shell=True
-        subprocess.run(
-            [f"python{python_version}", "-m", "venv", str(venv_path)],
+        if backend == "uv":
+            # Seed pip as well, `pyodide venv` expects it in the host environment
+            cmd = [
+                "uv",
+                "venv",
+                "--seed",
+                *_index_args(wheelhouse),
+                "--python",
+                python_version,
+                str(venv_path),
+            ]
+        else:
+            cmd = [f"python{python_version}", "-m", "venv", str(venv_path)]
+        run_command(
+            cmd,
             check=True,
             capture_output=True,
             text=True,
@@ -240,9 +577,26 @@ def create_virtual_env(python_version: str = "3.12") -> Path:
             "Make sure the virtual environment was created correctly."
         )
 
+    requirement = (
+        f"pyodide-build=={pyodide_build_version}"
+        if pyodide_build_version
+        else "pyodide-build"
+    )
+    if backend == "uv":
+        cmd = [
+            "uv",
+            "pip",
+            "install",
+            "--python",
+            str(venv_path / "bin" / "python"),
+            *_index_args(wheelhouse),
+            requirement,
+        ]
+    else:
+        cmd = [str(pip_path), "install", *_index_args(wheelhouse), requirement]
     try:
-        subprocess.run(
-            [str(pip_path), "install", "pyodide-build"],
+        run_command(
+            cmd,
             check=True,
             capture_output=True,
             text=True,
@@ -251,25 +605,140 @@ def create_virtual_env(python_version: str = "3.12") -> Path:
         error_output = err.stderr if err.stderr else "Unknown error"
         raise RuntimeError(f"Failed to install pyodide-build: {error_output}") from err
 
-    return venv_path
+
+def get_installed_version(venv_path: Path, package_name: str) -> Optional[str]:
+    """
+    Get the version of a package installed in a virtual environment.
+
+    The version is read from the package's .dist-info directory, so no interpreter
+    needs to be started.
+
+    Args:
+        venv_path: Path to the virtual environment
+        package_name: Name of the package (e.g. "pyodide-build")
+
+    Returns:
+        The installed version, or None if the package is not installed
+    """
+    dist_prefix = package_name.lower().replace("-", "_").replace(".", "_")
+    for dist_info in venv_path.glob("lib/python*/site-packages/*.dist-info"):
+        name, _, version = dist_info.name[: -len(".dist-info")].partition("-")
+        if name.lower().replace(".", "_") == dist_prefix:
+            return version
+    return None
 
 
-def create_pyodide_env(venv_path: Path) -> Path:
+def create_virtual_env(
+    python_version: str = "3.12",
+    pyodide_build_version: Optional[str] = None,
+    use_cache: bool = True,
+    backend: str = "auto",
+    wheelhouse: Optional[Path] = None,
+) -> Path:
     """
-    Create a Pyodide virtual environment.
+    Create a Python virtual environment with pyodide-build installed.
+
+    By default the environment is a reusable toolchain stored in the vendorpy cache,
+    keyed on the exact Python version and the pyodide-build version, so it is only
+    built once across runs and projects. Without a requested pyodide-build version,
+    the newest one in the wheelhouse is used, or else the latest release: such a
+    toolchain is rebuilt once it is older than UNPINNED_TOOLCHAIN_TTL, so it picks
+    up new releases. With use_cache disabled, a fresh environment is created at
+    .venv instead.
 
     Args:
-        venv_path: Path to the Python virtual environment
+        python_version: The Python version to use (must be 3.12 for Cloudflare Workers)
+        pyodide_build_version: Version of pyodide-build to install, or None for the latest
+        use_cache: Whether to reuse (and populate) the toolchain cache
+        backend: Backend building the environment: "uv", "pip", or "auto" to use
+            uv when it is installed
+        wheelhouse: Directory of wheels to install pyodide-build from instead of
+            the package index
 
     Returns:
-        Path to the created Pyodide virtual environment
+        Path to the created virtual environment
 
     Raises:
-        RuntimeError: If the pyodide command is not found or fails to create the environment
+        RuntimeError: If Python is not available or if the virtual environment creation fails
+        FileNotFoundError: If pip is not found in the created environment
     """
-    pyodide_venv_path = Path(".venv-pyodide")
+    backend = select_backend(backend)
+
+    # Check if Python version is available
+    full_python_version = _check_python_version(python_version, backend)
+
+    if not use_cache:
+        venv_path = Path(".venv")
+
+        # Remove existing virtual environment if it exists
+        if venv_path.exists():
+            shutil.rmtree(venv_path)
+
+        _build_toolchain(
+            venv_path, python_version, pyodide_build_version, backend, wheelhouse
+        )
+        return venv_path
+
+    if pyodide_build_version is None and wheelhouse is not None:
+        # Offline, the latest version is the newest one the wheelhouse holds
+        candidates = build_wheel_index([wheelhouse], include_store=False).get(
+            "pyodide-build", []
+        )
+        if candidates:
+            pyodide_build_version = str(max(c.version for c in candidates))
+
+    key = compute_cache_key(
+        "toolchain", full_python_version, pyodide_build_version or "latest"
+    )
+    max_age = UNPINNED_TOOLCHAIN_TTL if pyodide_build_version is None else None
+    with entry_lock(TOOLCHAIN_CACHE_NAMESPACE, key):
+        cached_path = lookup_entry(TOOLCHAIN_CACHE_NAMESPACE, key, max_age=max_age)
+        if cached_path is not None and (cached_path / "bin" / "pyodide").exists():
+            return cached_path
+
+        # Build the toolchain in place: virtual environments are not relocatable
+        venv_path = get_entry_path(TOOLCHAIN_CACHE_NAMESPACE, key)
+        discard_entry(venv_path)
+        try:
+            _build_toolchain(
+                venv_path, python_version, pyodide_build_version, backend, wheelhouse
+            )
+        except Exception:
+            discard_entry(venv_path)
+            raise
+
+        commit_entry(
+            TOOLCHAIN_CACHE_NAMESPACE,
+            key,
+            {
+                "python_version": full_python_version,
+                "pyodide_build_version": get_installed_version(
+                    venv_path, "pyodide-build"
+                ),
+                "backend": backend,
+            },
+        )
+
+    # Keep the cache within its size budget, never evicting the entry we just built
+    prune_cache(keep=[venv_path])
+    return venv_path
 
-    # Create Pyodide virtual environment
+
+def _run_pyodide_venv(
+    venv_path: Path, pyodide_venv_path: Path, wheelhouse: Optional[Path] = None
+) -> None:
+    """
+    Run `pyodide venv` from the toolchain to create a Pyodide virtual environment.
+
+    Args:
+        venv_path: Path to the Python virtual environment with pyodide-build installed
+        pyodide_venv_path: Where to create the Pyodide virtual environment
+        wheelhouse: Wheelhouse holding the cross-build environment (see
+            build_wheelhouse), used instead of downloading it
+
+    Raises:
+        RuntimeError: If the pyodide command is not found or fails to create the environment
+    """
     pyodide_path = venv_path / "bin" / "pyodide"
 
     # Check if pyodide exists
@@ -278,12 +747,23 @@ def create_pyodide_env(venv_path: Path) -> Path:
             f"Pyodide command not found at {pyodide_path}. Make sure pyodide-build is installed correctly."
         )
 
+    env = None
+    if wheelhouse is not None:
+        xbuildenv_path = wheelhouse / WHEELHOUSE_XBUILDENV_DIR
+        if not xbuildenv_path.is_dir():
+            raise RuntimeError(
+                f"No Pyodide cross-build environment in {wheelhouse}, rebuild it "
+                "with `vendorpy wheelhouse build`"
+            )
+        env = {**os.environ, "PYODIDE_XBUILDENV_PATH": str(xbuildenv_path.resolve())}
+
     try:
-        subprocess.run(
+        run_command(
             [str(pyodide_path), "venv", str(pyodide_venv_path)],
             check=True,
             capture_output=True,
             text=True,
+            env=env,
         )  # nosec B603
     except subprocess.CalledProcessError as err:
         error_output = err.stderr if err.stderr else "Unknown error"
@@ -297,12 +777,789 @@ def create_pyodide_env(venv_path: Path) -> Path:
             f"Pyodide environment was not created at {pyodide_venv_path}"
         )
 
+
+def get_python_abi(venv_path: Path) -> Optional[str]:
+    """
+    Get the CPython ABI tag (e.g. "cp312") of a virtual environment.
+
+    Args:
+        venv_path: Path to the virtual environment
+
+    Returns:
+        The ABI tag read from pyvenv.cfg, or None if it cannot be determined
+    """
+    try:
+        with open(venv_path / "pyvenv.cfg", "r") as f:
+            for line in f:
+                key, _, value = line.partition("=")
+                if key.strip() in ("version", "version_info"):
+                    major, minor = value.strip().split(".")[:2]
+                    return f"cp{major}{minor}"
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def materialize_tree(source: Path, destination: Path) -> None:
+    """
+    Recreate a directory tree using hardlinks, falling back to reflinks or copies.
+
+    Scripts and configuration files that embed the absolute source path (venv
+    entry points, pyvenv.cfg) are copied with the path rewritten to the destination,
+    so the materialized environment does not point back into the source tree.
+
+    Args:
+        source: Directory to materialize
+        destination: Where to recreate it (must not exist)
+    """
+    source_prefix = str(source)
+    destination_prefix = str(destination)
+
+    for root, dirs, files in os.walk(source):
+        root_path = Path(root)
+        target_root = destination / root_path.relative_to(source)
+        target_root.mkdir(parents=True, exist_ok=True)
+
+        for name in dirs + files:
+            src_path = root_path / name
+            if not src_path.is_symlink():
+                continue
+            # Recreate symlinks (e.g. bin/python3 -> python), retargeting absolute ones
+            link_target = os.readlink(src_path)
+            if link_target.startswith(source_prefix):
+                link_target = destination_prefix + link_target[len(source_prefix) :]
+            os.symlink(link_target, target_root / name)
+        # os.walk does not descend into symlinked directories
+        dirs[:] = [name for name in dirs if not (root_path / name).is_symlink()]
+
+        for name in files:
+            src_path = root_path / name
+            dst_path = target_root / name
+            if src_path.is_symlink() or name == ENTRY_METADATA_FILE:
+                continue
+
+            if root_path.name == "bin" or name == "pyvenv.cfg":
+                content = src_path.read_bytes()
+                if source_prefix.encode() in content:
+                    dst_path.write_bytes(
+                        content.replace(
+                            source_prefix.encode(), destination_prefix.encode()
+                        )
+                    )
+                    shutil.copymode(src_path, dst_path)
+                    continue
+
+            link_file(src_path, dst_path)
+
+
+def create_pyodide_env(
+    venv_path: Path, use_cache: bool = True, wheelhouse: Optional[Path] = None
+) -> Path:
+    """
+    Create a Pyodide virtual environment.
+
+    By default the environment is created once in the vendorpy cache, keyed on the
+    pyodide-build version, the Python ABI and the toolchain it was created from, and
+    then materialized into .venv-pyodide with hardlinks. A .venv-pyodide that was
+    already materialized from the same cache entry is reused as is.
+
+    Args:
+        venv_path: Path to the Python virtual environment
+        use_cache: Whether to reuse (and populate) the Pyodide environment cache
+        wheelhouse: Wheelhouse to take the Pyodide cross-build environment from,
+            so no network access is needed
+
+    Returns:
+        Path to the created Pyodide virtual environment
+
+    Raises:
+        RuntimeError: If the pyodide command is not found or fails to create the environment
+    """
+    pyodide_venv_path = Path(".venv-pyodide")
+
+    pyodide_build_version = get_installed_version(venv_path, "pyodide-build")
+    python_abi = get_python_abi(venv_path)
+
+    # Without a known pyodide-build version there is nothing to key the cache on
+    if not use_cache or pyodide_build_version is None or python_abi is None:
+        _run_pyodide_venv(venv_path, pyodide_venv_path, wheelhouse)
+        return pyodide_venv_path
+
+    key = compute_cache_key(
+        "pyodide-env",
+        pyodide_build_version,
+        python_abi,
+        str(venv_path.resolve()),
+    )
+
+    # Skip the step entirely if the project already holds this environment
+    marker_path = pyodide_venv_path / PYODIDE_ENV_MARKER_FILE
+    if (
+        marker_path.exists()
+        and marker_path.read_text().strip() == key
+        and lookup_entry(PYODIDE_ENV_CACHE_NAMESPACE, key) is not None
+    ):
+        return pyodide_venv_path
+
+    with entry_lock(PYODIDE_ENV_CACHE_NAMESPACE, key):
+        cached_path = lookup_entry(PYODIDE_ENV_CACHE_NAMESPACE, key)
+        if cached_path is None or not (cached_path / "bin" / "pip").exists():
+            cached_path = get_entry_path(PYODIDE_ENV_CACHE_NAMESPACE, key)
+            discard_entry(cached_path)
+            try:
+                _run_pyodide_venv(venv_path, cached_path, wheelhouse)
+            except Exception:
+                discard_entry(cached_path)
+                raise
+            commit_entry(
+                PYODIDE_ENV_CACHE_NAMESPACE,
+                key,
+                {
+                    "pyodide_build_version": pyodide_build_version,
+                    "python_abi": python_abi,
+                },
+            )
+
+        # Replace whatever environment the project had with the cached one
+        if pyodide_venv_path.is_symlink() or pyodide_venv_path.is_file():
+            pyodide_venv_path.unlink()
+        elif pyodide_venv_path.exists():
+            shutil.rmtree(pyodide_venv_path)
+        materialize_tree(cached_path, pyodide_venv_path.absolute())
+        marker_path.write_text(f"{key}\n")
+
+    prune_cache(keep=[venv_path, cached_path])
     return pyodide_venv_path
 
 
-def install_packages_to_vendor(
-    pyodide_venv_path: Path, vendor_file: Path, vendor_dir: Path
+def _get_pyodide_pip(pyodide_venv_path: Path) -> Path:
+    """
+    Get the pip executable of a Pyodide virtual environment.
+
+    Args:
+        pyodide_venv_path: Path to the Pyodide virtual environment
+
+    Returns:
+        Path to pip
+
+    Raises:
+        FileNotFoundError: If pip is not found in the Pyodide environment
+    """
+    pip_path = pyodide_venv_path / "bin" / "pip"
+    if not pip_path.exists():
+        raise FileNotFoundError(
+            f"pip not found in Pyodide environment at {pip_path}. "
+            "Make sure the Pyodide environment was created correctly."
+        )
+    return pip_path
+
+
+def resolve_vendor_requirements(
+    pip_path: Path, vendor_file: Path, wheelhouse: Optional[Path] = None
+) -> Dict[str, Dict[str, str]]:
+    """
+    Resolve the full set of distributions required by a vendor.txt file.
+
+    Runs pip's resolver in dry-run mode, so nothing is installed.
+
+    Args:
+        pip_path: pip of the Pyodide virtual environment
+        vendor_file: Path to the vendor.txt file
+        wheelhouse: Directory of wheels to resolve against instead of the index
+
+    Returns:
+        Dictionary mapping canonical names to the resolved "name", "version", the
+        pinned "requirement" to install it with and the "sha256" of the selected
+        distribution file (empty if pip did not report one)
+
+    Raises:
+        RuntimeError: If the resolution fails
+    """
+    with tempfile.TemporaryDirectory(prefix="vendorpy-") as tmp_dir:
+        report_path = Path(tmp_dir) / "report.json"
+        try:
+            run_command(
+                [
+                    str(pip_path),
+                    "install",
+                    "--dry-run",
+                    "--ignore-installed",
+                    "--quiet",
+                    "--report",
+                    str(report_path),
+                    *_index_args(wheelhouse),
+                    "-r",
+                    str(vendor_file),
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            )  # nosec B603
+            with open(report_path, "r") as f:
+                report = json.load(f)
+        except subprocess.CalledProcessError as err:
+            error_output = err.stderr if err.stderr else "Unknown error"
+            raise RuntimeError(f"Failed to resolve packages: {error_output}") from err
+        except (OSError, json.JSONDecodeError) as err:
+            raise RuntimeError(f"Failed to read pip resolution report: {err}") from err
+
+    resolved = {}
+    for item in report.get("install", []):
+        name = item["metadata"]["name"]
+        version = item["metadata"]["version"]
+        requirement = f"{name}=={version}"
+
+        # Direct references (URLs, VCS checkouts) cannot be pinned by version
+        download_info = item.get("download_info", {})
+        if item.get("is_direct") and download_info.get("url"):
+            url = download_info["url"]
+            vcs_info = download_info.get("vcs_info")
+            if vcs_info:
+                url = f"{vcs_info['vcs']}+{url}@{vcs_info['commit_id']}"
+            requirement = f"{name} @ {url}"
+
+        hashes = download_info.get("archive_info", {}).get("hashes", {})
+        resolved[canonicalize_name(name)] = {
+            "name": name,
+            "version": version,
+            "requirement": requirement,
+            "sha256": hashes.get("sha256", ""),
+        }
+    return resolved
+
+
+def resolve_vendor_file(
+    pyodide_venv_path: Path, vendor_file: Path, wheelhouse: Optional[Path] = None
+) -> Dict[str, Dict[str, str]]:
+    """
+    Resolve a vendor.txt file with the pip of a Pyodide virtual environment.
+
+    Args:
+        pyodide_venv_path: Path to the Pyodide virtual environment
+        vendor_file: Path to the vendor.txt file
+        wheelhouse: Directory of wheels to resolve against instead of the index
+
+    Returns:
+        The resolved distributions, see resolve_vendor_requirements
+
+    Raises:
+        FileNotFoundError: If pip is not found in the Pyodide environment
+        RuntimeError: If the resolution fails
+    """
+    pip_path = _get_pyodide_pip(pyodide_venv_path)
+    return resolve_vendor_requirements(pip_path, vendor_file, wheelhouse)
+
+
+def merge_tree(source: Path, destination: Path) -> None:
+    """
+    Move the contents of a directory into another one, file by file.
+
+    Unlike replacing whole top-level directories, merging keeps files of other
+    distributions that share a directory (e.g. namespace packages) intact.
+
+    Args:
+        source: Directory whose contents to move
+        destination: Directory to merge them into
+    """
+    for root, _dirs, files in os.walk(source):
+        target_root = destination / Path(root).relative_to(source)
+        target_root.mkdir(parents=True, exist_ok=True)
+        for name in files:
+            os.replace(Path(root) / name, target_root / name)
+
+
+def _read_incremental_state(vendor_dir: Path) -> Dict[str, Any]:
+    """Read what the last incremental install into vendor_dir resolved to."""
+    try:
+        with open(STATE_DIR / INCREMENTAL_STATE_FILE, "r") as f:
+            state: Dict[str, Any] = json.load(f).get(str(vendor_dir), {})
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return state
+
+
+def _write_incremental_state(vendor_dir: Path, state: Dict[str, Any]) -> None:
+    """Record what an incremental install into vendor_dir resolved to."""
+    state_path = STATE_DIR / INCREMENTAL_STATE_FILE
+    try:
+        with open(state_path, "r") as f:
+            all_states = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        all_states = {}
+    all_states[str(vendor_dir)] = state
+
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(state_path, "w") as f:
+        json.dump(all_states, f, indent=2, sort_keys=True)
+
+
+def _install_pinned_packages(
+    pip_path: Path,
+    packages: List[Dict[str, str]],
+    vendor_dir: Path,
+    jobs: int = 1,
+    wheelhouse: Optional[Path] = None,
 ) -> None:
+    """
+    Install resolved packages with pip, without dependencies, into vendor_dir.
+
+    With several jobs, each package is fetched and unpacked by its own pip process
+    into a private staging directory, and the staging directories are merged into
+    vendor_dir one at a time once all of them are done.
+
+    Args:
+        pip_path: pip of the Pyodide virtual environment
+        packages: Resolved packages, as returned by resolve_vendor_requirements
+        vendor_dir: Directory to install vendored packages to
+        jobs: Number of packages to install in parallel
+        wheelhouse: Directory of wheels to install from instead of the index
+
+    Raises:
+        RuntimeError: If the installation fails
+    """
+    batches = (
+        [[package] for package in packages]
+        if jobs > 1 and len(packages) > 1
+        else [packages]
+    )
+
+    # Install into sibling directories first, then merge file by file
+    staging_dirs = [
+        Path(tempfile.mkdtemp(prefix=f".{vendor_dir.name}-", dir=vendor_dir.parent))
+        for _batch in batches
+    ]
+
+    def install_batch(batch: List[Dict[str, str]], staging_dir: Path) -> None:
+        run_command(
+            [
+                str(pip_path),
+                "install",
+                "--no-deps",
+                *_index_args(wheelhouse),
+                "-t",
+                str(staging_dir),
+                *(package["requirement"] for package in batch),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        )  # nosec B603
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(batches)))) as pool:
+            # list() re-raises the first failure after every install finished
+            list(pool.map(install_batch, batches, staging_dirs))
+
+        # Merging one staging directory at a time keeps shared top-level
+        # directories (namespace packages, bin/, ...) from being clobbered
+        for staging_dir in staging_dirs:
+            merge_tree(staging_dir, vendor_dir)
+    except subprocess.CalledProcessError as err:
+        error_output = err.stderr if err.stderr else "Unknown error"
+        raise RuntimeError(f"Failed to install packages: {error_output}") from err
+    finally:
+        for staging_dir in staging_dirs:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def _download_wheels(
+    pip_path: Path,
+    requirements: List[str],
+    download_dir: Path,
+    wheelhouse: Optional[Path] = None,
+) -> None:
+    """
+    Download the wheels of pinned requirements, without dependencies.
+
+    Args:
+        pip_path: pip of the Pyodide virtual environment
+        requirements: Pinned requirements to download
+        download_dir: Directory to download the wheels to
+        wheelhouse: Directory of wheels to copy from instead of the index
+
+    Raises:
+        subprocess.CalledProcessError: If pip fails, e.g. when a package has no wheel
+    """
+    run_command(
+        [
+            str(pip_path),
+            "download",
+            "--no-deps",
+            "--only-binary=:all:",
+            *_index_args(wheelhouse),
+            "-d",
+            str(download_dir),
+            *requirements,
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )  # nosec B603
+
+
+def install_from_wheel_store(
+    pip_path: Path,
+    packages: List[Dict[str, str]],
+    vendor_dir: Path,
+    jobs: int = 1,
+    wheelhouse: Optional[Path] = None,
+) -> None:
+    """
+    Install resolved packages by hardlinking their unpacked wheels from the store.
+
+    Wheels the store does not have yet are downloaded with pip (without
+    dependencies) and unpacked into it first. Packages that are only available as
+    source distributions are installed with pip instead.
+
+    Args:
+        pip_path: pip of the Pyodide virtual environment
+        packages: Resolved packages, as returned by resolve_vendor_requirements
+        vendor_dir: Directory to install vendored packages to
+        jobs: Number of wheels to download and unpack in parallel
+        wheelhouse: Directory of wheels to install from instead of the index
+
+    Raises:
+        RuntimeError: If downloading or installing fails
+    """
+    unpacked: Dict[str, Path] = {}
+    missing = []
+    for package in packages:
+        name = canonicalize_name(package["name"])
+        store_path = (
+            lookup_unpacked_wheel(package["sha256"]) if package.get("sha256") else None
+        )
+        if store_path is not None:
+            unpacked[name] = store_path
+        else:
+            missing.append(package)
+
+    not_wheels = []
+    if missing:
+        with tempfile.TemporaryDirectory(prefix="vendorpy-wheels-") as download_dir:
+
+            def download(package: Dict[str, str]) -> bool:
+                """Download the wheel of one package, False if it has none."""
+                try:
+                    _download_wheels(
+                        pip_path,
+                        [package["requirement"]],
+                        Path(download_dir),
+                        wheelhouse=wheelhouse,
+                    )
+                except subprocess.CalledProcessError:
+                    return False
+                return True
+
+            if jobs > 1:
+                with ThreadPoolExecutor(max_workers=jobs) as pool:
+                    downloaded = list(pool.map(download, missing))
+                not_wheels = [
+                    package for package, ok in zip(missing, downloaded) if not ok
+                ]
+            else:
+                try:
+                    _download_wheels(
+                        pip_path,
+                        [package["requirement"] for package in missing],
+                        Path(download_dir),
+                        wheelhouse=wheelhouse,
+                    )
+                except subprocess.CalledProcessError:
+                    # Some packages have no wheel: fetch them one by one to find which
+                    not_wheels = [
+                        package for package in missing if not download(package)
+                    ]
+
+            wheel_paths = sorted(Path(download_dir).glob("*.whl"))
+            with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+                store_paths = list(pool.map(add_wheel_to_store, wheel_paths))
+            for wheel_path, store_path in zip(wheel_paths, store_paths):
+                name, _version, _tags = parse_wheel_filename(wheel_path.name)
+                unpacked[canonicalize_name(name)] = store_path
+
+    for package in packages:
+        store_path = unpacked.get(canonicalize_name(package["name"]))
+        if store_path is not None:
+            link_tree(store_path, vendor_dir)
+
+    if not_wheels:
+        _install_pinned_packages(
+            pip_path, not_wheels, vendor_dir, jobs=jobs, wheelhouse=wheelhouse
+        )
+
+    # Keep the cache within its size budget, sparing the wheels just used
+    prune_cache(keep=list(unpacked.values()))
+
+
+def install_packages_incrementally(
+    pip_path: Path,
+    vendor_file: Path,
+    vendor_dir: Path,
+    use_store: bool = False,
+    jobs: int = 1,
+    wheelhouse: Optional[Path] = None,
+) -> Dict[str, List[str]]:
+    """
+    Bring the vendor directory in line with vendor.txt, touching only what changed.
+
+    The distributions already in vendor_dir (read from their .dist-info RECORD files)
+    are diffed against the resolved set for vendor.txt: added or upgraded packages are
+    installed, and the files of dropped or outdated ones are removed. If neither
+    vendor.txt nor the vendor directory changed since the last run, pip is not
+    invoked at all.
+
+    Args:
+        pip_path: pip of the Pyodide virtual environment
+        vendor_file: Path to the vendor.txt file
+        vendor_dir: Directory to install vendored packages to
+        use_store: Link packages from the content-addressed wheel store
+        jobs: Number of packages to install in parallel
+        wheelhouse: Directory of wheels to install from instead of the index
+
+    Returns:
+        Dictionary with "installed", "removed" and "unchanged" lists of package names
+
+    Raises:
+        RuntimeError: If the resolution or installation fails
+    """
+    requirements_hash = hashlib.sha256(vendor_file.read_bytes()).hexdigest()
+    installed = find_installed_distributions(vendor_dir)
+    installed_versions = {name: dist.version for name, dist in installed.items()}
+
+    # Fast path: same vendor.txt and the vendor directory still matches its resolution
+    state = _read_incremental_state(vendor_dir)
+    if (
+        state.get("requirements_hash") == requirements_hash
+        and state.get("resolved") == installed_versions
+    ):
+        return {
+            "installed": [],
+            "removed": [],
+            "unchanged": sorted(dist.name for dist in installed.values()),
+        }
+
+    resolved = resolve_vendor_requirements(pip_path, vendor_file, wheelhouse)
+
+    to_remove = [
+        dist
+        for name, dist in installed.items()
+        if name not in resolved or resolved[name]["version"] != dist.version
+    ]
+    to_install = [
+        package
+        for name, package in resolved.items()
+        if installed_versions.get(name) != package["version"]
+    ]
+
+    for dist in to_remove:
+        remove_distribution(dist, vendor_dir)
+
+    if to_install:
+        if use_store:
+            install_from_wheel_store(
+                pip_path, to_install, vendor_dir, jobs=jobs, wheelhouse=wheelhouse
+            )
+        else:
+            _install_pinned_packages(
+                pip_path, to_install, vendor_dir, jobs=jobs, wheelhouse=wheelhouse
+            )
+
+    _write_incremental_state(
+        vendor_dir,
+        {
+            "requirements_hash": requirements_hash,
+            "resolved": {
+                name: package["version"] for name, package in resolved.items()
+            },
+        },
+    )
+
+    changed = {dist.canonical_name for dist in to_remove} | {
+        canonicalize_name(package["name"]) for package in to_install
+    }
+    return {
+        "installed": sorted(package["name"] for package in to_install),
+        "removed": sorted(
+            dist.name for dist in to_remove if dist.canonical_name not in resolved
+        ),
+        "unchanged": sorted(
+            package["name"] for name, package in resolved.items() if name not in changed
+        ),
+    }
+
+
+def read_vendor_requirements(vendor_file: Path) -> List[str]:
+    """
+    Read the requirements listed in a vendor.txt file.
+
+    Args:
+        vendor_file: Path to the vendor.txt file
+
+    Returns:
+        Requirement lines, without blank lines and comments
+    """
+    requirements = []
+    with open(vendor_file, "r") as f:
+        for line in f:
+            line = line.split(" #", 1)[0].strip()
+            if line and not line.startswith("#"):
+                requirements.append(line)
+    return requirements
+
+
+def install_packages_natively(
+    vendor_file: Path,
+    vendor_dir: Path,
+    wheelhouse: Optional[Path] = None,
+    python_version: str = "3.12",
+) -> Tuple[Dict[str, List[str]], List[str]]:
+    """
+    Install pure-Python packages in-process, without the Pyodide toolchain.
+
+    vendor.txt is resolved against the wheels available locally (the wheelhouse
+    and the wheel store), and pure-Python (py3-none-any) wheels are unpacked into
+    the store and hardlinked into vendor_dir. Requirements that need a
+    Pyodide-specific wheel, are not available locally, or use pip options are
+    returned so they can be installed with install_fallback_packages. Installed
+    distributions that are neither resolved nor left to the fallback are removed.
+
+    Args:
+        vendor_file: Path to the vendor.txt file
+        vendor_dir: Directory to install vendored packages to
+        wheelhouse: Directory of .whl files to install from, besides the wheel store
+        python_version: The Python version of the Workers runtime
+
+    Returns:
+        Tuple of the install summary ("installed", "removed" and "unchanged" lists
+        of package names) and the requirements left for the Pyodide toolchain
+    """
+    requirements = read_vendor_requirements(vendor_file)
+    summary: Dict[str, List[str]] = {"installed": [], "removed": [], "unchanged": []}
+
+    # pip options (index URLs, constraints, ...) can only be honoured by pip
+    if any(line.startswith("-") for line in requirements):
+        return summary, requirements
+
+    index = build_wheel_index([wheelhouse] if wheelhouse else [])
+    resolved, fallback = resolve_pure_python(requirements, index, python_version)
+
+    fallback_names = set()
+    for line in fallback:
+        try:
+            fallback_names.add(canonicalize_name(Requirement(line).name))
+        except InvalidRequirement:
+            continue
+
+    vendor_dir.mkdir(parents=True, exist_ok=True)
+    installed = find_installed_distributions(vendor_dir)
+    for name, dist in sorted(installed.items()):
+        if name not in resolved and name not in fallback_names:
+            remove_distribution(dist, vendor_dir)
+            summary["removed"].append(dist.name)
+
+    # Store entries linked into vendor_dir, which pruning the cache must not evict
+    store_paths = []
+    for name, candidate in sorted(resolved.items()):
+        current = installed.get(name)
+        if current is not None and current.version == str(candidate.version):
+            summary["unchanged"].append(candidate.name)
+            store_path = candidate.store_path
+            if store_path is None and candidate.wheel_path is not None:
+                store_path = lookup_unpacked_wheel(hash_file(candidate.wheel_path))
+            if store_path is not None:
+                store_paths.append(store_path)
+            continue
+        if current is not None:
+            remove_distribution(current, vendor_dir)
+
+        store_path = candidate.store_path
+        if store_path is None and candidate.wheel_path is not None:
+            store_path = add_wheel_to_store(candidate.wheel_path)
+        if store_path is not None:
+            link_tree(store_path, vendor_dir)
+            store_paths.append(store_path)
+            summary["installed"].append(candidate.name)
+
+    prune_cache(keep=store_paths)
+    return summary, fallback
+
+
+def install_fallback_packages(
+    pyodide_venv_path: Path,
+    requirements: List[str],
+    vendor_dir: Path,
+    wheelhouse: Optional[Path] = None,
+) -> Dict[str, List[str]]:
+    """
+    Install the requirements the native installer could not handle with pip.
+
+    The requirements are installed (with their dependencies) by the Pyodide
+    environment's pip into a staging directory and merged into vendor_dir. Where
+    pip picked a different build of a package that was installed natively, pip's
+    version wins.
+
+    Args:
+        pyodide_venv_path: Path to the Pyodide virtual environment
+        requirements: Requirements returned by install_packages_natively
+        vendor_dir: Directory to install vendored packages to
+        wheelhouse: Directory of wheels to install from instead of the index
+
+    Returns:
+        Dictionary with "installed", "removed" and "unchanged" lists of package names
+
+    Raises:
+        FileNotFoundError: If the pip command is not found
+        RuntimeError: If the installation fails
+    """
+    pip_path = _get_pyodide_pip(pyodide_venv_path)
+    vendor_dir.mkdir(parents=True, exist_ok=True)
+
+    staging_dir = Path(
+        tempfile.mkdtemp(prefix=f".{vendor_dir.name}-", dir=vendor_dir.parent)
+    )
+    try:
+        run_command(
+            [
+                str(pip_path),
+                "install",
+                *_index_args(wheelhouse),
+                "-t",
+                str(staging_dir),
+                *requirements,
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        )  # nosec B603
+
+        staged = find_installed_distributions(staging_dir)
+        installed = find_installed_distributions(vendor_dir)
+        for name in staged:
+            if name in installed:
+                remove_distribution(installed[name], vendor_dir)
+        merge_tree(staging_dir, vendor_dir)
+    except subprocess.CalledProcessError as err:
+        error_output = err.stderr if err.stderr else "Unknown error"
+        raise RuntimeError(f"Failed to install packages: {error_output}") from err
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    return {
+        "installed": sorted(dist.name for dist in staged.values()),
+        "removed": [],
+        "unchanged": [],
+    }
+
+
+def install_packages_to_vendor(
+    pyodide_venv_path: Path,
+    vendor_file: Path,
+    vendor_dir: Path,
+    incremental: bool = False,
+    use_store: bool = False,
+    jobs: int = 1,
+    wheelhouse: Optional[Path] = None,
+) -> Dict[str, List[str]]:
     """
     Install packages to the vendor directory.
 
@@ -310,6 +1567,17 @@ def install_packages_to_vendor(
         pyodide_venv_path: Path to the Pyodide virtual environment
         vendor_file: Path to the vendor.txt file
         vendor_dir: Directory to install vendored packages to
+        incremental: Only install added/upgraded packages and remove dropped ones,
+            instead of reinstalling everything in vendor.txt
+        use_store: Hardlink packages from the content-addressed wheel store shared
+            by all projects, instead of unpacking a private copy with pip
+        jobs: Resolve vendor.txt once, then fetch and unpack this many packages
+            in parallel instead of running a single pip install
+        wheelhouse: Directory of wheels to install from instead of the package
+            index, so no network access is needed
+
+    Returns:
+        Dictionary with "installed", "removed" and "unchanged" lists of package names
 
     Raises:
         FileNotFoundError: If the vendor.txt file or pip command is not found
@@ -327,17 +1595,59 @@ def install_packages_to_vendor(
     vendor_dir.mkdir(parents=True, exist_ok=True)
 
     # Check if pip exists in the Pyodide environment
-    pip_path = pyodide_venv_path / "bin" / "pip"
-    if not pip_path.exists():
-        raise FileNotFoundError(
-            f"pip not found in Pyodide environment at {pip_path}. "
-            "Make sure the Pyodide environment was created correctly."
+    pip_path = _get_pyodide_pip(pyodide_venv_path)
+
+    if incremental:
+        return install_packages_incrementally(
+            pip_path,
+            vendor_file,
+            vendor_dir,
+            use_store=use_store,
+            jobs=jobs,
+            wheelhouse=wheelhouse,
         )
 
+    if use_store or jobs > 1:
+        resolved = resolve_vendor_requirements(pip_path, vendor_file, wheelhouse)
+        if not resolved:
+            raise RuntimeError(
+                f"No packages were installed to {vendor_dir}. "
+                "Check your vendor.txt file and make sure the packages are available."
+            )
+        if use_store:
+            install_from_wheel_store(
+                pip_path,
+                list(resolved.values()),
+                vendor_dir,
+                jobs=jobs,
+                wheelhouse=wheelhouse,
+            )
+        else:
+            _install_pinned_packages(
+                pip_path,
+                list(resolved.values()),
+                vendor_dir,
+                jobs=jobs,
+                wheelhouse=wheelhouse,
+            )
+        return {
+            "installed": sorted(package["name"] for package in resolved.values()),
+            "removed": [],
+            "unchanged": [],
+        }
+
     try:
         # Install packages to vendor directory
-        result = subprocess.run(
-            [str(pip_path), "install", "-t", str(vendor_dir), "-r", str(vendor_file)],
+        result = run_command(
+            [
+                str(pip_path),
+                "install",
+                *_index_args(wheelhouse),
+                "-t",
+                str(vendor_dir),
+                "-r",
+                str(vendor_file),
+            ],
             check=True,
             capture_output=True,
             text=True,
@@ -355,6 +1665,99 @@ def install_packages_to_vendor(
         error_output = err.stderr if err.stderr else "Unknown error"
         raise RuntimeError(f"Failed to install packages: {error_output}") from err
 
+    return {
+        "installed": sorted(
+            dist.name for dist in find_installed_distributions(vendor_dir).values()
+        ),
+        "removed": [],
+        "unchanged": [],
+    }
+
+
+def build_wheelhouse(
+    wheelhouse: Path,
+    vendor_file: Path,
+    venv_path: Path,
+    pyodide_venv_path: Path,
+    pyodide_build_version: Optional[str] = None,
+) -> List[str]:
+    """
+    Prefetch every distribution needed to vendor offline into a wheelhouse.
+
+    pyodide-build (and pip, to seed environments) is downloaded for the toolchain's
+    interpreter, and the packages in vendor.txt for Pyodide, each together with all
+    of its dependencies in a single bulk `pip download`. The Pyodide cross-build
+    environment `pyodide venv` needs is installed into the wheelhouse too.
+
+    Args:
+        wheelhouse: Directory to download the distributions to
+        vendor_file: Path to the vendor.txt file
+        venv_path: Path to the toolchain virtual environment
+        pyodide_venv_path: Path to the Pyodide virtual environment
+        pyodide_build_version: Version of pyodide-build to fetch, or None for the latest
+
+    Returns:
+        File names of the distributions in the wheelhouse
+
+    Raises:
+        FileNotFoundError: If pip or pyodide is not found in one of the environments
+        RuntimeError: If downloading fails
+    """
+    host_pip = venv_path / "bin" / "pip"
+    if not host_pip.exists():
+        raise FileNotFoundError(f"pip not found in virtual environment at {host_pip}")
+    pyodide_path = venv_path / "bin" / "pyodide"
+    if not pyodide_path.exists():
+        raise FileNotFoundError(
+            f"pyodide not found in virtual environment at {pyodide_path}"
+        )
+    pyodide_pip = _get_pyodide_pip(pyodide_venv_path)
+
+    requirement = (
+        f"pyodide-build=={pyodide_build_version}"
+        if pyodide_build_version
+        else "pyodide-build"
+    )
+    wheelhouse.mkdir(parents=True, exist_ok=True)
+    try:
+        run_command(
+            [str(host_pip), "download", "-d", str(wheelhouse), "pip", requirement],
+            check=True,
+            capture_output=True,
+            text=True,
+        )  # nosec B603
+        run_command(
+            [
+                str(pyodide_path),
+                "xbuildenv",
+                "install",
+                "--path",
+                str(wheelhouse / WHEELHOUSE_XBUILDENV_DIR),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        )  # nosec B603
+        run_command(
+            [
+                str(pyodide_pip),
+                "download",
+                "--prefer-binary",
+                "-d",
+                str(wheelhouse),
+                "-r",
+                str(vendor_file),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        )  # nosec B603
+    except subprocess.CalledProcessError as err:
+        error_output = err.stderr if err.stderr else "Unknown error"
+        raise RuntimeError(f"Failed to download packages: {error_output}") from err
+
+    return sorted(path.name for path in wheelhouse.iterdir() if path.is_file())
+
 
 def find_wrangler_config() -> Optional[Tuple[Path, str]]:
     """
@@ -379,7 +1782,7 @@ def find_wrangler_config() -> Optional[Tuple[Path, str]]:
 
 
 def is_vendor_rule_present(
-    config_data: Union[Dict[str, Any], str], config_type: str
+    config_data: Union[Dict[str, Any], str], config_type: str, glob: str = VENDOR_GLOB
 ) -> bool:
     """
     Check if the vendor rule is already present in the configuration.
@@ -387,6 +1790,7 @@ def is_vendor_rule_present(
     Args:
         config_data: The parsed configuration data or content string
         config_type: Type of configuration file ('toml' or 'jsonc')
+        glob: Glob of the files the rule uploads as Data modules
 
     Returns:
         True if the vendor rule is present, False otherwise
@@ -403,7 +1807,7 @@ def is_vendor_rule_present(
         for rule in rules:
             if (
                 isinstance(rule, dict)
-                and rule.get("globs") == ["vendor/**"]
+                and rule.get("globs") == [glob]
                 and rule.get("type") == "Data"
                 and rule.get("fallthrough") is True
             ):
@@ -413,12 +1817,12 @@ def is_vendor_rule_present(
 
     elif config_type == "jsonc":
         # For JSONC, we'll check the string content since parsing JSONC is more complex
-        vendor_pattern = '"globs":\\s*\\[\\s*"vendor/\\*\\*"\\s*\\]'
+        import re
+
+        vendor_pattern = '"globs":\\s*\\[\\s*' + re.escape(json.dumps(glob)) + "\\s*\\]"
         data_pattern = '"type":\\s*"Data"'
         fallthrough_pattern = '"fallthrough":\\s*true'
 
-        import re
-
         if (
             isinstance(config_data, str)
             and re.search(vendor_pattern, config_data)
@@ -432,13 +1836,16 @@ def is_vendor_rule_present(
     return False
 
 
-def add_vendor_rule_to_config(config_path: Path, config_type: str) -> bool:
+def add_vendor_rule_to_config(
+    config_path: Path, config_type: str, glob: str = VENDOR_GLOB
+) -> bool:
     """
     Add vendor rule to wrangler configuration if not already present.
 
     Args:
         config_path: Path to the configuration file
         config_type: Type of configuration file ('toml' or 'jsonc')
+        glob: Glob of the files the rule uploads as Data modules
 
     Returns:
         True if the rule was added or already present, False if there was an error
@@ -450,14 +1857,14 @@ def add_vendor_rule_to_config(config_path: Path, config_type: str) -> bool:
                 config_data = tomli.load(f)
 
             # Check if the rule is already present
-            if is_vendor_rule_present(config_data, config_type):
+            if is_vendor_rule_present(config_data, config_type, glob):
                 return True
 
             # Add the rule
             if "rules" not in config_data:
                 config_data["rules"] = []
 
-            vendor_rule = {"globs": ["vendor/**"], "type": "Data", "fallthrough": True}
+            vendor_rule = {"globs": [glob], "type": "Data", "fallthrough": True}
             config_data["rules"].append(vendor_rule)
 
             # Write the updated TOML file
@@ -472,7 +1879,7 @@ def add_vendor_rule_to_config(config_path: Path, config_type: str) -> bool:
                 content = f.read()
 
             # Check if the rule is already present
-            if is_vendor_rule_present(content, config_type):
+            if is_vendor_rule_present(content, config_type, glob):
                 return True
 
             # Simple JSON modification that preserves comments
@@ -485,12 +1892,12 @@ def add_vendor_rule_to_config(config_path: Path, config_type: str) -> bool:
                 # Find the end of the rules array
                 end_pos = rules_match.end()
                 # Insert the vendor rule at the beginning of the rules array
-                vendor_rule_str = """
-  {
-    "globs": ["vendor/**"],
+                vendor_rule_str = f"""
+  {{
+    "globs": [{json.dumps(glob)}],
     "type": "Data",
     "fallthrough": true
-  },"""
+  }},"""
                 # Insert the rule after the opening bracket of the rules array
                 new_content = content[:end_pos] + vendor_rule_str + content[end_pos:]
             else:
@@ -501,18 +1908,16 @@ def add_vendor_rule_to_config(config_path: Path, config_type: str) -> bool:
                     # Invalid JSON
                     return False
 
-                vendor_rule_str = """
+                vendor_rule_str = f"""
   "rules": [
-    {
-      "globs": ["vendor/**"],
+    {{
+      "globs": [{json.dumps(glob)}],
       "type": "Data",
       "fallthrough": true
-    }
+    }}
   ]"""
                 # If there are already properties, add a comma
-                if content[:last_brace].rstrip().endswith("}") or content[
-                    :last_brace
-                ].rstrip().endswith("]"):
+                if not content[:last_brace].rstrip().endswith(("{", ",")):
                     vendor_rule_str = "," + vendor_rule_str
 
                 # Insert the rules array before the final closing brace
@@ -537,10 +1942,15 @@ def add_vendor_rule_to_config(config_path: Path, config_type: str) -> bool:
         return False
 
 
-def configure_wrangler_for_vendor() -> Optional[Tuple[bool, str]]:
+def configure_wrangler_for_vendor(
+    globs: Iterable[str] = (VENDOR_GLOB,),
+) -> Optional[Tuple[bool, str]]:
     """
     Configure wrangler.toml or wrangler.jsonc to include vendor directory.
 
+    Args:
+        globs: Globs of the vendored files to upload as Data modules, one rule each
+
     Returns:
         Tuple containing success status and message, or None if no wrangler config was found
     """
@@ -551,8 +1961,10 @@ def configure_wrangler_for_vendor() -> Optional[Tuple[bool, str]]:
 
     config_path, config_type = config_result
 
-    # Add vendor rule to config
-    success = add_vendor_rule_to_config(config_path, config_type)
+    # Add vendor rules to config
+    success = True
+    for glob in globs:
+        success = add_vendor_rule_to_config(config_path, config_type, glob) and success
 
     if success:
         return True, f"Successfully configured {config_path.name} for vendoring"
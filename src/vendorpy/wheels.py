@@ -0,0 +1,556 @@
+"""
+Content-addressed store of unpacked wheels.
+
+Every wheel is unpacked once into the vendorpy cache, under a key derived from the
+SHA-256 of the wheel file, and then linked into vendor directories with hardlinks
+(falling back to reflinks or plain copies). Projects vendoring the same packages
+share a single copy on disk.
+"""
+
+import base64
+import csv
+import hashlib
+import os
+import shutil
+import zipfile
+from collections import deque
+from dataclasses import dataclass
+from email.parser import HeaderParser
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.specifiers import SpecifierSet
+from packaging.version import InvalidVersion, Version
+
+from .cache import (
+    ENTRY_METADATA_FILE,
+    commit_entry,
+    discard_entry,
+    entry_lock,
+    get_entry_path,
+    list_entries,
+    lookup_entry,
+)
+from .distributions import canonicalize_name
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no fcntl
+    fcntl = None  # type: ignore[assignment]
+
+# Cache namespace holding unpacked wheels, keyed by the wheel's SHA-256
+WHEEL_STORE_NAMESPACE = "wheels"
+
+# ioctl request cloning a file's extents on Linux (btrfs, xfs, ...)
+_FICLONE = 0x40049409
+
+# PEP 508 marker environment of the Pyodide runtime used by Python Workers
+PYODIDE_MARKER_ENVIRONMENT = {
+    "implementation_name": "cpython",
+    "os_name": "posix",
+    "platform_machine": "wasm32",
+    "platform_python_implementation": "CPython",
+    "platform_release": "",
+    "platform_system": "Emscripten",
+    "platform_version": "",
+    "sys_platform": "emscripten",
+}
+
+
+@dataclass
+class WheelCandidate:
+    """A wheel available locally, either as a file or unpacked in the store."""
+
+    name: str
+    version: Version
+    filename: str
+    wheel_path: Optional[Path] = None
+    store_path: Optional[Path] = None
+
+
+def parse_wheel_filename(filename: str) -> Tuple[str, str, List[str]]:
+    """
+    Parse the name, version and compatibility tags of a wheel filename.
+
+    Args:
+        filename: Wheel filename, e.g. "Jinja2-3.1.2-py3-none-any.whl"
+
+    Returns:
+        Tuple of (name, version, tags), with tags expanded from compressed tag
+        sets, e.g. ["py2-none-any", "py3-none-any"] for "py2.py3-none-any"
+
+    Raises:
+        ValueError: If the filename is not a valid wheel filename
+    """
+    if not filename.endswith(".whl"):
+        raise ValueError(f"Not a wheel filename: {filename}")
+
+    parts = filename[: -len(".whl")].split("-")
+    if len(parts) not in (5, 6):
+        raise ValueError(f"Invalid wheel filename: {filename}")
+
+    name, version = parts[0], parts[1]
+    python_tags, abi_tags, platform_tags = parts[-3:]
+    tags = [
+        f"{python_tag}-{abi_tag}-{platform_tag}"
+        for python_tag in python_tags.split(".")
+        for abi_tag in abi_tags.split(".")
+        for platform_tag in platform_tags.split(".")
+    ]
+    return name, version, tags
+
+
+def hash_file(path: Path) -> str:
+    """
+    Compute the SHA-256 hex digest of a file.
+
+    Args:
+        path: File to hash
+
+    Returns:
+        Hexadecimal SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def record_hash(path: Path) -> str:
+    """Compute a RECORD style hash (urlsafe base64 SHA-256) of a file."""
+    digest = hashlib.sha256(path.read_bytes()).digest()
+    return "sha256=" + base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def _install_path(member: str, data_dir: str) -> Optional[str]:
+    """Map a wheel member to its path in a `pip install -t` style target directory."""
+    prefix = f"{data_dir}/"
+    if not member.startswith(prefix):
+        return member
+
+    # <name>.data/<scheme>/<path>
+    scheme, _, path = member[len(prefix) :].partition("/")
+    if scheme in ("purelib", "platlib"):
+        return path
+    if scheme == "scripts":
+        return f"bin/{path}"
+    # headers and data files are not importable and not needed in a Worker
+    return None
+
+
+def unpack_wheel(wheel_path: Path, destination: Path) -> None:
+    """
+    Unpack a wheel the way `pip install -t` lays it out.
+
+    Files from the purelib/platlib schemes land at the root, scripts in bin/, and
+    the .dist-info RECORD is rewritten to list the unpacked files.
+
+    Args:
+        wheel_path: Path to the .whl file
+        destination: Directory to unpack into
+
+    Raises:
+        ValueError: If the wheel contains unsafe paths or has no .dist-info directory
+    """
+    parse_wheel_filename(wheel_path.name)
+    root = destination.resolve()
+    installed = []
+
+    with zipfile.ZipFile(wheel_path) as wheel:
+        members = [info for info in wheel.infolist() if not info.is_dir()]
+        dist_infos = {
+            info.filename.split("/", 1)[0]
+            for info in members
+            if info.filename.split("/", 1)[0].endswith(".dist-info")
+        }
+        if len(dist_infos) != 1:
+            raise ValueError(f"Wheel {wheel_path.name} has no unique .dist-info")
+        dist_info = dist_infos.pop()
+        data_dir = dist_info[: -len(".dist-info")] + ".data"
+
+        for info in members:
+            relative_path = _install_path(info.filename, data_dir)
+            if relative_path is None or relative_path == f"{dist_info}/RECORD":
+                continue
+
+            target = (destination / relative_path).resolve()
+            if root not in target.parents:
+                raise ValueError(
+                    f"Wheel {wheel_path.name} contains an unsafe path: {info.filename}"
+                )
+
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with wheel.open(info) as src, open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+
+            # Preserve the executable bit of scripts and native helpers
+            mode = (info.external_attr >> 16) & 0o777
+            if mode & 0o111:
+                target.chmod(mode | 0o644)
+            installed.append(relative_path)
+
+    installer_path = destination / dist_info / "INSTALLER"
+    installer_path.write_text("vendorpy\n")
+    installed.append(f"{dist_info}/INSTALLER")
+
+    # Rewrite RECORD so it lists the files where they were actually installed
+    with open(destination / dist_info / "RECORD", "w", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        for relative_path in sorted(installed):
+            path = destination / relative_path
+            writer.writerow(
+                [
+                    relative_path,
+                    record_hash(path),
+                    path.stat().st_size,
+                ]
+            )
+        writer.writerow([f"{dist_info}/RECORD", "", ""])
+
+
+def lookup_unpacked_wheel(digest: str) -> Optional[Path]:
+    """
+    Look up an unpacked wheel in the store.
+
+    Args:
+        digest: SHA-256 hex digest of the wheel file
+
+    Returns:
+        Path to the unpacked wheel, or None if the store does not have it
+    """
+    return lookup_entry(WHEEL_STORE_NAMESPACE, digest)
+
+
+def add_wheel_to_store(wheel_path: Path, digest: Optional[str] = None) -> Path:
+    """
+    Unpack a wheel into the store, unless it is already there.
+
+    Args:
+        wheel_path: Path to the .whl file
+        digest: SHA-256 hex digest of the wheel, computed if not given
+
+    Returns:
+        Path to the unpacked wheel in the store
+    """
+    if digest is None:
+        digest = hash_file(wheel_path)
+
+    with entry_lock(WHEEL_STORE_NAMESPACE, digest):
+        cached_path = lookup_unpacked_wheel(digest)
+        if cached_path is not None:
+            return cached_path
+
+        entry_path = get_entry_path(WHEEL_STORE_NAMESPACE, digest)
+        discard_entry(entry_path)
+        entry_path.mkdir(parents=True)
+        try:
+            unpack_wheel(wheel_path, entry_path)
+        except Exception:
+            discard_entry(entry_path)
+            raise
+
+        commit_entry(WHEEL_STORE_NAMESPACE, digest, {"wheel": wheel_path.name})
+    return entry_path
+
+
+def _reflink(source: Path, destination: Path) -> bool:
+    """Try to clone a file with a copy-on-write reflink; return whether it worked."""
+    if fcntl is None:
+        return False
+    try:
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+    except OSError:
+        destination.unlink(missing_ok=True)
+        return False
+    shutil.copystat(source, destination)
+    return True
+
+
+def link_file(source: Path, destination: Path) -> None:
+    """
+    Place a file at destination, sharing storage with source where possible.
+
+    Tries a hardlink first, then a reflink, then falls back to a plain copy. An
+    existing destination file is replaced.
+
+    Args:
+        source: File to link
+        destination: Where to place it
+    """
+    if destination.exists() or destination.is_symlink():
+        destination.unlink()
+    try:
+        os.link(source, destination)
+    except OSError:
+        # Different filesystem or no hardlink support
+        if not _reflink(source, destination):
+            shutil.copy2(source, destination)
+
+
+def link_tree(source: Path, destination: Path) -> List[str]:
+    """
+    Merge a directory tree into destination file by file using link_file.
+
+    Args:
+        source: Directory to link from (e.g. an unpacked wheel in the store)
+        destination: Directory to link into (e.g. the vendor directory)
+
+    Returns:
+        Paths of the linked files, relative to destination
+    """
+    linked = []
+    for root, _dirs, files in os.walk(source):
+        root_path = Path(root)
+        relative_root = root_path.relative_to(source)
+        target_root = destination / relative_root
+        target_root.mkdir(parents=True, exist_ok=True)
+        for name in files:
+            if root_path == source and name == ENTRY_METADATA_FILE:
+                continue
+            link_file(root_path / name, target_root / name)
+            linked.append((relative_root / name).as_posix())
+    return linked
+
+
+def is_pure_python_wheel(filename: str, python_version: str = "3.12") -> bool:
+    """
+    Check whether a wheel is pure Python and installable on the given Python.
+
+    Args:
+        filename: Wheel filename
+        python_version: Target Python version (e.g. "3.12")
+
+    Returns:
+        True if one of the wheel's tags is "py3*-none-any" (or the exact
+        CPython version with no ABI) for the target Python
+    """
+    major, minor = python_version.split(".")[:2]
+    compatible = {
+        "py3",
+        f"py{major}{minor}",
+        f"cp{major}{minor}",
+        *(f"py{major}{m}" for m in range(int(minor))),
+    }
+    try:
+        _name, _version, tags = parse_wheel_filename(filename)
+    except ValueError:
+        return False
+    return any(
+        python_tag in compatible and abi_tag == "none" and platform_tag == "any"
+        for python_tag, abi_tag, platform_tag in (tag.split("-") for tag in tags)
+    )
+
+
+def build_wheel_index(
+    wheelhouses: Optional[List[Path]] = None, include_store: bool = True
+) -> Dict[str, List[WheelCandidate]]:
+    """
+    Index the wheels available locally.
+
+    Args:
+        wheelhouses: Directories containing .whl files
+        include_store: Also index the wheels already unpacked in the wheel store
+
+    Returns:
+        Dictionary mapping canonical names to their candidates
+    """
+    index: Dict[str, List[WheelCandidate]] = {}
+
+    def add(filename: str, **source: Path) -> None:
+        try:
+            name, version, _tags = parse_wheel_filename(filename)
+            candidate = WheelCandidate(name, Version(version), filename, **source)
+        except (ValueError, InvalidVersion):
+            return
+        index.setdefault(canonicalize_name(name), []).append(candidate)
+
+    for wheelhouse in wheelhouses or []:
+        for wheel_path in sorted(wheelhouse.glob("*.whl")):
+            add(wheel_path.name, wheel_path=wheel_path)
+
+    if include_store:
+        for entry in list_entries(WHEEL_STORE_NAMESPACE):
+            if entry.get("wheel"):
+                add(entry["wheel"], store_path=Path(entry["path"]))
+
+    return index
+
+
+def read_requires_dist(candidate: WheelCandidate) -> List[str]:
+    """
+    Read the Requires-Dist metadata of a wheel candidate.
+
+    Args:
+        candidate: Wheel file or unpacked wheel to read
+
+    Returns:
+        The PEP 508 requirement strings the wheel declares
+    """
+    metadata = ""
+    if candidate.store_path is not None:
+        for metadata_path in candidate.store_path.glob("*.dist-info/METADATA"):
+            metadata = metadata_path.read_text(encoding="utf-8", errors="replace")
+    elif candidate.wheel_path is not None:
+        with zipfile.ZipFile(candidate.wheel_path) as wheel:
+            for member in wheel.namelist():
+                if member.count("/") == 1 and member.endswith(".dist-info/METADATA"):
+                    metadata = wheel.read(member).decode("utf-8", errors="replace")
+
+    headers = HeaderParser().parsestr(metadata, headersonly=True)
+    return [str(value) for value in headers.get_all("Requires-Dist") or []]
+
+
+def _requirement_line(
+    requirement: Requirement,
+    specifier: Optional[SpecifierSet] = None,
+    extras: Optional[Set[str]] = None,
+) -> str:
+    """Format a requirement for pip, without its (already evaluated) marker."""
+    line = Requirement(str(requirement))
+    line.marker = None
+    if specifier is not None:
+        line.specifier = specifier
+    if extras is not None:
+        line.extras = extras
+    return str(line)
+
+
+def resolve_pure_python(
+    requirements: List[str],
+    index: Dict[str, List[WheelCandidate]],
+    python_version: str = "3.12",
+) -> Tuple[Dict[str, WheelCandidate], List[str]]:
+    """
+    Resolve requirements to pure-Python wheels from a local index.
+
+    This is a greedy resolver: each package gets the newest pure-Python wheel that
+    satisfies the constraints seen so far. Packages without such a wheel, with a
+    direct URL, or whose constraints conflict are returned unresolved, so they can
+    be installed by the Pyodide toolchain instead, along with their dependencies:
+    only packages required by the requirements through resolved packages are
+    returned resolved.
+
+    Args:
+        requirements: PEP 508 requirement strings (e.g. the lines of vendor.txt)
+        index: Local wheels, as returned by build_wheel_index
+        python_version: Target Python version (e.g. "3.12")
+
+    Returns:
+        Tuple of (resolved candidates by canonical name, unresolved requirements)
+    """
+    environment = {
+        **PYODIDE_MARKER_ENVIRONMENT,
+        "python_version": ".".join(python_version.split(".")[:2]),
+        "python_full_version": python_version,
+        "implementation_version": python_version,
+    }
+
+    def applies(requirement: Requirement, extras: Set[str]) -> bool:
+        if requirement.marker is None:
+            return True
+        return any(
+            requirement.marker.evaluate({**environment, "extra": extra})
+            for extra in extras | {""}
+        )
+
+    resolved: Dict[str, WheelCandidate] = {}
+    specifiers: Dict[str, SpecifierSet] = {}
+    resolved_extras: Dict[str, Set[str]] = {}
+    unresolved: Dict[str, str] = {}
+    # Extras of the unresolved packages pip gets a version range for (not a URL)
+    unresolved_extras: Dict[str, Set[str]] = {}
+    roots: Set[str] = set()
+    dependencies: Dict[str, Set[str]] = {}
+
+    def leave_to_pip(
+        name: str, requirement: Requirement, specifier: SpecifierSet, extras: Set[str]
+    ) -> None:
+        # pip must honour every constraint seen so far, not just this one
+        specifiers[name] = specifier
+        unresolved_extras[name] = extras
+        unresolved[name] = _requirement_line(requirement, specifier, extras)
+
+    queue: Deque[Tuple[str, Set[str], Optional[str]]] = deque(
+        (line, set(), None) for line in requirements
+    )
+    while queue:
+        line, parent_extras, parent = queue.popleft()
+        try:
+            requirement = Requirement(line)
+        except InvalidRequirement:
+            unresolved[line] = line
+            continue
+
+        name = canonicalize_name(requirement.name)
+        if not applies(requirement, parent_extras):
+            continue
+        if parent is None:
+            roots.add(name)
+        else:
+            dependencies.setdefault(parent, set()).add(name)
+
+        specifier = specifiers.get(name, SpecifierSet()) & requirement.specifier
+        extras = set(requirement.extras)
+
+        if name in unresolved:
+            if name in unresolved_extras and not requirement.url:
+                leave_to_pip(
+                    name, requirement, specifier, unresolved_extras[name] | extras
+                )
+            continue
+
+        if requirement.url:
+            unresolved[name] = _requirement_line(requirement)
+            resolved.pop(name, None)
+            continue
+
+        if name in resolved:
+            if not specifier.contains(resolved[name].version, prereleases=True):
+                # Conflicting constraints: leave this package to pip's resolver
+                del resolved[name]
+                leave_to_pip(
+                    name, requirement, specifier, resolved_extras[name] | extras
+                )
+                continue
+            specifiers[name] = specifier
+            new_extras = extras - resolved_extras[name]
+            if not new_extras:
+                continue
+            resolved_extras[name] |= new_extras
+            candidate = resolved[name]
+        else:
+            candidates = [
+                candidate
+                for candidate in index.get(name, [])
+                if is_pure_python_wheel(candidate.filename, python_version)
+                and specifier.contains(candidate.version)
+            ]
+            if not candidates:
+                leave_to_pip(name, requirement, specifier, extras)
+                continue
+            candidate = max(candidates, key=lambda c: c.version)
+            resolved[name] = candidate
+            specifiers[name] = specifier
+            resolved_extras[name] = extras
+            new_extras = extras
+
+        for dependency in read_requires_dist(candidate):
+            queue.append((dependency, new_extras, name))
+
+    # Dependencies queued by a package that ended up unresolved are left to pip too,
+    # unless a resolved package also requires them
+    reachable: Set[str] = set()
+    stack = [name for name in roots if name in resolved]
+    while stack:
+        name = stack.pop()
+        if name not in reachable:
+            reachable.add(name)
+            stack.extend(d for d in dependencies.get(name, ()) if d in resolved)
+
+    return (
+        {name: resolved[name] for name in resolved if name in reachable},
+        list(unresolved.values()),
+    )
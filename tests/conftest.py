@@ -1,3 +1,55 @@
 """
 Pytest configuration file.
 """
+
+import zipfile
+
+import pytest
+
+
+def _make_distribution(target_dir, name, version, files):
+    """Create a fake installed distribution with a METADATA and RECORD file."""
+    dist_info = target_dir / f"{name.replace('-', '_')}-{version}.dist-info"
+    dist_info.mkdir(parents=True)
+    (dist_info / "METADATA").write_text(
+        f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n"
+    )
+    for relative_path, content in files.items():
+        path = target_dir / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    record = [f"{path},sha256=abc,{len(content)}" for path, content in files.items()]
+    record.append(f"{dist_info.name}/METADATA,,")
+    record.append(f"{dist_info.name}/RECORD,,")
+    (dist_info / "RECORD").write_text("\n".join(record) + "\n")
+    return dist_info
+
+
+@pytest.fixture
+def make_distribution():
+    """Factory fixture creating fake installed distributions."""
+    return _make_distribution
+
+
+def _make_wheel(directory, name="demo", version="1.0", files=None, requires=()):
+    """Build a minimal wheel file."""
+    wheel_path = directory / f"{name}-{version}-py3-none-any.whl"
+    dist_info = f"{name}-{version}.dist-info"
+    files = files or {f"{name}/__init__.py": "x = 1\n"}
+    with zipfile.ZipFile(wheel_path, "w") as wheel:
+        for path, content in files.items():
+            wheel.writestr(path, content)
+        wheel.writestr(
+            f"{dist_info}/METADATA",
+            f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n"
+            + "".join(f"Requires-Dist: {requirement}\n" for requirement in requires),
+        )
+        wheel.writestr(f"{dist_info}/WHEEL", "Wheel-Version: 1.0\n")
+        wheel.writestr(f"{dist_info}/RECORD", "")
+    return wheel_path
+
+
+@pytest.fixture
+def make_wheel():
+    """Factory fixture building minimal wheel files."""
+    return _make_wheel
@@ -0,0 +1,93 @@
+"""
+Tests for the vendorpy artifacts module.
+"""
+
+from vendorpy.artifacts import (
+    compute_artifact_key,
+    get_artifact_path,
+    restore_artifact,
+    store_artifact,
+)
+
+
+def test_compute_artifact_key(tmp_path):
+    """Test that the key changes with every input of the vendor directory."""
+    vendor_file = tmp_path / "vendor.txt"
+    vendor_file.write_text("jinja2\n")
+    vendor_dir = tmp_path / "src" / "vendor"
+    lockfile = tmp_path / "uv.lock"
+
+    def key(**overrides):
+        args = {
+            "vendor_file": vendor_file,
+            "vendor_dir": vendor_dir,
+            "python_version": "3.12",
+            "pyodide_build_version": None,
+            "options": {"prune": "safe"},
+            "lockfile": lockfile,
+            **overrides,
+        }
+        return compute_artifact_key(**args)
+
+    base = key()
+    assert key() == base
+    assert key(python_version="3.13") != base
+    assert key(pyodide_build_version="0.29.3") != base
+    assert key(options={"prune": None}) != base
+    lockfile.write_text("version = 1\n")
+    assert key() != base
+    vendor_file.write_text("jinja2==3.1.4\n")
+    assert key() != base
+
+    # The distributions pip resolves to, and the wheelhouse they come from
+    jinja2 = {"requirement": "jinja2==3.1.4", "sha256": ""}
+    resolved = key(resolved={"jinja2": jinja2})
+    assert key(resolved={"jinja2": jinja2}) == resolved
+    assert key(resolved={"jinja2": {**jinja2, "requirement": "jinja2==3.1.5"}}) != (
+        resolved
+    )
+    wheelhouse = tmp_path / "wheels"
+    wheelhouse.mkdir()
+    (wheelhouse / "jinja2-3.1.4-py3-none-any.whl").write_bytes(b"wheel")
+    with_wheelhouse = key(wheelhouse=wheelhouse)
+    assert with_wheelhouse != key()
+    (wheelhouse / "jinja2-3.1.4-py3-none-any.whl").write_bytes(b"rebuilt")
+    assert key(wheelhouse=wheelhouse) != with_wheelhouse
+
+    # Tree-shaking makes the key depend on the project sources
+    entry_point = tmp_path / "src" / "worker.py"
+    entry_point.parent.mkdir()
+    entry_point.write_text("import jinja2\n")
+    shaken = key(entry_point=entry_point)
+    entry_point.write_text("import jinja2.ext\n")
+    assert key(entry_point=entry_point) != shaken
+
+
+def test_store_and_restore_artifact(tmp_path, monkeypatch):
+    """Test that a vendor directory and its extra files are restored as stored."""
+    monkeypatch.chdir(tmp_path)
+    cache_dir = tmp_path / "cache"
+    vendor_dir = tmp_path / "src" / "vendor"
+    (vendor_dir / "demo").mkdir(parents=True)
+    (vendor_dir / "demo" / "__init__.py").write_text("x = 1\n")
+    bundle = tmp_path / "src" / "vendor.zip"
+    bundle.write_bytes(b"PK")
+
+    assert not restore_artifact(cache_dir, "abc", vendor_dir)
+    artifact_path = store_artifact(cache_dir, "abc", vendor_dir, [bundle])
+    assert artifact_path == get_artifact_path(cache_dir, "abc")
+    assert [p.name for p in cache_dir.iterdir()] == ["abc.tar.gz"]
+
+    # Stale files are replaced by the archived ones
+    (vendor_dir / "demo" / "__init__.py").write_text("x = 2\n")
+    (vendor_dir / "stale.py").write_text("")
+    bundle.unlink()
+
+    assert restore_artifact(cache_dir, "abc", vendor_dir)
+    assert (vendor_dir / "demo" / "__init__.py").read_text() == "x = 1\n"
+    assert not (vendor_dir / "stale.py").exists()
+    assert bundle.read_bytes() == b"PK"
+    assert sorted(p.name for p in vendor_dir.parent.iterdir()) == [
+        "vendor",
+        "vendor.zip",
+    ]
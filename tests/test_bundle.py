@@ -0,0 +1,96 @@
+"""
+Tests for the vendorpy bundle module.
+"""
+
+import sys
+import zipfile
+
+import pytest
+
+from vendorpy.bundle import bundle_vendor_dir, load_bundle_exclusions
+from vendorpy.profiling import run_command
+
+
+def make_vendor_dir(root, make_distribution):
+    """Vendor a pure-Python, an excluded and an extension module distribution."""
+    vendor_dir = root / "vendor"
+    make_distribution(
+        vendor_dir,
+        "demo",
+        "1.0",
+        {
+            "demo/__init__.py": "from .sub import VALUE\n",
+            "demo/sub.py": "VALUE = 42\n",
+            "demo/__pycache__/sub.cpython-312.pyc": "bytecode",
+        },
+    )
+    make_distribution(vendor_dir, "files", "1.0", {"files/__init__.py": ""})
+    make_distribution(vendor_dir, "native", "1.0", {"native/_speedups.so": "elf"})
+    return vendor_dir
+
+
+def test_bundle_vendor_dir(tmp_path, make_distribution):
+    """Test that the bundle is importable and excluded packages stay as files."""
+    vendor_dir = make_vendor_dir(tmp_path, make_distribution)
+
+    bundle = bundle_vendor_dir(vendor_dir, exclude=["Files"])
+
+    assert bundle.archive == tmp_path / "vendor.zip"
+    assert bundle.loader == tmp_path / "vendor_bundle.py"
+    assert bundle.kept == [
+        "files",
+        "files-1.0.dist-info",
+        "native",
+        "native-1.0.dist-info",
+    ]
+    with zipfile.ZipFile(bundle.archive) as archive:
+        names = archive.namelist()
+    assert names == [
+        "demo/",
+        "demo/__init__.py",
+        "demo/sub.py",
+        "demo-1.0.dist-info/",
+        "demo-1.0.dist-info/METADATA",
+        "demo-1.0.dist-info/RECORD",
+    ]
+    assert bundle.files == 4
+    assert sorted(path.name for path in vendor_dir.iterdir()) == bundle.kept
+
+    # The loader makes the bundled packages importable, metadata included
+    code = (
+        "import vendor_bundle, demo, importlib.metadata as m; "
+        "print(demo.VALUE, demo.__file__.split('.zip')[0][-6:], m.version('demo'))"
+    )
+    result = run_command(
+        [sys.executable, "-c", code],
+        cwd=tmp_path,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.split() == ["42", "vendor", "1.0"]
+
+
+def test_bundle_vendor_dir_is_reproducible(tmp_path, make_distribution):
+    """Test that bundling the same files twice gives the same archive."""
+    first = bundle_vendor_dir(make_vendor_dir(tmp_path / "a", make_distribution))
+    second = bundle_vendor_dir(make_vendor_dir(tmp_path / "b", make_distribution))
+
+    assert first.archive.read_bytes() == second.archive.read_bytes()
+    with zipfile.ZipFile(first.archive) as archive:
+        assert {info.date_time for info in archive.infolist()} == {
+            (1980, 1, 1, 0, 0, 0)
+        }
+
+
+def test_load_bundle_exclusions(tmp_path):
+    """Test reading the packages left out of the bundle from pyproject.toml."""
+    pyproject = tmp_path / "pyproject.toml"
+    assert load_bundle_exclusions(pyproject) == []
+
+    pyproject.write_text('[tool.vendorpy.bundle]\nexclude = ["certifi"]\n')
+    assert load_bundle_exclusions(pyproject) == ["certifi"]
+
+    pyproject.write_text("[tool.vendorpy.bundle]\nexclude = 1\n")
+    with pytest.raises(ValueError, match="must be a list"):
+        load_bundle_exclusions(pyproject)
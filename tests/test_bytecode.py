@@ -0,0 +1,108 @@
+"""
+Tests for the vendorpy bytecode module.
+"""
+
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from vendorpy.bytecode import check_bytecode, compile_vendor_dir, expected_magic
+from vendorpy.distributions import find_installed_distributions
+
+# Compile for the Python running the tests
+HOST_VERSION = f"{sys.version_info[0]}.{sys.version_info[1]}"
+HOST_TAG = f"cpython-{sys.version_info[0]}{sys.version_info[1]}"
+
+
+def test_expected_magic():
+    """Test the magic numbers of the supported Python versions."""
+    assert expected_magic("3.12") == (3531).to_bytes(2, "little") + b"\r\n"
+    assert expected_magic("3.12.7") == expected_magic("3.12")
+    with pytest.raises(ValueError, match="Unknown bytecode magic number"):
+        expected_magic("2.7")
+
+
+def test_compile_vendor_dir_alongside(tmp_path, make_distribution):
+    """Test that bytecode is written to __pycache__ and recorded."""
+    make_distribution(
+        tmp_path,
+        "demo",
+        "1.0",
+        {"demo/__init__.py": "x = 1\n", "demo/template.py": "{% if name %}\n"},
+    )
+
+    summary = compile_vendor_dir(tmp_path, HOST_VERSION, "alongside", jobs=2)
+
+    assert summary == {
+        "compiled": ["demo/__init__.py"],
+        "failed": ["demo/template.py"],
+    }
+    pyc = tmp_path / "demo" / "__pycache__" / f"__init__.{HOST_TAG}.pyc"
+    data = pyc.read_bytes()
+    assert data[:4] == expected_magic(HOST_VERSION)
+    # Hash-based bytecode that is never checked against the source
+    assert int.from_bytes(data[4:8], "little") == 0b01
+    assert (tmp_path / "demo" / "__init__.py").exists()
+    dist = find_installed_distributions(tmp_path)["demo"]
+    assert f"demo/__pycache__/__init__.{HOST_TAG}.pyc" in dist.files
+    assert check_bytecode(tmp_path, HOST_VERSION) == []
+
+
+def test_compile_vendor_dir_instead(tmp_path, monkeypatch, make_distribution):
+    """Test that sources are replaced by importable sourceless bytecode."""
+    make_distribution(
+        tmp_path, "sourceless_demo", "1.0", {"sourceless_demo/__init__.py": "x = 42\n"}
+    )
+
+    compile_vendor_dir(tmp_path, HOST_VERSION, "instead")
+
+    assert not (tmp_path / "sourceless_demo" / "__init__.py").exists()
+    assert not (tmp_path / "sourceless_demo" / "__pycache__").exists()
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "sourceless_demo", raising=False)
+    import sourceless_demo
+
+    assert sourceless_demo.x == 42
+    dist = find_installed_distributions(tmp_path)["sourceless-demo"]
+    assert "sourceless_demo/__init__.pyc" in dist.files
+    assert "sourceless_demo/__init__.py" not in dist.files
+
+
+@patch("vendorpy.profiling.subprocess.run")
+def test_compile_vendor_dir_other_python(mock_run, tmp_path):
+    """Test that another interpreter compiles bytecode for other Python versions."""
+    mock_run.return_value = MagicMock(returncode=0)
+
+    compile_vendor_dir(tmp_path / "vendor", "3.99", "instead", jobs=4)
+
+    cmd = mock_run.call_args[0][0]
+    assert cmd[:3] == ["python3.99", "-m", "compileall"]
+    assert cmd[cmd.index("-j") + 1] == "4"
+    assert cmd[cmd.index("--invalidation-mode") + 1] == "unchecked-hash"
+    assert "-b" in cmd
+
+    mock_run.side_effect = FileNotFoundError()
+    with pytest.raises(RuntimeError, match="Python 3.99 is needed"):
+        compile_vendor_dir(tmp_path / "vendor", "3.99")
+
+
+@patch("vendorpy.profiling.subprocess.run")
+def test_compile_vendor_dir_parallel_out_of_process(mock_run, tmp_path):
+    """Test that parallel compilation never forks the vendorpy process."""
+    mock_run.return_value = MagicMock(returncode=0)
+
+    compile_vendor_dir(tmp_path / "vendor", HOST_VERSION, jobs=0)
+
+    cmd = mock_run.call_args[0][0]
+    assert cmd[:3] == [sys.executable, "-m", "compileall"]
+    assert cmd[cmd.index("-j") + 1] == "0"
+
+
+def test_check_bytecode(tmp_path):
+    """Test that bytecode for another Python version is reported."""
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "good.pyc").write_bytes(expected_magic("3.12") + b"\0" * 12)
+    (tmp_path / "pkg" / "bad.pyc").write_bytes(expected_magic("3.11") + b"\0" * 12)
+
+    assert check_bytecode(tmp_path, "3.12") == ["pkg/bad.pyc"]
@@ -0,0 +1,112 @@
+"""
+Tests for the vendorpy cache module.
+"""
+
+import time
+
+import pytest
+
+from vendorpy.cache import (
+    clear_cache,
+    commit_entry,
+    compute_cache_key,
+    get_cache_dir,
+    get_entry_path,
+    list_entries,
+    lookup_entry,
+    parse_size,
+    prune_cache,
+)
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Point the vendorpy cache at a temporary directory."""
+    path = tmp_path / "cache"
+    monkeypatch.setenv("VENDORPY_CACHE_DIR", str(path))
+    return path
+
+
+def _make_entry(namespace, key, size):
+    """Create a committed cache entry holding size bytes."""
+    entry_path = get_entry_path(namespace, key)
+    entry_path.mkdir(parents=True)
+    (entry_path / "payload").write_bytes(b"x" * size)
+    return commit_entry(namespace, key)
+
+
+def test_get_cache_dir(cache_dir, monkeypatch):
+    """Test that the cache directory honours the override and XDG_CACHE_HOME."""
+    assert get_cache_dir() == cache_dir
+
+    monkeypatch.delenv("VENDORPY_CACHE_DIR")
+    monkeypatch.setenv("XDG_CACHE_HOME", "/xdg")
+    assert str(get_cache_dir()) == "/xdg/vendorpy"
+
+
+def test_compute_cache_key():
+    """Test that cache keys are stable and depend on every part."""
+    assert compute_cache_key("3.12.3", "0.29.0") == compute_cache_key(
+        "3.12.3", "0.29.0"
+    )
+    assert compute_cache_key("3.12.3", "0.29.0") != compute_cache_key(
+        "3.12.4", "0.29.0"
+    )
+
+
+def test_parse_size():
+    """Test parsing human readable sizes."""
+    assert parse_size("100") == 100
+    assert parse_size("2K") == 2048
+    assert parse_size("1.5M") == int(1.5 * 1024**2)
+    assert parse_size("2GiB") == 2 * 1024**3
+
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_lookup_entry():
+    """Test that only committed entries are cache hits."""
+    entry_path = get_entry_path("toolchains", "abc")
+    entry_path.mkdir(parents=True)
+    assert lookup_entry("toolchains", "abc") is None
+
+    metadata = commit_entry("toolchains", "abc", {"python_version": "3.12.3"})
+    assert metadata["python_version"] == "3.12.3"
+    assert lookup_entry("toolchains", "abc") == entry_path
+
+
+def test_prune_cache_evicts_least_recently_used():
+    """Test that pruning evicts the least recently used entries first."""
+    _make_entry("toolchains", "old", 100)
+    time.sleep(0.01)
+    _make_entry("toolchains", "new", 100)
+    time.sleep(0.01)
+
+    # Using the old entry makes it the most recently used one
+    lookup_entry("toolchains", "old")
+
+    evicted = prune_cache(max_size=150)
+
+    assert [entry["key"] for entry in evicted] == ["new"]
+    assert [entry["key"] for entry in list_entries()] == ["old"]
+
+
+def test_prune_cache_removes_incomplete_entries():
+    """Test that entries without metadata are removed when pruning."""
+    incomplete = get_entry_path("toolchains", "partial")
+    incomplete.mkdir(parents=True)
+
+    prune_cache()
+
+    assert not incomplete.exists()
+
+
+def test_clear_cache_keeps_entries_in_use():
+    """Test that clearing the cache spares the entries passed as keep."""
+    _make_entry("toolchains", "a", 10)
+    _make_entry("toolchains", "b", 10)
+
+    assert len(prune_cache(max_size=0, keep=[get_entry_path("toolchains", "a")])) == 1
+    assert len(clear_cache()) == 1
+    assert list_entries() == []
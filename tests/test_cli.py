@@ -2,13 +2,18 @@
 Tests for the vendorpy CLI.
 """
 
+import json
+import threading
 from pathlib import Path
 from unittest.mock import patch
 
 from typer.testing import CliRunner as TyperCliRunner
 
+from vendorpy.cache import commit_entry, get_entry_path
 from vendorpy.cli import app
-from vendorpy.utils import CLOUDFLARE_BUILT_IN_PACKAGES
+from vendorpy.manifest import write_manifest
+from vendorpy.staging import staged_vendor_dir, staging_path
+from vendorpy.utils import BUILT_IN_PACKAGES, CLOUDFLARE_BUILT_IN_PACKAGES
 
 
 def test_list_built_in():
@@ -22,6 +27,33 @@ def test_list_built_in():
         assert package in result.stdout
 
 
+def test_list_built_in_from_pyodide_lock(tmp_path, monkeypatch):
+    """Test listing the built-in packages of a pyodide-lock.json."""
+    monkeypatch.setenv("VENDORPY_CACHE_DIR", str(tmp_path / "cache"))
+    lock_dir = tmp_path / "locks"
+    lock_dir.mkdir()
+    for since, version in (("2024-04-01", "1.26.4"), ("2025-01-16", "2.0.2")):
+        (lock_dir / f"{since}.json").write_text(
+            json.dumps({"packages": {"numpy": {"name": "numpy", "version": version}}})
+        )
+
+    runner = TyperCliRunner()
+    result = runner.invoke(
+        app,
+        [
+            "list-built-in",
+            "--pyodide-lock",
+            str(lock_dir),
+            "--compatibility-date",
+            "2024-09-01",
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert "- numpy 1.26.4" in result.stdout
+    assert "fastapi" not in result.stdout
+
+
 def test_cli_help():
     """Test the CLI help command."""
     runner = TyperCliRunner()
@@ -63,6 +95,7 @@ def test_auto_vendor_command(
     mock_create_vendor_file,
     mock_detect_packages,
     tmp_path,
+    monkeypatch,
 ):
     """Test the auto-vendor command."""
     # Mock the detection of packages
@@ -75,6 +108,7 @@ def test_auto_vendor_command(
     mock_create_virtual_env.return_value = Path("/mock/venv")
     mock_create_pyodide_env.return_value = Path("/mock/pyodide-venv")
 
+    monkeypatch.chdir(tmp_path)
     vendor_file = tmp_path / "vendor.txt"
     requirements_file = tmp_path / "requirements.txt"
     vendor_dir = tmp_path / "vendor"
@@ -102,11 +136,22 @@ def test_auto_vendor_command(
     mock_create_vendor_file.assert_called_once_with(
         ["jinja2", "markupsafe"], vendor_file
     )
-    mock_generate_requirements.assert_called_once_with(requirements_file)
+    mock_generate_requirements.assert_called_once_with(
+        requirements_file, BUILT_IN_PACKAGES
+    )
     mock_create_virtual_env.assert_called_once()
-    mock_create_pyodide_env.assert_called_once_with(Path("/mock/venv"))
+    mock_create_pyodide_env.assert_called_once_with(
+        Path("/mock/venv"), use_cache=True, wheelhouse=None
+    )
+    # Packages are installed aside, then swapped in
     mock_install_packages.assert_called_once_with(
-        Path("/mock/pyodide-venv"), vendor_file, vendor_dir
+        Path("/mock/pyodide-venv"),
+        vendor_file,
+        staging_path(vendor_dir),
+        incremental=False,
+        use_store=False,
+        jobs=1,
+        wheelhouse=None,
     )
 
     # Check the output for expected content
@@ -119,15 +164,30 @@ def test_auto_vendor_command(
 
 @patch("vendorpy.cli.detect_packages_to_vendor")
 @patch("vendorpy.cli.create_vendor_file")
+@patch("vendorpy.cli.create_virtual_env")
+@patch("vendorpy.cli.create_pyodide_env")
 def test_auto_vendor_no_packages(
-    mock_create_vendor_file, mock_detect_packages, tmp_path
+    mock_create_pyodide_env,
+    mock_create_virtual_env,
+    mock_create_vendor_file,
+    mock_detect_packages,
+    tmp_path,
+    monkeypatch,
 ):
     """Test the auto-vendor command when no packages need vendoring."""
+    monkeypatch.chdir(tmp_path)
+    # The toolchain is built while the dependencies are analyzed
+    toolchain_started = threading.Event()
+    mock_create_virtual_env.side_effect = lambda *args, **kwargs: (
+        toolchain_started.set()
+    )
+
     # Mock the detection of packages - all are built-in
-    mock_detect_packages.return_value = {
-        "vendor": [],
-        "built_in": ["fastapi", "requests"],
-    }
+    def detect(**kwargs):
+        assert toolchain_started.wait(timeout=5)
+        return {"vendor": [], "built_in": ["fastapi", "requests"]}
+
+    mock_detect_packages.side_effect = detect
 
     vendor_file = tmp_path / "vendor.txt"
     requirements_file = tmp_path / "requirements.txt"
@@ -159,6 +219,28 @@ def test_auto_vendor_no_packages(
     # Check for partial text to avoid formatting issues with newlines/spaces
     assert "already built" in result.stdout
     assert "into Cloudflare Workers" in result.stdout
+    # Nothing was written to the project's .venv-pyodide
+    mock_create_pyodide_env.assert_not_called()
+
+    # With --no-cache, .venv is only rebuilt once there are packages to vendor
+    mock_create_virtual_env.reset_mock()
+    mock_detect_packages.side_effect = None
+    mock_detect_packages.return_value = {"vendor": [], "built_in": ["fastapi"]}
+    result = runner.invoke(
+        app,
+        [
+            "auto-vendor",
+            "--vendor-file",
+            str(vendor_file),
+            "--requirements-file",
+            str(requirements_file),
+            "--vendor-dir",
+            str(vendor_dir),
+            "--no-cache",
+        ],
+    )
+    assert result.exit_code == 0
+    mock_create_virtual_env.assert_not_called()
 
 
 def test_isbuiltin_built_in_package():
@@ -170,6 +252,14 @@ def test_isbuiltin_built_in_package():
     assert "You can use it directly without vendoring" in result.stdout
 
 
+def test_isbuiltin_normalizes_package_name():
+    """Test that the isbuiltin command matches PEP 503 equivalent names."""
+    runner = TyperCliRunner()
+    result = runner.invoke(app, ["isbuiltin", "Charset_Normalizer"])
+    assert result.exit_code == 0
+    assert "charset-normalizer is a built-in package" in result.stdout
+
+
 def test_isbuiltin_non_built_in_package():
     """Test the isbuiltin command with a non-built-in package."""
     runner = TyperCliRunner()
@@ -219,6 +309,7 @@ def test_auto_vendor_command_with_wrangler_config(
     mock_create_vendor_file,
     mock_detect_packages,
     tmp_path,
+    monkeypatch,
 ):
     """Test the auto-vendor command with wrangler configuration."""
     # Mock the detection of packages
@@ -237,6 +328,7 @@ def test_auto_vendor_command_with_wrangler_config(
         "Successfully configured wrangler.toml for vendoring",
     )
 
+    monkeypatch.chdir(tmp_path)
     vendor_file = tmp_path / "vendor.txt"
     requirements_file = tmp_path / "requirements.txt"
     vendor_dir = tmp_path / "vendor"
@@ -264,11 +356,22 @@ def test_auto_vendor_command_with_wrangler_config(
     mock_create_vendor_file.assert_called_once_with(
         ["jinja2", "markupsafe"], vendor_file
     )
-    mock_generate_requirements.assert_called_once_with(requirements_file)
+    mock_generate_requirements.assert_called_once_with(
+        requirements_file, BUILT_IN_PACKAGES
+    )
     mock_create_virtual_env.assert_called_once()
-    mock_create_pyodide_env.assert_called_once_with(Path("/mock/venv"))
+    mock_create_pyodide_env.assert_called_once_with(
+        Path("/mock/venv"), use_cache=True, wheelhouse=None
+    )
+    # Packages are installed aside, then swapped in
     mock_install_packages.assert_called_once_with(
-        Path("/mock/pyodide-venv"), vendor_file, vendor_dir
+        Path("/mock/pyodide-venv"),
+        vendor_file,
+        staging_path(vendor_dir),
+        incremental=False,
+        use_store=False,
+        jobs=1,
+        wheelhouse=None,
     )
     mock_configure_wrangler.assert_called_once()
 
@@ -294,6 +397,7 @@ def test_auto_vendor_command_no_wrangler(
     mock_create_vendor_file,
     mock_detect_packages,
     tmp_path,
+    monkeypatch,
 ):
     """Test the auto-vendor command when no wrangler config is found."""
     # Mock the detection of packages
@@ -309,6 +413,7 @@ def test_auto_vendor_command_no_wrangler(
     # Mock no wrangler config found
     mock_configure_wrangler.return_value = None
 
+    monkeypatch.chdir(tmp_path)
     vendor_file = tmp_path / "vendor.txt"
     requirements_file = tmp_path / "requirements.txt"
     vendor_dir = tmp_path / "vendor"
@@ -337,3 +442,532 @@ def test_auto_vendor_command_no_wrangler(
     # Check the output for expected content
     assert "No wrangler.toml or wrangler.jsonc found" in result.stdout
     assert "Manual Configuration Required" in result.stdout
+
+
+def test_cache_info_and_prune(tmp_path, monkeypatch):
+    """Test the cache info and cache prune commands."""
+    monkeypatch.setenv("VENDORPY_CACHE_DIR", str(tmp_path / "cache"))
+    entry_path = get_entry_path("toolchains", "abc123")
+    entry_path.mkdir(parents=True)
+    (entry_path / "payload").write_bytes(b"x" * 100)
+    commit_entry("toolchains", "abc123")
+
+    runner = TyperCliRunner()
+    result = runner.invoke(app, ["cache", "info"])
+    assert result.exit_code == 0
+    assert "abc123" in result.stdout
+    assert "1 entries" in result.stdout
+
+    result = runner.invoke(app, ["cache", "prune", "--all"])
+    assert result.exit_code == 0
+    assert "Removed 1 cache entries" in result.stdout
+    assert not entry_path.exists()
+
+
+@patch("vendorpy.cli.create_virtual_env")
+@patch("vendorpy.cli.create_pyodide_env")
+@patch("vendorpy.cli.build_wheelhouse")
+def test_wheelhouse_build(
+    mock_build_wheelhouse, mock_create_pyodide_env, mock_create_virtual_env, tmp_path
+):
+    """Test that wheelhouse build downloads into the given directory."""
+    mock_create_virtual_env.return_value = Path("/mock/venv")
+    mock_create_pyodide_env.return_value = Path("/mock/pyodide-venv")
+    mock_build_wheelhouse.return_value = [
+        "jinja2-3.1.4-py3-none-any.whl",
+        "pyodide_build-0.29.0-py3-none-any.whl",
+    ]
+    vendor_file = tmp_path / "vendor.txt"
+    vendor_file.write_text("jinja2\n")
+    wheelhouse = tmp_path / "wheels"
+
+    runner = TyperCliRunner()
+    result = runner.invoke(
+        app,
+        [
+            "wheelhouse",
+            "build",
+            "--wheelhouse",
+            str(wheelhouse),
+            "--vendor-file",
+            str(vendor_file),
+        ],
+    )
+
+    assert result.exit_code == 0
+    mock_build_wheelhouse.assert_called_once_with(
+        wheelhouse,
+        vendor_file,
+        Path("/mock/venv"),
+        Path("/mock/pyodide-venv"),
+        pyodide_build_version=None,
+    )
+    assert "Downloaded 2 distributions" in result.stdout
+
+
+@patch("vendorpy.cli.create_virtual_env")
+@patch("vendorpy.cli.create_pyodide_env")
+@patch("vendorpy.cli.install_packages_to_vendor")
+def test_vendor_prunes_vendor_dir(
+    mock_install_packages,
+    mock_create_pyodide_env,
+    mock_create_virtual_env,
+    tmp_path,
+    monkeypatch,
+    make_distribution,
+):
+    """Test that --prune applies a prune profile after installing."""
+    monkeypatch.chdir(tmp_path)
+    vendor_dir = tmp_path / "vendor"
+    mock_install_packages.side_effect = lambda venv, requirements, target, **kwargs: (
+        make_distribution(
+            target, "demo", "1.0", {"demo/__init__.py": "", "demo/tests/t.py": "x"}
+        )
+    )
+    vendor_file = tmp_path / "vendor.txt"
+    vendor_file.write_text("demo\n")
+
+    runner = TyperCliRunner()
+    args = [
+        "vendor",
+        "--vendor-file",
+        str(vendor_file),
+        "--vendor-dir",
+        str(vendor_dir),
+        "--include-built-in",
+    ]
+    result = runner.invoke(app, [*args, "--prune", "aggressive"])
+
+    assert result.exit_code == 0
+    assert "Pruned 1 files" in result.stdout
+    assert not (vendor_dir / "demo" / "tests").exists()
+
+    result = runner.invoke(app, [*args, "--prune", "unknown"])
+    assert result.exit_code == 1
+    assert "Unknown prune profile: unknown" in result.stdout
+
+
+@patch("vendorpy.cli.create_virtual_env")
+@patch("vendorpy.cli.create_pyodide_env")
+@patch("vendorpy.cli.install_packages_to_vendor")
+def test_vendor_profile(
+    mock_install_packages,
+    mock_create_pyodide_env,
+    mock_create_virtual_env,
+    tmp_path,
+    monkeypatch,
+    make_distribution,
+):
+    """Test that --profile-trace prints the timings and writes a Chrome trace."""
+    monkeypatch.chdir(tmp_path)
+    mock_install_packages.side_effect = lambda venv, requirements, target, **kwargs: (
+        make_distribution(target, "demo", "1.0", {"demo/__init__.py": ""})
+    )
+    vendor_file = tmp_path / "vendor.txt"
+    vendor_file.write_text("demo\n")
+    trace_path = tmp_path / "trace.json"
+
+    runner = TyperCliRunner()
+    result = runner.invoke(
+        app,
+        [
+            "vendor",
+            "--vendor-file",
+            str(vendor_file),
+            "--vendor-dir",
+            str(tmp_path / "vendor"),
+            "--include-built-in",
+            "--prune",
+            "safe",
+            "--profile-trace",
+            str(trace_path),
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert "Profile" in result.stdout
+    assert "critical path" in result.stdout
+    events = json.loads(trace_path.read_text())["traceEvents"]
+    names = {event["name"] for event in events if event["ph"] == "X"}
+    assert {"install", "pip install", "prune", "write manifest"} <= names
+
+
+@patch("vendorpy.cli.create_virtual_env")
+@patch("vendorpy.cli.create_pyodide_env")
+@patch("vendorpy.cli.install_packages_to_vendor")
+def test_vendor_minifies_vendor_dir(
+    mock_install_packages,
+    mock_create_pyodide_env,
+    mock_create_virtual_env,
+    tmp_path,
+    monkeypatch,
+    make_distribution,
+):
+    """Test that --minify minifies the vendored modules after installing."""
+    monkeypatch.chdir(tmp_path)
+    vendor_dir = tmp_path / "vendor"
+    source = 'def f():\n    """Docstring."""\n    return 1  # one\n'
+    mock_install_packages.side_effect = lambda venv, requirements, target, **kwargs: [
+        make_distribution(target, name, "1.0", {f"{name}/__init__.py": source})
+        for name in ("demo", "other")
+    ]
+    vendor_file = tmp_path / "vendor.txt"
+    vendor_file.write_text("demo\nother\n")
+
+    runner = TyperCliRunner()
+    result = runner.invoke(
+        app,
+        [
+            "vendor",
+            "--vendor-file",
+            str(vendor_file),
+            "--vendor-dir",
+            str(vendor_dir),
+            "--include-built-in",
+            "--minify",
+            "--minify-docstrings",
+            "--minify-exclude",
+            "other",
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert "Minified 1 files" in result.stdout
+    assert (
+        vendor_dir / "demo" / "__init__.py"
+    ).read_text() == "def f():\n    return 1\n"
+    assert (vendor_dir / "other" / "__init__.py").read_text() == source
+
+
+@patch("vendorpy.cli.create_virtual_env")
+@patch("vendorpy.cli.create_pyodide_env")
+@patch("vendorpy.cli.install_packages_to_vendor")
+def test_vendor_bundles_vendor_dir(
+    mock_install_packages,
+    mock_create_pyodide_env,
+    mock_create_virtual_env,
+    tmp_path,
+    monkeypatch,
+    make_distribution,
+):
+    """Test that --bundle zip packs the vendor directory into an archive."""
+    monkeypatch.chdir(tmp_path)
+    vendor_dir = tmp_path / "vendor"
+    mock_install_packages.side_effect = lambda venv, requirements, target, **kwargs: (
+        make_distribution(target, "demo", "1.0", {"demo/__init__.py": "x = 1\n"})
+    )
+    vendor_file = tmp_path / "vendor.txt"
+    vendor_file.write_text("demo\n")
+
+    runner = TyperCliRunner()
+    args = [
+        "vendor",
+        "--vendor-file",
+        str(vendor_file),
+        "--vendor-dir",
+        str(vendor_dir),
+        "--include-built-in",
+    ]
+    result = runner.invoke(app, [*args, "--bundle", "zip"])
+
+    assert result.exit_code == 0
+    assert "Bundled 3 files" in result.stdout
+    assert 'globs = ["vendor.zip"]' in result.stdout
+    assert (tmp_path / "vendor.zip").exists()
+    assert (tmp_path / "vendor_bundle.py").exists()
+    assert list(vendor_dir.iterdir()) == []
+    assert "bundle" in (tmp_path / "vendor.lock").read_text()
+
+    result = runner.invoke(app, [*args, "--bundle", "tar"])
+    assert result.exit_code != 0
+
+
+@patch("vendorpy.cli.create_virtual_env")
+@patch("vendorpy.cli.create_pyodide_env")
+@patch("vendorpy.cli.resolve_vendor_file")
+@patch("vendorpy.cli.install_packages_to_vendor")
+def test_vendor_restores_from_artifact_cache(
+    mock_install_packages,
+    mock_resolve,
+    mock_create_pyodide_env,
+    mock_create_virtual_env,
+    tmp_path,
+    monkeypatch,
+    make_distribution,
+):
+    """Test that a second run with the same inputs skips the install."""
+    monkeypatch.chdir(tmp_path)
+    vendor_dir = tmp_path / "vendor"
+    mock_create_virtual_env.return_value = tmp_path / "venv"
+    mock_create_pyodide_env.return_value = tmp_path / "pyodide-venv"
+    demo = {"name": "demo", "version": "1.0", "requirement": "demo==1.0"}
+    mock_resolve.return_value = {"demo": demo}
+    mock_install_packages.side_effect = lambda venv, requirements, target, **kwargs: (
+        make_distribution(target, "demo", "1.0", {"demo/__init__.py": "x = 1\n"})
+    )
+    vendor_file = tmp_path / "vendor.txt"
+    vendor_file.write_text("demo\n")
+
+    runner = TyperCliRunner()
+    args = [
+        "vendor",
+        "--vendor-file",
+        str(vendor_file),
+        "--vendor-dir",
+        str(vendor_dir),
+        "--include-built-in",
+        "--artifact-cache",
+        str(tmp_path / "artifacts"),
+    ]
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0
+    assert "Stored" in result.stdout
+
+    (vendor_dir / "demo" / "__init__.py").unlink()
+    result = runner.invoke(app, args)
+
+    assert result.exit_code == 0
+    assert "Restored" in result.stdout
+    assert mock_install_packages.call_count == 1
+    assert (vendor_dir / "demo" / "__init__.py").read_text() == "x = 1\n"
+
+    # A new upstream release is a miss, installed from scratch
+    mock_resolve.return_value = {"demo": {**demo, "requirement": "demo==1.1"}}
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0
+    assert "Stored" in result.stdout
+    assert mock_install_packages.call_count == 2
+
+    # The budget is checked on the restored tree, which is then rolled back
+    (vendor_dir / "demo" / "__init__.py").unlink()
+    result = runner.invoke(app, [*args, "--budget", "10B"])
+    assert result.exit_code == 1
+    assert "exceeds the size budget" in result.stdout
+    assert not (vendor_dir / "demo" / "__init__.py").exists()
+
+
+def test_size_command(tmp_path, monkeypatch, make_distribution):
+    """Test the size report and its budget check."""
+    monkeypatch.chdir(tmp_path)
+    vendor_dir = tmp_path / "vendor"
+    make_distribution(vendor_dir, "demo", "1.0", {"demo/__init__.py": "x" * 4096})
+
+    runner = TyperCliRunner()
+    result = runner.invoke(app, ["size", "--vendor-dir", str(vendor_dir)])
+    assert result.exit_code == 0
+    assert "demo" in result.stdout
+    assert "Total: 3 files" in result.stdout
+
+    result = runner.invoke(
+        app, ["size", "--vendor-dir", str(vendor_dir), "--budget", "1M"]
+    )
+    assert result.exit_code == 0
+    assert "Within the 1.0 MiB budget" in result.stdout
+
+    (tmp_path / "pyproject.toml").write_text('[tool.vendorpy.size]\nbudget = "10B"\n')
+    result = runner.invoke(app, ["size", "--vendor-dir", str(vendor_dir)])
+    assert result.exit_code == 1
+    assert "Over budget" in result.stdout
+
+
+@patch("vendorpy.cli.install_packages_natively")
+@patch("vendorpy.cli.create_virtual_env")
+@patch("vendorpy.cli.install_packages_to_vendor")
+def test_vendor_native_skips_toolchain(
+    mock_install_packages,
+    mock_create_virtual_env,
+    mock_install_natively,
+    tmp_path,
+    monkeypatch,
+):
+    """Test that the vendor command skips the toolchain when everything is pure Python."""
+    mock_install_natively.return_value = (
+        {"installed": ["jinja2", "markupsafe"], "removed": [], "unchanged": []},
+        [],
+    )
+    monkeypatch.chdir(tmp_path)
+    vendor_file = tmp_path / "vendor.txt"
+    vendor_file.write_text("jinja2\n")
+
+    runner = TyperCliRunner()
+    result = runner.invoke(
+        app,
+        [
+            "vendor",
+            "--vendor-file",
+            str(vendor_file),
+            "--vendor-dir",
+            str(tmp_path / "vendor"),
+            "--include-built-in",
+            "--native",
+        ],
+    )
+
+    assert result.exit_code == 0
+    mock_install_natively.assert_called_once()
+    mock_create_virtual_env.assert_not_called()
+    mock_install_packages.assert_not_called()
+    assert "skipped the Pyodide toolchain" in result.stdout
+    assert "Installed 2, removed 0, unchanged 0 packages" in result.stdout
+
+
+@patch("vendorpy.cli.load_cached_detection")
+@patch("vendorpy.cli.compute_detection_fingerprint")
+@patch("vendorpy.cli.detect_packages_to_vendor")
+@patch("vendorpy.cli.create_vendor_file")
+@patch("vendorpy.cli.generate_requirements")
+@patch("vendorpy.cli.create_virtual_env")
+@patch("vendorpy.cli.create_pyodide_env")
+@patch("vendorpy.cli._setup_and_install")
+@patch("vendorpy.cli.configure_wrangler_for_vendor")
+def test_auto_vendor_reuses_cached_detection(
+    mock_configure_wrangler,
+    mock_setup_and_install,
+    mock_create_pyodide_env,
+    mock_create_virtual_env,
+    mock_generate_requirements,
+    mock_create_vendor_file,
+    mock_detect_packages,
+    mock_fingerprint,
+    mock_load_cached,
+    tmp_path,
+    monkeypatch,
+):
+    """Test that auto-vendor skips detection and vendor.txt when inputs are unchanged."""
+    monkeypatch.chdir(tmp_path)
+    mock_fingerprint.return_value = "abc123"
+    mock_load_cached.return_value = {"vendor": ["jinja2"], "built_in": ["fastapi"]}
+    mock_configure_wrangler.return_value = (True, "Configured wrangler.toml")
+    vendor_file = tmp_path / "vendor.txt"
+    vendor_file.write_text("jinja2\n")
+
+    runner = TyperCliRunner()
+    result = runner.invoke(
+        app,
+        [
+            "auto-vendor",
+            "--vendor-file",
+            str(vendor_file),
+            "--requirements-file",
+            str(tmp_path / "requirements.txt"),
+            "--vendor-dir",
+            str(tmp_path / "vendor"),
+        ],
+    )
+
+    assert result.exit_code == 0
+    mock_load_cached.assert_called_once_with("abc123")
+    mock_detect_packages.assert_not_called()
+    mock_create_vendor_file.assert_not_called()
+    mock_setup_and_install.assert_called_once()
+    assert "reusing the cached analysis" in result.stdout
+    assert "up to date" in result.stdout
+
+
+@patch("vendorpy.cli.load_cached_detection")
+@patch("vendorpy.cli.compute_detection_fingerprint")
+@patch("vendorpy.cli.detect_packages_to_vendor")
+@patch("vendorpy.cli.generate_requirements")
+@patch("vendorpy.cli.create_virtual_env")
+@patch("vendorpy.cli.create_pyodide_env")
+@patch("vendorpy.cli._setup_and_install")
+@patch("vendorpy.cli.configure_wrangler_for_vendor")
+def test_auto_vendor_resume(
+    mock_configure_wrangler,
+    mock_setup_and_install,
+    mock_create_pyodide_env,
+    mock_create_virtual_env,
+    mock_generate_requirements,
+    mock_detect_packages,
+    mock_fingerprint,
+    mock_load_cached,
+    tmp_path,
+    monkeypatch,
+):
+    """Test that --resume restarts auto-vendor at the step that failed."""
+    monkeypatch.chdir(tmp_path)
+    mock_fingerprint.return_value = "abc123"
+    mock_load_cached.return_value = None
+    mock_detect_packages.return_value = {"vendor": ["jinja2"], "built_in": []}
+    requirements_file = tmp_path / "requirements.txt"
+    mock_generate_requirements.side_effect = lambda path, registry: path.touch()
+    (tmp_path / "venv").mkdir()
+    (tmp_path / "pyodide-venv").mkdir()
+    mock_create_virtual_env.return_value = tmp_path / "venv"
+    mock_create_pyodide_env.return_value = tmp_path / "pyodide-venv"
+    mock_setup_and_install.side_effect = RuntimeError("install failed")
+    mock_configure_wrangler.return_value = (True, "Configured wrangler.toml")
+    args = [
+        "auto-vendor",
+        "--vendor-file",
+        str(tmp_path / "vendor.txt"),
+        "--requirements-file",
+        str(requirements_file),
+        "--vendor-dir",
+        str(tmp_path / "vendor"),
+    ]
+
+    runner = TyperCliRunner()
+    result = runner.invoke(app, args)
+    assert result.exit_code == 1
+    assert "install failed" in result.stdout
+
+    mock_setup_and_install.side_effect = None
+    result = runner.invoke(app, [*args, "--resume"])
+    assert result.exit_code == 0
+    # Only the step that failed and those after it ran again
+    mock_detect_packages.assert_called_once()
+    mock_generate_requirements.assert_called_once()
+    mock_create_virtual_env.assert_called_once()
+    mock_create_pyodide_env.assert_called_once()
+    assert mock_setup_and_install.call_count == 2
+    assert mock_setup_and_install.call_args.kwargs["pyodide_venv_path"] == (
+        tmp_path / "pyodide-venv"
+    )
+    mock_configure_wrangler.assert_called_once()
+    assert "Resuming" in result.stdout
+
+    # Without --resume, every step runs again
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0
+    assert mock_detect_packages.call_count == 2
+
+
+def test_verify_command(tmp_path, monkeypatch, make_distribution):
+    """Test that verify reports drift from vendor.lock."""
+    monkeypatch.chdir(tmp_path)
+    vendor_dir = tmp_path / "vendor"
+    make_distribution(vendor_dir, "demo", "1.0", {"demo/__init__.py": "x = 1\n"})
+    vendor_file = tmp_path / "vendor.txt"
+    vendor_file.write_text("demo\n")
+    write_manifest(vendor_dir, vendor_file)
+
+    runner = TyperCliRunner()
+    result = runner.invoke(app, ["verify"])
+    assert result.exit_code == 0
+    assert "matches vendor.lock" in result.stdout
+
+    (vendor_dir / "demo" / "__init__.py").write_text("x = 2\n")
+    result = runner.invoke(app, ["verify"])
+    assert result.exit_code == 1
+    assert "1 modified: demo/__init__.py" in result.stdout
+
+
+def test_rollback_command(tmp_path, monkeypatch):
+    """Test that the rollback command restores the replaced vendor directory."""
+    monkeypatch.chdir(tmp_path)
+    vendor_dir = tmp_path / "vendor"
+    runner = TyperCliRunner()
+
+    result = runner.invoke(app, ["rollback", "--vendor-dir", str(vendor_dir)])
+    assert result.exit_code == 1
+    assert "No previous tree" in result.stdout
+
+    vendor_dir.mkdir()
+    (vendor_dir / "old.py").write_text("old = 1\n")
+    with staged_vendor_dir(vendor_dir) as stage:
+        (stage / "old.py").unlink()
+
+    result = runner.invoke(app, ["rollback", "--vendor-dir", str(vendor_dir)])
+    assert result.exit_code == 0
+    assert (vendor_dir / "old.py").exists()
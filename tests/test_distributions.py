@@ -0,0 +1,47 @@
+"""
+Tests for the vendorpy distributions module.
+"""
+
+from vendorpy.distributions import (
+    canonicalize_name,
+    find_installed_distributions,
+    read_record,
+    remove_distribution,
+)
+
+
+def test_canonicalize_name():
+    """Test PEP 503 name normalization."""
+    assert canonicalize_name("Jinja2") == "jinja2"
+    assert canonicalize_name("zope.interface") == "zope-interface"
+    assert canonicalize_name("typing__extensions") == "typing-extensions"
+
+
+def test_find_installed_distributions(tmp_path, make_distribution):
+    """Test reading distributions and their RECORD files from a target directory."""
+    dist_info = make_distribution(
+        tmp_path, "MarkupSafe", "2.1.3", {"markupsafe/__init__.py": "x = 1\n"}
+    )
+
+    distributions = find_installed_distributions(tmp_path)
+
+    assert list(distributions) == ["markupsafe"]
+    markupsafe = distributions["markupsafe"]
+    assert (markupsafe.name, markupsafe.version) == ("MarkupSafe", "2.1.3")
+    assert "markupsafe/__init__.py" in markupsafe.files
+    assert read_record(dist_info)[0] == ("markupsafe/__init__.py", "sha256=abc", "6")
+
+
+def test_remove_distribution_keeps_shared_directories(tmp_path, make_distribution):
+    """Test that removing a distribution leaves files of other distributions alone."""
+    make_distribution(tmp_path, "ns-a", "1.0", {"ns/a/__init__.py": "a = 1\n"})
+    make_distribution(tmp_path, "ns-b", "1.0", {"ns/b/__init__.py": "b = 1\n"})
+
+    distributions = find_installed_distributions(tmp_path)
+    removed = remove_distribution(distributions["ns-a"], tmp_path)
+
+    assert removed == 3
+    assert not (tmp_path / "ns" / "a").exists()
+    assert not (tmp_path / "ns_a-1.0.dist-info").exists()
+    assert (tmp_path / "ns" / "b" / "__init__.py").exists()
+    assert list(find_installed_distributions(tmp_path)) == ["ns-b"]
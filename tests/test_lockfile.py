@@ -0,0 +1,129 @@
+"""
+Tests for the vendorpy lockfile module.
+"""
+
+from vendorpy.lockfile import LockGraph, load_lockfile
+from vendorpy.utils import extract_project_dependencies
+
+UV_LOCK = """\
+version = 1
+requires-python = "==3.12.*"
+
+[[package]]
+name = "my-worker"
+version = "0.1.0"
+source = { virtual = "." }
+dependencies = [
+    { name = "fastapi" },
+    { name = "jinja2", extra = ["i18n"] },
+    { name = "colorama", marker = "sys_platform == 'win32'" },
+]
+
+[package.dev-dependencies]
+dev = [
+    { name = "pytest" },
+]
+
+[[package]]
+name = "fastapi"
+version = "0.110.0"
+source = { registry = "https://pypi.org/simple" }
+dependencies = [
+    { name = "starlette" },
+]
+
+[[package]]
+name = "starlette"
+version = "0.36.3"
+source = { registry = "https://pypi.org/simple" }
+
+[[package]]
+name = "Jinja2"
+version = "3.1.2"
+source = { registry = "https://pypi.org/simple" }
+dependencies = [
+    { name = "markupsafe" },
+]
+sdist = { url = "https://example.com/jinja2-3.1.2.tar.gz", hash = "sha256:aaa" }
+wheels = [
+    { url = "https://example.com/jinja2-3.1.2-py3-none-any.whl", hash = "sha256:bbb" },
+]
+
+[package.optional-dependencies]
+i18n = [
+    { name = "babel" },
+]
+
+[[package]]
+name = "markupsafe"
+version = "2.1.3"
+source = { registry = "https://pypi.org/simple" }
+
+[[package]]
+name = "babel"
+version = "2.12.1"
+source = { git = "https://github.com/python-babel/babel?rev=master#abc123" }
+
+[[package]]
+name = "colorama"
+version = "0.4.6"
+source = { registry = "https://pypi.org/simple" }
+
+[[package]]
+name = "pytest"
+version = "8.0.0"
+source = { registry = "https://pypi.org/simple" }
+"""
+
+
+def write_lockfile(tmp_path):
+    """Write the sample uv.lock into tmp_path."""
+    lockfile = tmp_path / "uv.lock"
+    lockfile.write_text(UV_LOCK)
+    return lockfile
+
+
+def test_walk(tmp_path):
+    """Test that the walk follows extras and skips dev and non-Pyodide edges."""
+    graph = LockGraph.from_file(write_lockfile(tmp_path))
+
+    assert [root.name for root in graph.roots] == ["my-worker"]
+    assert [p.canonical_name for p in graph.walk()] == [
+        "babel",
+        "fastapi",
+        "jinja2",
+        "markupsafe",
+        "starlette",
+    ]
+    assert "pytest" in [p.name for p in graph.walk(include_dev=True)]
+
+
+def test_export_requirements(tmp_path):
+    """Test rendering requirements.txt with pruned packages."""
+    graph = LockGraph.from_file(write_lockfile(tmp_path))
+
+    requirements = graph.export_requirements(prune=["fastapi"])
+
+    assert "fastapi" not in requirements
+    assert "starlette" not in requirements
+    assert (
+        "Jinja2==3.1.2 \\\n    --hash=sha256:aaa \\\n    --hash=sha256:bbb\n"
+        in requirements
+    )
+    assert "babel @ git+https://github.com/python-babel/babel@abc123\n" in requirements
+    assert "markupsafe==2.1.3\n" in requirements
+
+
+def test_load_lockfile_reuses_graph(tmp_path):
+    """Test that the lockfile is parsed once while it is unchanged."""
+    lockfile = write_lockfile(tmp_path)
+
+    assert load_lockfile(lockfile) is load_lockfile(lockfile)
+    assert load_lockfile(tmp_path / "missing.lock") is None
+
+
+def test_extract_project_dependencies_from_lockfile(tmp_path):
+    """Test that dependencies are read from uv.lock without running uv."""
+    dependencies = extract_project_dependencies(write_lockfile(tmp_path))
+
+    assert dependencies == {"babel", "fastapi", "jinja2", "markupsafe", "starlette"}
@@ -0,0 +1,114 @@
+"""
+Tests for the vendorpy manifest module.
+"""
+
+import hashlib
+import json
+
+import pytest
+
+from vendorpy.manifest import (
+    MANIFEST_FILE,
+    hash_vendor_dir,
+    verify_manifest,
+    write_manifest,
+)
+
+
+@pytest.fixture
+def vendored(tmp_path, monkeypatch, make_distribution):
+    """Vendor a distribution and write its manifest, from tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    vendor_file = tmp_path / "vendor.txt"
+    vendor_file.write_text("demo==1.0\n")
+    vendor_dir = tmp_path / "vendor"
+    make_distribution(
+        vendor_dir, "demo", "1.0", {"demo/__init__.py": "x = 1\n", "demo/py.typed": ""}
+    )
+    (vendor_dir / "stray.txt").write_text("stray")
+    return vendor_dir, vendor_file, write_manifest(vendor_dir, vendor_file)
+
+
+def test_hash_vendor_dir(tmp_path):
+    """Test that files, including empty ones, are hashed like hashlib does."""
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "data.bin").write_bytes(b"\0" * 100_000)
+    (tmp_path / "empty").write_bytes(b"")
+
+    assert hash_vendor_dir(tmp_path, max_workers=2) == {
+        "pkg/data.bin": hashlib.sha256(b"\0" * 100_000).hexdigest(),
+        "empty": hashlib.sha256(b"").hexdigest(),
+    }
+
+
+def test_write_manifest(vendored):
+    """Test the distributions, files and inputs recorded in the manifest."""
+    _vendor_dir, vendor_file, manifest_path = vendored
+
+    assert manifest_path == vendor_file.with_name(MANIFEST_FILE)
+    manifest = json.loads(manifest_path.read_text())
+    assert manifest["requirements"]["sha256"] == (
+        hashlib.sha256(b"demo==1.0\n").hexdigest()
+    )
+    demo = manifest["distributions"]["demo"]
+    assert demo["version"] == "1.0"
+    assert demo["files"]["demo/__init__.py"] == hashlib.sha256(b"x = 1\n").hexdigest()
+    assert list(manifest["(unowned)"]) == ["stray.txt"]
+    assert verify_manifest(manifest_path) == {
+        "modified": [],
+        "missing": [],
+        "added": [],
+        "requirements": [],
+    }
+
+
+def test_verify_manifest_drift(vendored):
+    """Test that modified, missing and added files and new inputs are reported."""
+    vendor_dir, vendor_file, manifest_path = vendored
+    (vendor_dir / "demo" / "__init__.py").write_text("x = 2\n")
+    (vendor_dir / "demo" / "py.typed").unlink()
+    (vendor_dir / "demo" / "extra.py").write_text("")
+    vendor_file.write_text("demo==2.0\n")
+
+    assert verify_manifest(manifest_path) == {
+        "modified": ["demo/__init__.py"],
+        "missing": ["demo/py.typed"],
+        "added": ["demo/extra.py"],
+        "requirements": [vendor_file.as_posix()],
+    }
+
+
+def test_verify_manifest_bundle(vendored):
+    """Test that the bundle archive and its loader are both checked."""
+    vendor_dir, vendor_file, _manifest_path = vendored
+    archive = vendor_dir.with_name("vendor.zip")
+    archive.write_bytes(b"archive")
+    loader = vendor_dir.with_name("vendor_bundle.py")
+    loader.write_text("import sys\n")
+    manifest_path = write_manifest(vendor_dir, vendor_file, bundle_archive=archive)
+
+    bundle = json.loads(manifest_path.read_text())["bundle"]
+    assert bundle["loader"]["sha256"] == hashlib.sha256(b"import sys\n").hexdigest()
+
+    loader.write_text("import os\n")
+    drift = verify_manifest(manifest_path)
+    assert drift["modified"] == [loader.as_posix()]
+    loader.unlink()
+    archive.unlink()
+    drift = verify_manifest(manifest_path)
+    assert drift["missing"] == [archive.as_posix(), loader.as_posix()]
+
+
+def test_verify_manifest_errors(tmp_path):
+    """Test that unreadable or outdated manifests are rejected."""
+    manifest_path = tmp_path / MANIFEST_FILE
+    with pytest.raises(FileNotFoundError):
+        verify_manifest(manifest_path)
+
+    manifest_path.write_text("{")
+    with pytest.raises(ValueError, match="Failed to read"):
+        verify_manifest(manifest_path)
+
+    manifest_path.write_text('{"version": 0}')
+    with pytest.raises(ValueError, match="Unsupported vendor.lock version"):
+        verify_manifest(manifest_path)
@@ -0,0 +1,124 @@
+"""
+Tests for the vendorpy minify module.
+"""
+
+import ast
+import runpy
+
+import pytest
+
+from vendorpy.distributions import find_installed_distributions, read_record
+from vendorpy.minify import load_minify_exclusions, minify_source, minify_vendor_dir
+from vendorpy.wheels import record_hash
+
+SOURCE = b'''"""Module docstring."""
+from typing import TYPE_CHECKING, List
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable  # only for type checkers
+
+
+class Point:
+    """A point."""
+
+    x: int = 0
+
+
+def total(values: List[int]) -> int:
+    """Sum values."""
+    result: int = 0
+    count: int
+    for value in values:  # add them up
+        result += value
+    return result
+'''
+
+
+def test_minify_source(tmp_path):
+    """Test what minification strips and what it keeps."""
+    minified = minify_source(SOURCE, strip_docstrings=True)
+
+    assert "docstring" not in minified
+    assert "A point" not in minified
+    assert "Sum values" not in minified
+    assert "#" not in minified
+    assert "Iterable" not in minified
+    # Annotations the runtime can read are kept, local ones are dropped
+    assert "x: int = 0" in minified
+    assert "def total(values: List[int]) -> int:" in minified
+    assert "result = 0" in minified
+    assert "count: int" in minified
+
+    module_path = tmp_path / "minified.py"
+    module_path.write_text(minified)
+    namespace = runpy.run_path(str(module_path))
+    assert namespace["total"]([1, 2, 3]) == 6
+    assert namespace["Point"].__annotations__ == {"x": int}
+
+
+def test_minify_source_keeps_docstrings_read_at_runtime():
+    """Test that docstrings are only stripped on request, and never if __doc__ is used."""
+    source = (
+        b'def usage():\n    """Usage: demo [--verbose]"""\n\nHELP = usage.__doc__\n'
+    )
+    other_source = source.replace(b"__doc__", b"__name__")
+
+    assert "Usage: demo" in minify_source(source, strip_docstrings=True)
+    assert "Usage: demo" in minify_source(other_source)
+    assert "Usage" not in minify_source(other_source, strip_docstrings=True)
+
+
+def test_minify_source_empty_body():
+    """Test that a body holding only a docstring stays valid."""
+    minified = minify_source(
+        b'class Empty:\n    """Nothing here."""\n', strip_docstrings=True
+    )
+
+    ast.parse(minified)
+    assert "pass" in minified
+
+
+def test_minify_vendor_dir(tmp_path, make_distribution):
+    """Test that modules are minified in place and RECORD is kept accurate."""
+    make_distribution(
+        tmp_path,
+        "demo",
+        "1.0",
+        {
+            "demo/__init__.py": SOURCE.decode(),
+            "demo/template.py": "{% if name %}\n",
+        },
+    )
+    make_distribution(
+        tmp_path, "skipped", "1.0", {"skipped/__init__.py": SOURCE.decode()}
+    )
+    make_distribution(tmp_path, "ply", "3.11", {"ply/yacc.py": SOURCE.decode()})
+
+    report = minify_vendor_dir(tmp_path, exclude=["Skipped"], jobs=2)
+
+    minified = tmp_path / "demo" / "__init__.py"
+    assert list(report) == ["demo"]
+    assert report["demo"]["files"] == 1
+    assert report["demo"]["bytes"] == len(SOURCE) - minified.stat().st_size > 0
+    # Invalid modules, excluded and docstring-reading packages are left alone
+    assert (tmp_path / "demo" / "template.py").read_text() == "{% if name %}\n"
+    assert (tmp_path / "skipped" / "__init__.py").read_bytes() == SOURCE
+    assert (tmp_path / "ply" / "yacc.py").read_bytes() == SOURCE
+
+    dist = find_installed_distributions(tmp_path)["demo"]
+    rows = {row[0]: row for row in read_record(dist.dist_info)}
+    assert rows["demo/__init__.py"][1] == record_hash(minified)
+    assert rows["demo/__init__.py"][2] == str(minified.stat().st_size)
+
+
+def test_load_minify_exclusions(tmp_path):
+    """Test reading the excluded packages from pyproject.toml."""
+    pyproject = tmp_path / "pyproject.toml"
+    assert load_minify_exclusions(pyproject) == []
+
+    pyproject.write_text('[tool.vendorpy.minify]\nexclude = ["docopt"]\n')
+    assert load_minify_exclusions(pyproject) == ["docopt"]
+
+    pyproject.write_text('[tool.vendorpy.minify]\nexclude = "docopt"\n')
+    with pytest.raises(ValueError, match="must be a list"):
+        load_minify_exclusions(pyproject)
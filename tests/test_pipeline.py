@@ -0,0 +1,193 @@
+"""
+Tests for the vendorpy pipeline module.
+"""
+
+import threading
+
+import pytest
+
+from vendorpy.pipeline import (
+    Checkpoints,
+    PipelineStopped,
+    StaleCheckpoint,
+    Step,
+    run_pipeline,
+)
+
+
+def test_independent_steps_run_concurrently():
+    """Test that steps without dependencies between them overlap."""
+    # Both steps must be running at the same time to pass the barrier
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wait_for_other(results):
+        barrier.wait()
+        return threading.get_ident()
+
+    results = run_pipeline(
+        [
+            Step("toolchain", wait_for_other),
+            Step("requirements", wait_for_other),
+            Step(
+                "install",
+                lambda results: sorted(results),
+                requires=("toolchain", "requirements"),
+            ),
+        ]
+    )
+
+    assert results["toolchain"] != results["requirements"]
+    assert results["install"] == ["requirements", "toolchain"]
+
+
+def test_failed_step_stops_dependents():
+    """Test that a failing step is re-raised and its dependents never start."""
+    ran = []
+
+    def fail(results):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        run_pipeline(
+            [
+                Step("detect", fail),
+                Step("install", lambda results: ran.append("install"), ("detect",)),
+            ]
+        )
+
+    assert ran == []
+
+
+def test_stopped_pipeline():
+    """Test ending a pipeline early without an error."""
+
+    def stop(results):
+        raise PipelineStopped()
+
+    results = run_pipeline(
+        [
+            Step("detect", stop),
+            Step("install", lambda results: "installed", requires=("detect",)),
+        ]
+    )
+
+    assert results == {}
+
+
+def test_stopped_pipeline_ignores_running_steps(caplog):
+    """Test that steps still running when the pipeline stops cannot fail it."""
+    detected = threading.Event()
+
+    def stop(results):
+        detected.set()
+        raise PipelineStopped()
+
+    def build_toolchain(results):
+        # Only fails once detection has stopped the pipeline
+        detected.wait(timeout=5)
+        raise RuntimeError("no Python 3.12")
+
+    results = run_pipeline([Step("detect", stop), Step("toolchain", build_toolchain)])
+
+    assert results == {}
+    # The failure is still reported
+    assert "Step toolchain failed after the pipeline stopped: no Python 3.12" in (
+        caplog.text
+    )
+
+
+def test_invalid_pipelines():
+    """Test that unknown dependencies and cycles are rejected."""
+    with pytest.raises(ValueError, match="unknown"):
+        run_pipeline([Step("install", lambda results: None, ("detect",))])
+
+    with pytest.raises(ValueError, match="cycle"):
+        run_pipeline(
+            [
+                Step("a", lambda results: None, ("b",)),
+                Step("b", lambda results: None, ("a",)),
+            ]
+        )
+
+
+def test_checkpoints_skip_unchanged_steps(tmp_path):
+    """Test that resumed pipelines only run the steps whose inputs changed."""
+    state_path = tmp_path / "state"
+    inputs = {"toolchain": "3.12", "vendor": "jinja2"}
+    ran = []
+
+    def steps():
+        def run(name, result):
+            def step(results):
+                ran.append(name)
+                return result
+
+            return step
+
+        def restore_install(result):
+            if result != "installed":
+                raise StaleCheckpoint()
+            return result
+
+        return [
+            Step(
+                "toolchain",
+                run("toolchain", "/venv"),
+                fingerprint=lambda results: inputs["toolchain"],
+            ),
+            Step(
+                "install",
+                run("install", "installed"),
+                requires=("toolchain",),
+                fingerprint=lambda results: inputs["vendor"],
+                restore=restore_install,
+            ),
+            Step("wrangler", run("wrangler", None), requires=("install",)),
+        ]
+
+    run_pipeline(steps(), checkpoints=Checkpoints(state_path))
+    assert ran == ["toolchain", "install", "wrangler"]
+
+    # Unchanged inputs: only the step without a fingerprint runs
+    ran.clear()
+    checkpoints = Checkpoints(state_path)
+    results = run_pipeline(steps(), checkpoints=checkpoints)
+    assert ran == ["wrangler"]
+    assert results["toolchain"] == "/venv"
+    assert checkpoints.resumed == ["toolchain", "install"]
+
+    # A changed input reruns its step
+    ran.clear()
+    inputs["vendor"] = "jinja2\nmarkupsafe"
+    run_pipeline(steps(), checkpoints=Checkpoints(state_path))
+    assert ran == ["install", "wrangler"]
+
+    # Not resuming runs everything, and records the checkpoints again
+    ran.clear()
+    run_pipeline(steps(), checkpoints=Checkpoints(state_path, resume=False))
+    assert ran == ["toolchain", "install", "wrangler"]
+
+
+def test_checkpoints_not_recorded_for_failed_steps(tmp_path):
+    """Test that a failed step runs again on resume, after its restored dependencies."""
+    state_path = tmp_path / "state"
+    ran = []
+
+    def toolchain(results):
+        ran.append("toolchain")
+        return "/venv"
+
+    def fail(results):
+        ran.append("install")
+        raise RuntimeError("boom")
+
+    steps = [
+        Step("toolchain", toolchain, fingerprint=lambda results: "3.12"),
+        Step("install", fail, ("toolchain",), fingerprint=lambda results: "x"),
+    ]
+    with pytest.raises(RuntimeError):
+        run_pipeline(steps, checkpoints=Checkpoints(state_path))
+    with pytest.raises(RuntimeError):
+        run_pipeline(steps, checkpoints=Checkpoints(state_path))
+
+    assert ran == ["toolchain", "install", "install"]
@@ -0,0 +1,100 @@
+"""
+Tests for the vendorpy profiling module.
+"""
+
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from vendorpy.pipeline import Step, run_pipeline
+from vendorpy.profiling import run_command, span, start_profiling, stop_profiling
+
+
+@pytest.fixture
+def profiler():
+    """Record spans for the duration of a test."""
+    profiler = start_profiling()
+    yield profiler
+    stop_profiling()
+
+
+def test_spans_charge_subprocesses_to_their_step(profiler):
+    """Test that a step is charged the CPU time and peak RSS of its subprocesses."""
+    script = "data = bytearray(64 * 1024 * 1024); sum(range(2_000_000))"
+    with span("install", "step"), span("pip install"):
+        result = run_command(
+            [sys.executable, "-c", script], check=True, capture_output=True
+        )
+
+    assert result.returncode == 0
+    step, stage, command = profiler.spans
+    assert (step.name, step.depth) == ("install", 0)
+    assert (stage.name, stage.depth) == ("pip install", 1)
+    assert command.category == "subprocess"
+    assert command.name == f"{sys.executable.rsplit('/', 1)[-1]} -c"
+    assert command.rss >= 64 * 1024 * 1024
+    assert command.cpu > 0
+    assert step.rss == stage.rss == command.rss
+    assert step.cpu >= stage.cpu >= command.cpu
+    assert step.wall >= stage.wall >= command.wall > 0
+
+
+def test_run_command_while_profiling(profiler):
+    """Test that profiled commands behave like subprocess.run."""
+    result = run_command(
+        [sys.executable, "-c", "print('out')"], capture_output=True, text=True
+    )
+    assert result.stdout == "out\n"
+
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        run_command(
+            [sys.executable, "-c", "import sys; sys.exit('boom')"],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+    assert "boom" in excinfo.value.stderr
+    assert profiler.spans[-1].args["returncode"] == 1
+
+    with pytest.raises(FileNotFoundError):
+        run_command(["vendorpy-missing-program"])
+
+
+@patch("vendorpy.profiling.subprocess.run")
+def test_run_command_without_profiling(mock_run):
+    """Test that commands are passed through to subprocess.run when not profiling."""
+    run_command(["uv", "export"], check=True, capture_output=True, text=True)
+
+    mock_run.assert_called_once_with(
+        ["uv", "export"], check=True, capture_output=True, text=True
+    )
+
+
+def test_critical_path_and_trace(profiler):
+    """Test the critical path of a pipeline and its Chrome trace."""
+    run_pipeline(
+        [
+            Step("detect", lambda results: None),
+            Step("requirements", lambda results: None, requires=("detect",)),
+            Step(
+                "toolchain",
+                lambda results: run_command([sys.executable, "-c", "pass"]),
+                requires=("detect",),
+            ),
+            Step("install", lambda results: None, requires=("toolchain",)),
+        ]
+    )
+
+    assert profiler.critical_path() == ["detect", "toolchain", "install"]
+
+    trace = profiler.to_trace()
+    events = {event["name"]: event for event in trace["traceEvents"]}
+    assert events["toolchain"]["ph"] == "X"
+    assert events["toolchain"]["cat"] == "step"
+    assert events["toolchain"]["args"]["requires"] == ["detect"]
+    command = next(e for e in trace["traceEvents"] if e.get("cat") == "subprocess")
+    assert command["tid"] == events["toolchain"]["tid"]
+    assert command["dur"] <= events["toolchain"]["dur"]
+    assert any(event["ph"] == "M" for event in trace["traceEvents"])
@@ -0,0 +1,161 @@
+"""
+Tests for the vendorpy prune module.
+"""
+
+import pytest
+
+from vendorpy.distributions import find_installed_distributions
+from vendorpy.prune import (
+    SAFE_PROFILE,
+    UNOWNED,
+    PruneProfile,
+    PruneRules,
+    compile_globs,
+    load_prune_profiles,
+    prune_vendor_dir,
+)
+
+
+def test_compile_globs():
+    """Test the gitignore-like matching of prune patterns."""
+    pattern = compile_globs(("tests", "*.pyi", "pkg/data/*.json", "docs/**/*.md"))
+
+    assert pattern.fullmatch("tests/test_a.py")
+    assert pattern.fullmatch("pkg/tests/unit/test_b.py")
+    assert pattern.fullmatch("pkg/sub/module.pyi")
+    assert pattern.fullmatch("pkg/data/schema.json")
+    assert pattern.fullmatch("docs/index.md")
+    assert pattern.fullmatch("docs/api/index.md")
+    assert not pattern.fullmatch("pkg/tests.py")
+    assert not pattern.fullmatch("other/pkg/data/schema.json")
+    assert not pattern.fullmatch("pkg/data/nested/schema.json")
+    assert compile_globs(()) is None
+
+
+def test_prune_vendor_dir(tmp_path, make_distribution):
+    """Test that pruned files are removed, reported and dropped from RECORD."""
+    make_distribution(
+        tmp_path,
+        "demo",
+        "1.0",
+        {
+            "demo/__init__.py": "x = 1\n",
+            "demo/__init__.pyi": "x: int\n",
+            "demo/__pycache__/__init__.cpython-312.pyc": "bytecode",
+            "demo/_speedups.c": "int main;",
+        },
+    )
+    (tmp_path / "stray.pyc").write_text("stray")
+
+    report = prune_vendor_dir(tmp_path, SAFE_PROFILE)
+
+    assert report == {
+        "demo": {"files": 3, "bytes": len("x: int\n") + len("bytecode") + 9},
+        UNOWNED: {"files": 1, "bytes": 5},
+    }
+    assert (tmp_path / "demo" / "__init__.py").exists()
+    assert not (tmp_path / "demo" / "__init__.pyi").exists()
+    assert not (tmp_path / "demo" / "__pycache__").exists()
+    assert not (tmp_path / "stray.pyc").exists()
+
+    # RECORD only lists what is left, and the distribution is still found
+    (dist,) = find_installed_distributions(tmp_path).values()
+    assert dist.files == [
+        "demo/__init__.py",
+        "demo-1.0.dist-info/METADATA",
+        "demo-1.0.dist-info/RECORD",
+    ]
+
+
+def test_prune_vendor_dir_package_rules(tmp_path, make_distribution):
+    """Test that per-package rules override the profile's rules."""
+    make_distribution(
+        tmp_path, "demo", "1.0", {"demo/tests/__init__.py": "", "demo/a.md": "a"}
+    )
+    make_distribution(
+        tmp_path, "other", "1.0", {"other/tests/__init__.py": "", "other/b.md": "b"}
+    )
+    profile = PruneProfile(
+        "custom",
+        PruneRules(drop=("tests",)),
+        {"demo": PruneRules(drop=("*.md",), keep=("demo/tests",))},
+    )
+
+    prune_vendor_dir(tmp_path, profile)
+
+    assert (tmp_path / "demo" / "tests" / "__init__.py").exists()
+    assert not (tmp_path / "demo" / "a.md").exists()
+    assert not (tmp_path / "other" / "tests").exists()
+    assert (tmp_path / "other" / "b.md").exists()
+
+
+def test_load_prune_profiles(tmp_path):
+    """Test loading project profiles extending the built-in ones."""
+    pyproject = tmp_path / "pyproject.toml"
+    pyproject.write_text(
+        """
+[tool.vendorpy.prune]
+profile = "slim"
+
+[tool.vendorpy.prune.profiles.safe]
+extends = "safe"
+keep = ["py.typed"]
+
+[tool.vendorpy.prune.profiles.slim]
+extends = "safe"
+drop = ["*.md"]
+
+[tool.vendorpy.prune.profiles.slim.packages.Zope_Interface]
+keep = ["zope/interface/README.md"]
+"""
+    )
+
+    profiles, default = load_prune_profiles(pyproject)
+
+    assert default == "slim"
+    assert profiles["safe"].rules.keep == ("py.typed",)
+    assert profiles["slim"].rules.drop == SAFE_PROFILE.rules.drop + ("*.md",)
+    assert profiles["slim"].rules.keep == ("py.typed",)
+    assert profiles["slim"].packages["zope-interface"].keep == (
+        "zope/interface/README.md",
+    )
+    assert "aggressive" in profiles
+
+
+def test_load_prune_profiles_errors(tmp_path):
+    """Test that invalid profile configurations are rejected."""
+    pyproject = tmp_path / "pyproject.toml"
+    # Without a pyproject.toml only the built-in profiles exist
+    profiles, default = load_prune_profiles(pyproject)
+    assert sorted(profiles) == ["aggressive", "safe"]
+    assert default is None
+
+    pyproject.write_text(
+        """
+[tool.vendorpy.prune.profiles.a]
+extends = "b"
+
+[tool.vendorpy.prune.profiles.b]
+extends = "a"
+"""
+    )
+    with pytest.raises(ValueError, match="extend each other"):
+        load_prune_profiles(pyproject)
+
+    pyproject.write_text(
+        """
+[tool.vendorpy.prune.profiles.a]
+extends = "missing"
+"""
+    )
+    with pytest.raises(ValueError, match="Unknown prune profile: missing"):
+        load_prune_profiles(pyproject)
+
+    pyproject.write_text(
+        """
+[tool.vendorpy.prune.profiles.a]
+drop = "tests"
+"""
+    )
+    with pytest.raises(ValueError, match="must be a list"):
+        load_prune_profiles(pyproject)
@@ -0,0 +1,101 @@
+"""
+Tests for the vendorpy registry module.
+"""
+
+import json
+
+import pytest
+
+from vendorpy.cache import list_entries
+from vendorpy.registry import (
+    REGISTRY_CACHE_NAMESPACE,
+    BuiltInRegistry,
+    compile_pyodide_lock,
+    load_pyodide_lock_registry,
+    select_pyodide_lock,
+)
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Point the vendorpy cache at a temporary directory."""
+    path = tmp_path / "cache"
+    monkeypatch.setenv("VENDORPY_CACHE_DIR", str(path))
+    return path
+
+
+def write_pyodide_lock(path, packages):
+    """Write a minimal pyodide-lock.json listing the given name -> version pairs."""
+    path.write_text(
+        json.dumps(
+            {
+                "info": {"version": "0.27.0"},
+                "packages": {
+                    name.lower(): {"name": name, "version": version}
+                    for name, version in packages.items()
+                },
+            }
+        )
+    )
+    return path
+
+
+def test_lookup_is_pep503_normalized():
+    """Test that lookups match any PEP 503 equivalent spelling."""
+    registry = BuiltInRegistry(["PyYAML", "charset-normalizer", "zope.interface"])
+
+    assert "pyyaml" in registry
+    assert "charset_normalizer" in registry
+    assert "Charset.Normalizer" in registry
+    assert "zope-interface" in registry
+    assert "jinja2" not in registry
+    assert registry.get("PYYAML") == "PyYAML"
+    assert registry.get("jinja2") is None
+
+
+def test_registry_contents():
+    """Test the listing and version of the registry."""
+    registry = BuiltInRegistry(["starlette", "FastAPI", "fastapi"])
+
+    assert len(registry) == 2
+    assert registry.names == ["FastAPI", "starlette"]
+    assert sorted(registry) == ["FastAPI", "starlette"]
+    assert registry.version == BuiltInRegistry(["fastapi", "starlette"]).version
+    assert registry.version != BuiltInRegistry(["fastapi"]).version
+
+    with pytest.raises(TypeError):
+        registry._entries["flask"] = ("flask", None)  # type: ignore[index]
+
+
+def test_load_pyodide_lock_registry(tmp_path):
+    """Test loading a versioned registry compiled from a pyodide-lock.json."""
+    lock_path = write_pyodide_lock(
+        tmp_path / "pyodide-lock.json", {"PyYAML": "6.0.1", "numpy": "1.26.4"}
+    )
+
+    registry = load_pyodide_lock_registry(lock_path)
+
+    assert "pyyaml" in registry
+    assert registry.get("pyyaml") == "PyYAML"
+    assert registry.get_version("NumPy") == "1.26.4"
+    assert registry.names == ["PyYAML", "numpy"]
+
+    # The compiled index is cached and reused for the same lock file
+    entries = list_entries(REGISTRY_CACHE_NAMESPACE)
+    assert len(entries) == 1
+    assert entries[0]["pyodide_version"] == "0.27.0"
+    assert compile_pyodide_lock(lock_path) == registry._index_path
+    assert len(list_entries(REGISTRY_CACHE_NAMESPACE)) == 1
+
+
+def test_select_pyodide_lock(tmp_path):
+    """Test selecting the lock file by compatibility date."""
+    old = write_pyodide_lock(tmp_path / "2024-04-01.json", {"numpy": "1.26.4"})
+    new = write_pyodide_lock(tmp_path / "2025-01-16.json", {"numpy": "2.0.2"})
+    (tmp_path / "notes.json").write_text("{}")
+
+    assert select_pyodide_lock(tmp_path, "2024-12-31") == old
+    assert select_pyodide_lock(tmp_path, "2025-01-16") == new
+    assert select_pyodide_lock(tmp_path) == new
+    assert select_pyodide_lock(tmp_path, "2024-01-01") is None
+    assert select_pyodide_lock(old, "2020-01-01") == old
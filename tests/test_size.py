@@ -0,0 +1,56 @@
+"""
+Tests for the vendorpy size module.
+"""
+
+import zlib
+
+import pytest
+
+from vendorpy.distributions import UNOWNED
+from vendorpy.size import load_size_budget, measure_vendor_dir
+
+
+def test_measure_vendor_dir(tmp_path, make_distribution):
+    """Test that files are attributed to the distribution whose RECORD lists them."""
+    content = "import os\n" * 100
+    make_distribution(
+        tmp_path, "demo", "1.0", {"demo/__init__.py": content, "demo/util.py": ""}
+    )
+    (tmp_path / "stray.txt").write_text("stray")
+
+    report = measure_vendor_dir(tmp_path, max_workers=2)
+
+    dist_info = tmp_path / "demo-1.0.dist-info"
+    metadata_files = [dist_info / "METADATA", dist_info / "RECORD"]
+    demo_files = [
+        (tmp_path / "demo" / "__init__.py").read_bytes(),
+        b"",
+        *(path.read_bytes() for path in metadata_files),
+    ]
+    assert report["demo"] == {
+        "files": 4,
+        "bytes": sum(len(data) for data in demo_files),
+        "compressed": sum(len(zlib.compress(data, 6)) for data in demo_files),
+    }
+    assert report["demo"]["compressed"] < report["demo"]["bytes"]
+    assert report[UNOWNED] == {
+        "files": 1,
+        "bytes": 5,
+        "compressed": len(zlib.compress(b"stray", 6)),
+    }
+
+
+def test_load_size_budget(tmp_path):
+    """Test reading the size budget from pyproject.toml."""
+    pyproject = tmp_path / "pyproject.toml"
+    assert load_size_budget(pyproject) is None
+
+    pyproject.write_text('[tool.vendorpy.size]\nbudget = "3M"\n')
+    assert load_size_budget(pyproject) == 3 * 1024**2
+
+    pyproject.write_text("[tool.vendorpy.size]\nbudget = 1000\n")
+    assert load_size_budget(pyproject) == 1000
+
+    pyproject.write_text('[tool.vendorpy.size]\nbudget = "lots"\n')
+    with pytest.raises(ValueError, match="Invalid size"):
+        load_size_budget(pyproject)
@@ -0,0 +1,125 @@
+"""
+Tests for the vendorpy staging module.
+"""
+
+import pytest
+
+from vendorpy.staging import (
+    previous_path,
+    rollback_vendor_dir,
+    staged_vendor_dir,
+    staging_path,
+)
+
+
+def test_staged_vendor_dir_swaps_in(tmp_path, monkeypatch):
+    """Test that a staged tree replaces the vendor directory and the old one is kept."""
+    monkeypatch.chdir(tmp_path)
+    vendor_dir = tmp_path / "src" / "vendor"
+    vendor_dir.mkdir(parents=True)
+    (vendor_dir / "old.py").write_text("old = 1\n")
+    (vendor_dir / "__pycache__").mkdir()
+    (vendor_dir / "__pycache__" / "old.cpython-312.pyc").write_bytes(b"stale")
+
+    with staged_vendor_dir(vendor_dir) as stage:
+        assert stage == staging_path(vendor_dir)
+        assert stage.name == "vendor"
+        # Seeded with the current files, but not their cached bytecode
+        assert (stage / "old.py").read_text() == "old = 1\n"
+        assert not (stage / "__pycache__").exists()
+        (stage / "old.py").unlink()
+        (stage / "new.py").write_text("new = 1\n")
+        # Nothing changes until the block succeeds
+        assert (vendor_dir / "old.py").exists()
+
+    assert sorted(p.name for p in vendor_dir.iterdir()) == ["new.py"]
+    assert sorted(p.name for p in previous_path(vendor_dir).iterdir()) == [
+        "__pycache__",
+        "old.py",
+    ]
+    assert not staging_path(vendor_dir).exists()
+
+
+def test_staged_vendor_dir_unseeded(tmp_path, monkeypatch):
+    """Test that an unseeded stage starts empty, dropping the current files."""
+    monkeypatch.chdir(tmp_path)
+    vendor_dir = tmp_path / "vendor"
+    vendor_dir.mkdir()
+    (vendor_dir / "old.py").write_text("old = 1\n")
+
+    with staged_vendor_dir(vendor_dir, seed=False) as stage:
+        assert list(stage.iterdir()) == []
+        (stage / "new.py").write_text("new = 1\n")
+
+    assert sorted(p.name for p in vendor_dir.iterdir()) == ["new.py"]
+
+
+def test_staged_vendor_dir_discards_failed_update(tmp_path, monkeypatch):
+    """Test that a failing block leaves the vendor directory untouched."""
+    monkeypatch.chdir(tmp_path)
+    vendor_dir = tmp_path / "vendor"
+    vendor_dir.mkdir()
+    (vendor_dir / "old.py").write_text("old = 1\n")
+
+    with pytest.raises(RuntimeError), staged_vendor_dir(vendor_dir) as stage:
+        (stage / "old.py").unlink()
+        raise RuntimeError("install failed")
+
+    assert (vendor_dir / "old.py").read_text() == "old = 1\n"
+    assert not staging_path(vendor_dir).exists()
+    assert not previous_path(vendor_dir).exists()
+
+
+def test_staged_vendor_dir_creates_vendor_dir(tmp_path, monkeypatch):
+    """Test staging the first tree of a vendor directory that does not exist yet."""
+    monkeypatch.chdir(tmp_path)
+    vendor_dir = tmp_path / "vendor"
+
+    with staged_vendor_dir(vendor_dir) as stage:
+        (stage / "new.py").write_text("new = 1\n")
+
+    assert (vendor_dir / "new.py").exists()
+    assert not rollback_vendor_dir(vendor_dir)
+
+
+def test_rollback_vendor_dir(tmp_path, monkeypatch):
+    """Test that rolling back restores the previous tree, and twice undoes it."""
+    monkeypatch.chdir(tmp_path)
+    vendor_dir = tmp_path / "vendor"
+    vendor_dir.mkdir()
+    (vendor_dir / "old.py").write_text("old = 1\n")
+    with staged_vendor_dir(vendor_dir) as stage:
+        (stage / "old.py").unlink()
+        (stage / "new.py").write_text("new = 1\n")
+
+    assert rollback_vendor_dir(vendor_dir)
+    assert sorted(p.name for p in vendor_dir.iterdir()) == ["old.py"]
+
+    assert rollback_vendor_dir(vendor_dir)
+    assert sorted(p.name for p in vendor_dir.iterdir()) == ["new.py"]
+
+
+def test_staged_vendor_dir_extra_files(tmp_path, monkeypatch):
+    """Test that files next to the tree are swapped in and rolled back with it."""
+    monkeypatch.chdir(tmp_path)
+    vendor_dir = tmp_path / "src" / "vendor"
+    vendor_dir.mkdir(parents=True)
+    (vendor_dir.parent / "vendor.zip").write_text("old archive")
+
+    with staged_vendor_dir(vendor_dir, ["vendor.zip", "vendor_bundle.py"]) as stage:
+        (stage.parent / "vendor.zip").write_text("new archive")
+        (stage.parent / "vendor_bundle.py").write_text("loader")
+        # Nothing is written next to the live tree before the swap
+        assert (vendor_dir.parent / "vendor.zip").read_text() == "old archive"
+        assert not (vendor_dir.parent / "vendor_bundle.py").exists()
+
+    assert (vendor_dir.parent / "vendor.zip").read_text() == "new archive"
+    assert (vendor_dir.parent / "vendor_bundle.py").read_text() == "loader"
+
+    assert rollback_vendor_dir(vendor_dir)
+    assert (vendor_dir.parent / "vendor.zip").read_text() == "old archive"
+    assert not (vendor_dir.parent / "vendor_bundle.py").exists()
+
+    assert rollback_vendor_dir(vendor_dir)
+    assert (vendor_dir.parent / "vendor.zip").read_text() == "new archive"
+    assert (vendor_dir.parent / "vendor_bundle.py").read_text() == "loader"
@@ -0,0 +1,163 @@
+"""
+Tests for the vendorpy treeshake module.
+"""
+
+import shutil
+
+import pytest
+
+from vendorpy.distributions import find_installed_distributions
+from vendorpy.treeshake import (
+    find_imports,
+    find_reachable_modules,
+    index_modules,
+    load_tree_shake_allowlist,
+    tree_shake,
+)
+
+
+def test_find_imports():
+    """Test that absolute, relative and constant dynamic imports are found."""
+    source = b"""
+import os.path
+from . import sibling
+from ..base import Base
+from .sub import *
+
+def load():
+    import importlib
+    importlib.import_module("plugins.json")
+    return importlib.import_module(".lazy", __name__)
+"""
+    imports, dynamic = find_imports(source, "pkg.sub.module", is_package=False)
+
+    assert imports == {
+        "os.path",
+        "importlib",
+        "pkg.sub",
+        "pkg.sub.sibling",
+        "pkg.base",
+        "pkg.base.Base",
+        "pkg.sub.sub",
+        "pkg.sub.sub.*",
+        "plugins.json",
+        "pkg.sub.lazy",
+    }
+    assert not dynamic
+
+    _imports, dynamic = find_imports(
+        b"import importlib\nimportlib.import_module(name)\n", "pkg", is_package=True
+    )
+    assert dynamic
+
+
+@pytest.fixture
+def worker(tmp_path, make_distribution):
+    """A Worker with an entry point, a project module and vendored packages."""
+    src = tmp_path / "src"
+    vendor_dir = src / "vendor"
+    (src / "app").mkdir(parents=True)
+    (src / "entry.py").write_text("from app import handler\n")
+    (src / "app" / "__init__.py").write_text("from demo import run\n")
+    make_distribution(
+        vendor_dir,
+        "demo",
+        "1.0",
+        {
+            "demo/__init__.py": "from .core import run\n",
+            "demo/core.py": "import plugin\n\ndef run(): pass\n",
+            "demo/unused.py": "x = 1\n",
+            "demo/__pycache__/unused.cpython-312.pyc": "bytecode",
+            "demo/data.json": "{}",
+        },
+    )
+    make_distribution(
+        vendor_dir,
+        "plugin",
+        "1.0",
+        {
+            "plugin/__init__.py": "import importlib\nimportlib.import_module(NAME)\n",
+            "plugin/extra.py": "",
+        },
+    )
+    make_distribution(vendor_dir, "other", "1.0", {"other/__init__.py": ""})
+    make_distribution(vendor_dir, "babel", "1.0", {"babel/dates.py": ""})
+    return src / "entry.py", vendor_dir
+
+
+def test_find_reachable_modules(worker):
+    """Test following imports from the entry point through the vendor directory."""
+    entry_point, vendor_dir = worker
+
+    reachable, vendor_modules = find_reachable_modules(
+        entry_point, vendor_dir, keep=["babel.*"]
+    )
+
+    # plugin imports by computed names, so it is kept as a whole
+    assert reachable == {"demo", "demo.core", "plugin", "plugin.extra", "babel.dates"}
+    assert set(vendor_modules) == reachable | {"demo.unused", "other"}
+
+
+def test_tree_shake(worker):
+    """Test that unreachable modules and their bytecode are removed."""
+    entry_point, vendor_dir = worker
+
+    report = tree_shake(entry_point, vendor_dir)
+
+    assert report["demo"]["files"] == 2
+    assert report["other"]["files"] == 1
+    assert not (vendor_dir / "demo" / "unused.py").exists()
+    assert not (vendor_dir / "demo" / "__pycache__").exists()
+    assert not (vendor_dir / "other").exists()
+    assert not (vendor_dir / "babel").exists()
+    # Data files are left alone
+    assert (vendor_dir / "demo" / "data.json").exists()
+    assert (
+        "demo/unused.py" not in find_installed_distributions(vendor_dir)["demo"].files
+    )
+
+
+def test_tree_shake_stage(worker):
+    """Test tree-shaking a staged copy while the live vendor directory exists."""
+    entry_point, vendor_dir = worker
+    stage = entry_point.parent / ".vendor.vendorpy" / "vendor"
+    shutil.copytree(vendor_dir, stage)
+
+    project_modules, _ = index_modules(entry_point.parent, exclude=[stage, vendor_dir])
+    assert set(project_modules) == {"entry", "app"}
+
+    report = tree_shake(entry_point, stage, exclude=[vendor_dir])
+
+    assert report["demo"]["files"] == 2
+    assert report["other"]["files"] == 1
+    assert not (stage / "demo" / "unused.py").exists()
+    assert not (stage / "other").exists()
+    # The live tree is only replaced once the stage is swapped in
+    assert (vendor_dir / "demo" / "unused.py").exists()
+    assert (vendor_dir / "other").exists()
+
+
+def test_tree_shake_dynamic_project_imports(worker):
+    """Test that dynamic imports in project code require an allowlist."""
+    entry_point, vendor_dir = worker
+    entry_point.write_text("import importlib\nimportlib.import_module(NAME)\n")
+
+    with pytest.raises(RuntimeError, match="tree-shake allowlist"):
+        tree_shake(entry_point, vendor_dir)
+
+    tree_shake(entry_point, vendor_dir, keep=["demo*"])
+    assert (vendor_dir / "demo" / "unused.py").exists()
+    assert not (vendor_dir / "other").exists()
+
+
+def test_load_tree_shake_allowlist(tmp_path):
+    """Test reading the tree-shake allowlist from pyproject.toml."""
+    pyproject = tmp_path / "pyproject.toml"
+    assert load_tree_shake_allowlist(pyproject) == []
+
+    pyproject.write_text('[tool.vendorpy.tree-shake]\nkeep = ["babel.*"]\n')
+    assert load_tree_shake_allowlist(pyproject) == ["babel.*"]
+
+    pyproject.write_text('[tool.vendorpy.tree-shake]\nkeep = "babel"\n')
+    with pytest.raises(ValueError, match="must be a list"):
+        load_tree_shake_allowlist(pyproject)
@@ -4,19 +4,40 @@ Tests for the vendorpy utils module.
 
 import json
 import os
+import shutil
+import time
 from pathlib import Path
-from unittest.mock import MagicMock, patch, mock_open
+from unittest.mock import MagicMock, mock_open, patch
 
+import pytest
+
+from vendorpy.cache import list_entries
+from vendorpy.distributions import find_installed_distributions
 from vendorpy.utils import (
     CLOUDFLARE_BUILT_IN_PACKAGES,
+    UNPINNED_TOOLCHAIN_TTL,
     add_vendor_rule_to_config,
+    build_wheelhouse,
+    compute_detection_fingerprint,
     configure_wrangler_for_vendor,
+    create_pyodide_env,
     create_vendor_file,
+    create_virtual_env,
     detect_packages_to_vendor,
     extract_project_dependencies,
     find_wrangler_config,
+    get_installed_version,
+    install_from_wheel_store,
+    install_packages_incrementally,
+    install_packages_natively,
+    install_packages_to_vendor,
     is_vendor_rule_present,
+    materialize_tree,
+    read_compatibility_date,
+    read_worker_entry_point,
+    select_backend,
 )
+from vendorpy.wheels import hash_file
 
 
 def test_cloudflare_built_in_packages():
@@ -30,8 +51,11 @@ def test_cloudflare_built_in_packages():
 
 
 @patch("subprocess.run")
-def test_extract_project_dependencies(mock_run):
+def test_extract_project_dependencies(mock_run, tmp_path, monkeypatch):
     """Test the extract_project_dependencies function."""
+    # Without a uv.lock the dependencies come from uv export
+    monkeypatch.chdir(tmp_path)
+
     # Mock the subprocess run function to return a list of packages
     mock_process = MagicMock()
     mock_process.stdout = json.dumps(
@@ -84,6 +108,81 @@ def test_detect_packages_to_vendor(mock_extract_deps):
     assert sorted(packages["built_in"]) == ["fastapi", "requests"]
 
 
+@patch("vendorpy.utils.extract_project_dependencies")
+def test_detect_packages_to_vendor_cache(mock_extract_deps, tmp_path, monkeypatch):
+    """Test that detection results are reused while the inputs are unchanged."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "uv.lock").write_text("version = 1\n")
+    (tmp_path / "pyproject.toml").write_text("[project]\nname = 'demo'\n")
+    mock_extract_deps.return_value = {"fastapi", "jinja2"}
+
+    first = detect_packages_to_vendor(use_cache=True)
+    calls = mock_extract_deps.call_count
+    second = detect_packages_to_vendor(use_cache=True)
+
+    assert first == second == {"vendor": ["jinja2"], "built_in": ["fastapi"]}
+    assert mock_extract_deps.call_count == calls
+    assert (tmp_path / ".vendorpy" / "cache.json").exists()
+
+    # Changing an input invalidates the cached result
+    (tmp_path / "pyproject.toml").write_text("[project]\nname = 'other'\n")
+    mock_extract_deps.return_value = {"jinja2"}
+    assert detect_packages_to_vendor(use_cache=True)["built_in"] == []
+    assert mock_extract_deps.call_count > calls
+
+    # Without a lockfile nothing is cached
+    (tmp_path / "uv.lock").unlink()
+    assert compute_detection_fingerprint() is None
+
+
+def test_detect_packages_to_vendor_prunes_built_in_dependencies(tmp_path, monkeypatch):
+    """Test that dependencies only reachable through built-ins are not vendored."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "uv.lock").write_text(
+        """
+[[package]]
+name = "worker"
+version = "0.1.0"
+source = { virtual = "." }
+dependencies = [{ name = "fastapi" }, { name = "jinja2" }]
+
+[[package]]
+name = "fastapi"
+version = "0.110.0"
+source = { registry = "https://pypi.org/simple" }
+dependencies = [{ name = "starlette" }, { name = "typing-extensions" }]
+
+[[package]]
+name = "starlette"
+version = "0.36.3"
+source = { registry = "https://pypi.org/simple" }
+dependencies = [{ name = "markupsafe" }]
+
+[[package]]
+name = "typing-extensions"
+version = "4.9.0"
+source = { registry = "https://pypi.org/simple" }
+
+[[package]]
+name = "jinja2"
+version = "3.1.2"
+source = { registry = "https://pypi.org/simple" }
+dependencies = [{ name = "markupsafe" }]
+
+[[package]]
+name = "markupsafe"
+version = "2.1.3"
+source = { registry = "https://pypi.org/simple" }
+"""
+    )
+
+    packages = detect_packages_to_vendor()
+
+    # typing-extensions is only pulled in by fastapi, markupsafe also by jinja2
+    assert packages["vendor"] == ["jinja2", "markupsafe"]
+    assert packages["built_in"] == ["fastapi", "starlette"]
+
+
 def test_create_vendor_file(tmp_path):
     """Test the create_vendor_file function."""
     # Set up test data
@@ -126,6 +225,31 @@ def test_find_wrangler_config(tmp_path):
     assert find_wrangler_config() == (wrangler_jsonc, "jsonc")
 
 
+def test_read_compatibility_date(tmp_path, monkeypatch):
+    """Test reading the compatibility date from the wrangler configuration."""
+    monkeypatch.chdir(tmp_path)
+    assert read_compatibility_date() is None
+
+    Path("wrangler.jsonc").write_text(
+        '{\n  // Worker settings\n  "compatibility_date": "2025-01-16"\n}\n'
+    )
+    assert read_compatibility_date() == "2025-01-16"
+
+    Path("wrangler.toml").write_text(
+        'name = "worker"\ncompatibility_date = 2024-09-23\n'
+    )
+    assert read_compatibility_date() == "2024-09-23"
+
+
+def test_read_worker_entry_point(tmp_path, monkeypatch):
+    """Test reading the Worker's entry point from the wrangler configuration."""
+    monkeypatch.chdir(tmp_path)
+    assert read_worker_entry_point() is None
+
+    Path("wrangler.jsonc").write_text('{\n  "main": "src/entry.py"\n}\n')
+    assert read_worker_entry_point() == Path("src/entry.py")
+
+
 def test_is_vendor_rule_present_toml():
     """Test the is_vendor_rule_present function with TOML data."""
     # Test with empty config
@@ -180,6 +304,7 @@ def test_is_vendor_rule_present_jsonc():
     }
     """
     assert is_vendor_rule_present(jsonc_content, "jsonc")
+    assert not is_vendor_rule_present(jsonc_content, "jsonc", "vendor.zip")
 
 
 @patch("builtins.open", new_callable=mock_open)
@@ -255,6 +380,23 @@ def test_add_vendor_rule_to_config_jsonc(mock_is_present, mock_file):
     assert '"fallthrough": true' in written_content
 
 
+def test_configure_wrangler_for_bundle(tmp_path, monkeypatch):
+    """Test that a rule is added for the bundle archive next to the vendor rule."""
+    monkeypatch.chdir(tmp_path)
+    Path("wrangler.jsonc").write_text('{\n  "main": "src/worker.py"\n}\n')
+
+    result = configure_wrangler_for_vendor(["vendor/**", "vendor.zip"])
+
+    assert result is not None and result[0] is True
+    content = Path("wrangler.jsonc").read_text()
+    assert len(json.loads(content)["rules"]) == 2
+    assert is_vendor_rule_present(content, "jsonc")
+    assert is_vendor_rule_present(content, "jsonc", "vendor.zip")
+    # Rules already present are not added twice
+    configure_wrangler_for_vendor(["vendor/**", "vendor.zip"])
+    assert Path("wrangler.jsonc").read_text() == content
+
+
 @patch("vendorpy.utils.find_wrangler_config")
 @patch("vendorpy.utils.add_vendor_rule_to_config")
 def test_configure_wrangler_for_vendor(mock_add_rule, mock_find_config):
@@ -280,3 +422,486 @@ def test_configure_wrangler_for_vendor(mock_add_rule, mock_find_config):
     assert result is not None
     assert result[0] is False  # Failed
     assert "Failed to configure" in result[1]  # Message
+
+
+@patch("vendorpy.utils.subprocess.run")
+def test_create_virtual_env_reuses_cached_toolchain(mock_run, tmp_path, monkeypatch):
+    """Test that create_virtual_env builds the toolchain once and then reuses it."""
+    monkeypatch.setenv("VENDORPY_CACHE_DIR", str(tmp_path / "cache"))
+    # Without uv installed the pip backend is used
+    monkeypatch.setattr("vendorpy.utils.shutil.which", lambda cmd: None)
+
+    def fake_run(cmd, **kwargs):
+        if cmd[1:] == ["--version"]:
+            return MagicMock(stdout="Python 3.12.3\n", stderr="")
+        if cmd[1:3] == ["-m", "venv"]:
+            venv_path = Path(cmd[3])
+            (venv_path / "bin").mkdir(parents=True)
+            (venv_path / "bin" / "pip").touch()
+        elif cmd[1] == "install":
+            venv_path = Path(cmd[0]).parent.parent
+            (venv_path / "bin" / "pyodide").touch()
+            site_packages = venv_path / "lib" / "python3.12" / "site-packages"
+            (site_packages / "pyodide_build-0.29.0.dist-info").mkdir(parents=True)
+        return MagicMock(stdout="", stderr="")
+
+    mock_run.side_effect = fake_run
+
+    first = create_virtual_env("3.12")
+    calls_after_first = mock_run.call_count
+    second = create_virtual_env("3.12")
+
+    assert first == second
+    assert first.is_relative_to(tmp_path / "cache" / "toolchains")
+    # The second run only checks the interpreter version
+    assert mock_run.call_count == calls_after_first + 1
+    assert get_installed_version(first, "pyodide-build") == "0.29.0"
+
+
+@patch("vendorpy.utils.subprocess.run")
+def test_create_virtual_env_unpinned_toolchain(
+    mock_run, tmp_path, monkeypatch, make_wheel
+):
+    """Test that toolchains of the latest pyodide-build are keyed on a real version."""
+    monkeypatch.setenv("VENDORPY_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr("vendorpy.utils.shutil.which", lambda cmd: None)
+    installs = []
+
+    def fake_run(cmd, **kwargs):
+        if cmd[1:] == ["--version"]:
+            return MagicMock(stdout="Python 3.12.3\n", stderr="")
+        if cmd[1:3] == ["-m", "venv"]:
+            (Path(cmd[3]) / "bin").mkdir(parents=True)
+            (Path(cmd[3]) / "bin" / "pip").touch()
+        elif cmd[1] == "install":
+            installs.append(cmd[-1])
+            (Path(cmd[0]).parent / "pyodide").touch()
+        return MagicMock(stdout="", stderr="")
+
+    mock_run.side_effect = fake_run
+
+    # The newest pyodide-build of the wheelhouse pins the toolchain
+    wheelhouse = tmp_path / "wheels"
+    wheelhouse.mkdir()
+    make_wheel(wheelhouse, "pyodide_build", "0.29.0")
+    make_wheel(wheelhouse, "pyodide_build", "0.30.1")
+    pinned = create_virtual_env("3.12", wheelhouse=wheelhouse)
+    assert installs == ["pyodide-build==0.30.1"]
+    assert create_virtual_env("3.12", pyodide_build_version="0.30.1") == pinned
+    assert len(installs) == 1
+
+    # The latest release is rebuilt once the toolchain is too old
+    latest = create_virtual_env("3.12")
+    assert create_virtual_env("3.12") == latest
+    assert installs[1:] == ["pyodide-build"]
+    now = time.time()
+    monkeypatch.setattr(
+        "vendorpy.cache.time.time", lambda: now + UNPINNED_TOOLCHAIN_TTL + 1
+    )
+    assert create_virtual_env("3.12") == latest
+    assert installs[1:] == ["pyodide-build", "pyodide-build"]
+
+
+@patch("vendorpy.utils.subprocess.run")
+def test_create_virtual_env_with_uv_backend(mock_run, tmp_path, monkeypatch):
+    """Test that the uv backend builds the toolchain with uv venv and uv pip."""
+    monkeypatch.setenv("VENDORPY_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr("vendorpy.utils.shutil.which", lambda cmd: "/usr/bin/uv")
+    commands = []
+
+    def fake_run(cmd, **kwargs):
+        commands.append(cmd[:3])
+        if cmd[:3] == ["uv", "python", "find"]:
+            return MagicMock(stdout="/uv/python/bin/python3.12\n", stderr="")
+        if cmd[1:] == ["--version"]:
+            return MagicMock(stdout="Python 3.12.7\n", stderr="")
+        if cmd[:2] == ["uv", "venv"]:
+            venv_path = Path(cmd[-1])
+            (venv_path / "bin").mkdir(parents=True)
+            (venv_path / "bin" / "pip").touch()
+        elif cmd[:3] == ["uv", "pip", "install"]:
+            venv_path = Path(cmd[cmd.index("--python") + 1]).parent.parent
+            (venv_path / "bin" / "pyodide").touch()
+        return MagicMock(stdout="", stderr="")
+
+    mock_run.side_effect = fake_run
+
+    venv_path = create_virtual_env("3.12", backend="auto")
+
+    assert (venv_path / "bin" / "pyodide").exists()
+    assert commands == [
+        ["uv", "python", "find"],
+        ["/uv/python/bin/python3.12", "--version"],
+        ["uv", "venv", "--seed"],
+        ["uv", "pip", "install"],
+    ]
+
+
+def test_select_backend(monkeypatch):
+    """Test selecting the environment backend."""
+    monkeypatch.setattr("vendorpy.utils.shutil.which", lambda cmd: None)
+    assert select_backend("auto") == "pip"
+    assert select_backend("pip") == "pip"
+    with pytest.raises(RuntimeError, match="uv command not found"):
+        select_backend("uv")
+    with pytest.raises(ValueError, match="Unknown backend"):
+        select_backend("conda")
+
+
+def test_materialize_tree(tmp_path):
+    """Test that materialize_tree hardlinks files and rewrites embedded paths."""
+    source = tmp_path / "source"
+    (source / "bin").mkdir(parents=True)
+    (source / "lib").mkdir()
+    (source / "bin" / "pip").write_text(f"#!{source}/bin/python\n")
+    (source / "bin" / "python").write_text("interpreter")
+    (source / "bin" / "python3").symlink_to("python")
+    (source / "lib" / "module.py").write_text("x = 1\n")
+
+    destination = tmp_path / "destination"
+    materialize_tree(source, destination)
+
+    assert (destination / "bin" / "pip").read_text() == f"#!{destination}/bin/python\n"
+    assert os.readlink(destination / "bin" / "python3") == "python"
+    assert (destination / "lib" / "module.py").samefile(source / "lib" / "module.py")
+
+
+@patch("vendorpy.utils.subprocess.run")
+def test_create_pyodide_env_reuses_cached_env(mock_run, tmp_path, monkeypatch):
+    """Test that create_pyodide_env only runs `pyodide venv` on a cache miss."""
+    monkeypatch.setenv("VENDORPY_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+
+    venv_path = tmp_path / "toolchain"
+    (venv_path / "bin").mkdir(parents=True)
+    (venv_path / "bin" / "pyodide").touch()
+    (venv_path / "pyvenv.cfg").write_text("home = /usr/bin\nversion = 3.12.3\n")
+    site_packages = venv_path / "lib" / "python3.12" / "site-packages"
+    (site_packages / "pyodide_build-0.29.0.dist-info").mkdir(parents=True)
+
+    def fake_run(cmd, **kwargs):
+        pyodide_venv_path = Path(cmd[2])
+        (pyodide_venv_path / "bin").mkdir(parents=True)
+        (pyodide_venv_path / "bin" / "pip").write_text(f"#!{pyodide_venv_path}\n")
+        return MagicMock(stdout="", stderr="")
+
+    mock_run.side_effect = fake_run
+
+    pyodide_venv_path = create_pyodide_env(venv_path)
+    assert mock_run.call_count == 1
+    assert (pyodide_venv_path / "bin" / "pip").exists()
+
+    # A second run finds the materialized environment up to date
+    assert create_pyodide_env(venv_path) == pyodide_venv_path
+    assert mock_run.call_count == 1
+
+    # A removed project environment is restored from the cache without pyodide venv
+    shutil.rmtree(pyodide_venv_path)
+    create_pyodide_env(venv_path)
+    assert mock_run.call_count == 1
+    assert (pyodide_venv_path / "bin" / "pip").exists()
+
+
+@patch("vendorpy.utils.subprocess.run")
+def test_create_pyodide_env_from_wheelhouse(mock_run, tmp_path, monkeypatch):
+    """Test that `pyodide venv` uses the wheelhouse's cross-build environment."""
+    monkeypatch.setenv("VENDORPY_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+    venv_path = tmp_path / "toolchain"
+    (venv_path / "bin").mkdir(parents=True)
+    (venv_path / "bin" / "pyodide").touch()
+    (venv_path / "pyvenv.cfg").write_text("home = /usr/bin\nversion = 3.12.3\n")
+    site_packages = venv_path / "lib" / "python3.12" / "site-packages"
+    (site_packages / "pyodide_build-0.29.0.dist-info").mkdir(parents=True)
+    wheelhouse = tmp_path / "wheels"
+
+    def fake_run(cmd, **kwargs):
+        (Path(cmd[2]) / "bin").mkdir(parents=True)
+        (Path(cmd[2]) / "bin" / "pip").touch()
+        return MagicMock(stdout="", stderr="")
+
+    mock_run.side_effect = fake_run
+
+    with pytest.raises(RuntimeError, match="vendorpy wheelhouse build"):
+        create_pyodide_env(venv_path, wheelhouse=wheelhouse)
+    mock_run.assert_not_called()
+
+    (wheelhouse / "xbuildenv").mkdir(parents=True)
+    create_pyodide_env(venv_path, wheelhouse=wheelhouse)
+
+    # The only command run is `pyodide venv`, pointed at the wheelhouse's copy
+    mock_run.assert_called_once()
+    cmd = mock_run.call_args[0][0]
+    assert cmd[:2] == [str(venv_path / "bin" / "pyodide"), "venv"]
+    env = mock_run.call_args[1]["env"]
+    assert env["PYODIDE_XBUILDENV_PATH"] == str(wheelhouse / "xbuildenv")
+
+
+@patch("vendorpy.utils.subprocess.run")
+def test_install_packages_incrementally(
+    mock_run, tmp_path, monkeypatch, make_distribution
+):
+    """Test that incremental installs only touch added, upgraded and dropped packages."""
+    monkeypatch.chdir(tmp_path)
+    vendor_dir = tmp_path / "src" / "vendor"
+    vendor_file = tmp_path / "vendor.txt"
+    vendor_file.write_text("jinja2\n")
+
+    # jinja2 is up to date, markupsafe is outdated and six is no longer needed
+    make_distribution(vendor_dir, "Jinja2", "3.1.2", {"jinja2/__init__.py": ""})
+    make_distribution(vendor_dir, "MarkupSafe", "2.1.2", {"markupsafe/__init__.py": ""})
+    make_distribution(vendor_dir, "six", "1.16.0", {"six.py": ""})
+
+    resolution = {"Jinja2": "3.1.2", "MarkupSafe": "2.1.3"}
+
+    def fake_run(cmd, **kwargs):
+        if "--dry-run" in cmd:
+            report_path = Path(cmd[cmd.index("--report") + 1])
+            report_path.write_text(
+                json.dumps(
+                    {
+                        "install": [
+                            {"metadata": {"name": name, "version": version}}
+                            for name, version in resolution.items()
+                        ]
+                    }
+                )
+            )
+        else:
+            target = Path(cmd[cmd.index("-t") + 1])
+            for requirement in cmd[cmd.index("-t") + 2 :]:
+                name, version = requirement.split("==")
+                make_distribution(
+                    target, name, version, {f"{name.lower()}/__init__.py": version}
+                )
+        return MagicMock(stdout="", stderr="")
+
+    mock_run.side_effect = fake_run
+
+    summary = install_packages_incrementally(Path("pip"), vendor_file, vendor_dir)
+
+    assert summary == {
+        "installed": ["MarkupSafe"],
+        "removed": ["six"],
+        "unchanged": ["Jinja2"],
+    }
+    installed = find_installed_distributions(vendor_dir)
+    assert {name: dist.version for name, dist in installed.items()} == {
+        "jinja2": "3.1.2",
+        "markupsafe": "2.1.3",
+    }
+    assert (vendor_dir / "markupsafe" / "__init__.py").read_text() == "2.1.3"
+    assert not (vendor_dir / "six.py").exists()
+
+    # Nothing changed: the second run neither resolves nor installs
+    mock_run.reset_mock()
+    summary = install_packages_incrementally(Path("pip"), vendor_file, vendor_dir)
+    mock_run.assert_not_called()
+    assert summary["unchanged"] == ["Jinja2", "MarkupSafe"]
+
+
+@patch("vendorpy.utils._get_pyodide_pip")
+@patch("vendorpy.utils.subprocess.run")
+def test_install_packages_to_vendor_in_parallel(
+    mock_run, mock_get_pip, tmp_path, make_distribution
+):
+    """Test that --jobs installs each resolved package separately and merges them."""
+    mock_get_pip.return_value = Path("pip")
+    vendor_dir = tmp_path / "vendor"
+    vendor_file = tmp_path / "vendor.txt"
+    vendor_file.write_text("zope.interface\nzope.event\n")
+    resolution = {"zope.interface": "6.2", "zope.event": "5.0"}
+    targets = set()
+
+    def fake_run(cmd, **kwargs):
+        if "--dry-run" in cmd:
+            report_path = Path(cmd[cmd.index("--report") + 1])
+            report_path.write_text(
+                json.dumps(
+                    {
+                        "install": [
+                            {"metadata": {"name": name, "version": version}}
+                            for name, version in resolution.items()
+                        ]
+                    }
+                )
+            )
+        else:
+            target = Path(cmd[cmd.index("-t") + 1])
+            (requirement,) = cmd[cmd.index("-t") + 2 :]
+            name, version = requirement.split("==")
+            targets.add(target)
+            # Both distributions share the zope namespace directory
+            module = name.split(".")[1]
+            make_distribution(
+                target, name, version, {f"zope/{module}/__init__.py": version}
+            )
+        return MagicMock(stdout="", stderr="")
+
+    mock_run.side_effect = fake_run
+
+    summary = install_packages_to_vendor(
+        Path("pyodide-venv"), vendor_file, vendor_dir, jobs=2
+    )
+
+    assert summary["installed"] == ["zope.event", "zope.interface"]
+    assert len(targets) == 2
+    assert (vendor_dir / "zope" / "interface" / "__init__.py").read_text() == "6.2"
+    assert (vendor_dir / "zope" / "event" / "__init__.py").read_text() == "5.0"
+    assert set(find_installed_distributions(vendor_dir)) == {
+        "zope-event",
+        "zope-interface",
+    }
+    # Staging directories are cleaned up
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["vendor", "vendor.txt"]
+
+
+@patch("vendorpy.utils._get_pyodide_pip")
+@patch("vendorpy.utils.subprocess.run")
+def test_install_packages_to_vendor_from_wheelhouse(mock_run, mock_get_pip, tmp_path):
+    """Test that a wheelhouse replaces the package index for every pip call."""
+    mock_get_pip.return_value = Path("pip")
+    mock_run.return_value = MagicMock(
+        stdout="Successfully installed jinja2-3.1.4", stderr=""
+    )
+    vendor_file = tmp_path / "vendor.txt"
+    vendor_file.write_text("jinja2\n")
+    wheelhouse = tmp_path / "wheels"
+
+    install_packages_to_vendor(
+        Path("pyodide-venv"), vendor_file, tmp_path / "vendor", wheelhouse=wheelhouse
+    )
+
+    cmd = mock_run.call_args[0][0]
+    assert cmd[cmd.index("--no-index") + 1 :][:2] == ["--find-links", str(wheelhouse)]
+
+
+@patch("vendorpy.utils._get_pyodide_pip")
+@patch("vendorpy.utils.subprocess.run")
+def test_build_wheelhouse(mock_run, mock_get_pip, tmp_path):
+    """Test that the toolchain and vendored packages are downloaded in bulk."""
+    venv_path = tmp_path / "venv"
+    (venv_path / "bin").mkdir(parents=True)
+    (venv_path / "bin" / "pip").touch()
+    (venv_path / "bin" / "pyodide").touch()
+    mock_get_pip.return_value = Path("pyodide-pip")
+    wheelhouse = tmp_path / "wheels"
+    vendor_file = tmp_path / "vendor.txt"
+    vendor_file.write_text("jinja2\n")
+
+    def fake_run(cmd, **kwargs):
+        if "xbuildenv" in cmd:
+            Path(cmd[-1]).mkdir()
+            return MagicMock(stdout="", stderr="")
+        name = (
+            "pyodide_build-0.29.0" if "pyodide-build==0.29.0" in cmd else "jinja2-3.1.4"
+        )
+        (wheelhouse / f"{name}-py3-none-any.whl").touch()
+        return MagicMock(stdout="", stderr="")
+
+    mock_run.side_effect = fake_run
+
+    files = build_wheelhouse(
+        wheelhouse,
+        vendor_file,
+        venv_path,
+        Path("pyodide-venv"),
+        pyodide_build_version="0.29.0",
+    )
+
+    assert files == [
+        "jinja2-3.1.4-py3-none-any.whl",
+        "pyodide_build-0.29.0-py3-none-any.whl",
+    ]
+    host_cmd, xbuildenv_cmd, pyodide_cmd = (
+        call[0][0] for call in mock_run.call_args_list
+    )
+    assert host_cmd[-2:] == ["pip", "pyodide-build==0.29.0"]
+    assert xbuildenv_cmd == [
+        str(venv_path / "bin" / "pyodide"),
+        "xbuildenv",
+        "install",
+        "--path",
+        str(wheelhouse / "xbuildenv"),
+    ]
+    assert pyodide_cmd[0] == "pyodide-pip"
+    assert pyodide_cmd[-2:] == ["-r", str(vendor_file)]
+
+
+@patch("vendorpy.utils.subprocess.run")
+def test_install_from_wheel_store(mock_run, tmp_path, monkeypatch, make_wheel):
+    """Test that wheels are downloaded once and then linked from the store."""
+    monkeypatch.setenv("VENDORPY_CACHE_DIR", str(tmp_path / "cache"))
+    wheel_path = make_wheel(tmp_path)
+    packages = [
+        {
+            "name": "demo",
+            "version": "1.0",
+            "requirement": "demo==1.0",
+            "sha256": hash_file(wheel_path),
+        }
+    ]
+
+    def fake_run(cmd, **kwargs):
+        download_dir = Path(cmd[cmd.index("-d") + 1])
+        shutil.copy(wheel_path, download_dir)
+        return MagicMock(stdout="", stderr="")
+
+    mock_run.side_effect = fake_run
+
+    install_from_wheel_store(Path("pip"), packages, tmp_path / "a" / "vendor")
+    assert mock_run.call_count == 1
+
+    # The second project is served from the store without downloading anything
+    install_from_wheel_store(Path("pip"), packages, tmp_path / "b" / "vendor")
+    assert mock_run.call_count == 1
+    assert (tmp_path / "a" / "vendor" / "demo" / "__init__.py").samefile(
+        tmp_path / "b" / "vendor" / "demo" / "__init__.py"
+    )
+
+
+def test_install_packages_natively(tmp_path, monkeypatch, make_wheel):
+    """Test that pure-Python wheels are installed without the Pyodide toolchain."""
+    monkeypatch.setenv("VENDORPY_CACHE_DIR", str(tmp_path / "cache"))
+    wheelhouse = tmp_path / "wheelhouse"
+    wheelhouse.mkdir()
+    make_wheel(wheelhouse, "jinja2", "3.1.2", requires=["markupsafe>=2.0"])
+    (wheelhouse / "markupsafe-2.1.3-cp312-cp312-pyodide_2024_0_wasm32.whl").touch()
+
+    vendor_file = tmp_path / "vendor.txt"
+    vendor_file.write_text("# templating\njinja2\n")
+    vendor_dir = tmp_path / "vendor"
+
+    summary, fallback = install_packages_natively(
+        vendor_file, vendor_dir, wheelhouse=wheelhouse
+    )
+
+    assert summary["installed"] == ["jinja2"]
+    assert fallback == ["markupsafe>=2.0"]
+    assert (vendor_dir / "jinja2" / "__init__.py").exists()
+
+    # A second run finds jinja2 up to date
+    summary, _fallback = install_packages_natively(
+        vendor_file, vendor_dir, wheelhouse=wheelhouse
+    )
+    assert summary == {"installed": [], "removed": [], "unchanged": ["jinja2"]}
+    # Even with no room in the cache, the store entry in use is not evicted
+    monkeypatch.setenv("VENDORPY_CACHE_MAX_SIZE", "0")
+    make_wheel(wheelhouse, "six", "1.16.0")
+    vendor_file.write_text("jinja2\nsix\n")
+    summary, _fallback = install_packages_natively(
+        vendor_file, vendor_dir, wheelhouse=wheelhouse
+    )
+    assert summary == {"installed": ["six"], "removed": [], "unchanged": ["jinja2"]}
+    assert sorted(entry["wheel"] for entry in list_entries("wheels")) == [
+        "jinja2-3.1.2-py3-none-any.whl",
+        "six-1.16.0-py3-none-any.whl",
+    ]
+
+    # Packages dropped from vendor.txt are removed
+    vendor_file.write_text("six\n")
+    summary, _fallback = install_packages_natively(
+        vendor_file, vendor_dir, wheelhouse=wheelhouse
+    )
+    assert summary == {"installed": [], "removed": ["jinja2"], "unchanged": ["six"]}
+    assert not (vendor_dir / "jinja2").exists()
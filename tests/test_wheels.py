@@ -0,0 +1,165 @@
+"""
+Tests for the vendorpy wheels module.
+"""
+
+import pytest
+
+from vendorpy.distributions import find_installed_distributions, read_record
+from vendorpy.wheels import (
+    add_wheel_to_store,
+    build_wheel_index,
+    hash_file,
+    is_pure_python_wheel,
+    link_tree,
+    lookup_unpacked_wheel,
+    parse_wheel_filename,
+    resolve_pure_python,
+    unpack_wheel,
+)
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Point the vendorpy cache at a temporary directory."""
+    path = tmp_path / "cache"
+    monkeypatch.setenv("VENDORPY_CACHE_DIR", str(path))
+    return path
+
+
+def test_parse_wheel_filename():
+    """Test parsing wheel filenames, including compressed tag sets."""
+    assert parse_wheel_filename("Jinja2-3.1.2-py3-none-any.whl") == (
+        "Jinja2",
+        "3.1.2",
+        ["py3-none-any"],
+    )
+    _name, _version, tags = parse_wheel_filename("six-1.16.0-py2.py3-none-any.whl")
+    assert tags == ["py2-none-any", "py3-none-any"]
+
+    with pytest.raises(ValueError):
+        parse_wheel_filename("demo-1.0.tar.gz")
+
+
+def test_unpack_wheel(tmp_path, make_wheel):
+    """Test that wheels are unpacked like pip install -t and RECORD is rewritten."""
+    wheel_path = make_wheel(
+        tmp_path,
+        files={
+            "demo/__init__.py": "x = 1\n",
+            "demo-1.0.data/purelib/demo_extra.py": "y = 2\n",
+            "demo-1.0.data/data/share/readme.txt": "ignored\n",
+        },
+    )
+    target = tmp_path / "target"
+    unpack_wheel(wheel_path, target)
+
+    assert (target / "demo" / "__init__.py").exists()
+    assert (target / "demo_extra.py").exists()
+    assert not (target / "share").exists()
+
+    record_paths = [
+        path for path, _hash, _size in read_record(target / "demo-1.0.dist-info")
+    ]
+    assert "demo_extra.py" in record_paths
+    assert "demo-1.0.dist-info/INSTALLER" in record_paths
+    assert find_installed_distributions(target)["demo"].version == "1.0"
+
+
+def test_unpack_wheel_rejects_unsafe_paths(tmp_path, make_wheel):
+    """Test that wheels writing outside the target directory are rejected."""
+    wheel_path = make_wheel(tmp_path, files={"../evil.py": ""})
+    with pytest.raises(ValueError):
+        unpack_wheel(wheel_path, tmp_path / "target")
+
+
+def test_wheel_store_hardlinks_into_vendor_dirs(tmp_path, make_wheel):
+    """Test that a stored wheel is unpacked once and hardlinked into vendor dirs."""
+    wheel_path = make_wheel(tmp_path)
+    digest = hash_file(wheel_path)
+    assert lookup_unpacked_wheel(digest) is None
+
+    store_path = add_wheel_to_store(wheel_path)
+    assert lookup_unpacked_wheel(digest) == store_path
+    assert add_wheel_to_store(wheel_path) == store_path
+
+    first = tmp_path / "project-a" / "vendor"
+    second = tmp_path / "project-b" / "vendor"
+    linked = link_tree(store_path, first)
+    link_tree(store_path, second)
+
+    assert "demo/__init__.py" in linked
+    assert not any(path.startswith(".vendorpy") for path in linked)
+    assert (first / "demo" / "__init__.py").samefile(second / "demo" / "__init__.py")
+
+
+def test_is_pure_python_wheel():
+    """Test detecting pure-Python wheels for the Workers Python version."""
+    assert is_pure_python_wheel("six-1.16.0-py2.py3-none-any.whl")
+    assert is_pure_python_wheel("demo-1.0-py312-none-any.whl")
+    assert not is_pure_python_wheel(
+        "markupsafe-2.1.3-cp312-cp312-pyodide_2024_0_wasm32.whl"
+    )
+    assert not is_pure_python_wheel("demo-1.0-py2-none-any.whl")
+
+
+def test_resolve_pure_python(tmp_path, make_wheel):
+    """Test resolving dependencies, extras and markers from a local wheelhouse."""
+    make_wheel(
+        tmp_path,
+        "jinja2",
+        "3.1.2",
+        requires=[
+            "markupsafe>=2.0",
+            "babel>=2.7; extra == 'i18n'",
+            "colorama; sys_platform == 'win32'",
+        ],
+    )
+    make_wheel(tmp_path, "jinja2", "2.11.3")
+    make_wheel(tmp_path, "markupsafe", "1.1.1")
+    make_wheel(tmp_path, "babel", "2.12.1")
+    index = build_wheel_index([tmp_path], include_store=False)
+
+    resolved, unresolved = resolve_pure_python(["jinja2"], index)
+    assert {name: str(c.version) for name, c in resolved.items()} == {"jinja2": "3.1.2"}
+    # Only markupsafe 1.1.1 is available locally, which does not satisfy >=2.0
+    assert unresolved == ["markupsafe>=2.0"]
+
+    resolved, unresolved = resolve_pure_python(["jinja2[i18n]<3"], index)
+    assert sorted(resolved) == ["jinja2"]
+    assert str(resolved["jinja2"].version) == "2.11.3"
+    assert unresolved == []
+
+    make_wheel(tmp_path, "markupsafe", "2.1.3")
+    index = build_wheel_index([tmp_path], include_store=False)
+    resolved, unresolved = resolve_pure_python(["Jinja2[i18n]", "regex"], index)
+    assert sorted(resolved) == ["babel", "jinja2", "markupsafe"]
+    assert unresolved == ["regex"]
+
+
+def test_resolve_pure_python_leaves_subtrees_to_pip(tmp_path, make_wheel):
+    """Test that the dependencies of unresolved packages are not resolved."""
+    make_wheel(tmp_path, "web", "1.0", requires=["core"])
+    make_wheel(tmp_path, "other", "1.0", requires=["core<2"])
+    make_wheel(tmp_path, "core", "2.0", requires=["helper"])
+    make_wheel(tmp_path, "core", "1.0")
+    make_wheel(tmp_path, "helper", "1.0")
+    make_wheel(tmp_path, "tool", "1.0", requires=["missing[cli]>=3; extra == 'all'"])
+    index = build_wheel_index([tmp_path], include_store=False)
+
+    # core 2.0 is picked first, then conflicts with core<2: its dependency helper
+    # is left to pip along with it
+    resolved, unresolved = resolve_pure_python(["web", "other"], index)
+    assert sorted(resolved) == ["other", "web"]
+    assert unresolved == ["core<2"]
+
+    # The extra marker of a dependency is dropped, pip would skip it otherwise
+    resolved, unresolved = resolve_pure_python(["tool[all]"], index)
+    assert sorted(resolved) == ["tool"]
+    assert unresolved == ["missing[cli]>=3"]
+
+    # Every constraint on a package left to pip is passed on, not just the last one
+    resolved, unresolved = resolve_pure_python(
+        ["web", "core>=1.5", "other", "missing>=3", "missing[cli]<4"], index
+    )
+    assert sorted(resolved) == ["other", "web"]
+    assert sorted(unresolved) == ["core<2,>=1.5", "missing[cli]<4,>=3"]